@@ -1,6 +1,6 @@
-from fastapi import FastAPI, UploadFile, File, WebSocket, WebSocketDisconnect, HTTPException, Body, Query
+from fastapi import FastAPI, UploadFile, File, WebSocket, WebSocketDisconnect, HTTPException, Body, Query, Request, Header
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import FileResponse, JSONResponse
+from fastapi.responses import FileResponse, JSONResponse, Response
 from pathlib import Path
 from datetime import datetime
 from typing import List, Optional, Dict, Any
@@ -11,9 +11,11 @@ import numpy as np
 import sys
 import uuid
 import time
-import hashlib
 import re
 import os
+import threading
+import mimetypes
+import aiofiles
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 BASE_DIR = Path(__file__).parent.parent.parent.absolute()
 UPLOAD_DIR = BASE_DIR / 'uploads'
@@ -21,24 +23,42 @@ DATA_DIR = BASE_DIR / 'data'
 RESULTS_DIR = BASE_DIR / 'results'
 BACKEND_HOST = os.getenv('OPENSLAM_BACKEND_HOST', '0.0.0.0')
 BACKEND_PORT = int(os.getenv('OPENSLAM_BACKEND_PORT', 8007))
-from backend.core import format_detector, format_converter, gt_aligner, slam_interface, metrics, plotter, data_loader, visualizer
+from backend.core import format_detector, dataset_scanner, fingerprint, format_converter, gt_aligner, slam_interface, metrics, plotter, data_loader, visualizer
+from core.results_index import ResultsIndex, parse_filter
+from backend.core.run_engine import RunEngine
+from backend.core.state_store import StateStore
+from backend.core.ws_broadcaster import Broadcaster
+from backend.core.thumbnail_cache import get_thumbnail_cache, resolve_size, negotiate_format, cached_file_response, cached_bytes_response
+from backend.core.trajectory_stream import LiveTrajectory, file_trajectory_response, live_trajectory_response, encode_delta, results_trajectory_path
+from backend.core.upload_manager import UploadStore, ArchiveReader, archive_suffix, extract_archive, load_archive_index, archive_names, archive_frames
+import config
 app = FastAPI(title='openslam', version='2.0.0', description='research-grade slam evaluation platform')
 app.add_middleware(CORSMiddleware, allow_origins=['*'], allow_credentials=True, allow_methods=['*'], allow_headers=['*'])
-datasets = {}
-algorithms = {}
-runs = {}
-comparisons = {}
+state_store = StateStore()
+datasets = state_store['datasets']
+algorithms = state_store['algorithms']
+runs = state_store['runs']
+comparisons = state_store['comparisons']
 tasks = {}
 failures = {}
-ws_connections = {}
-activity_log = []
+ws_connections = Broadcaster()
+conversions = {}
+uploads = UploadStore(UPLOAD_DIR)
+archive_reader = ArchiveReader()
+live_trajectories = {}
+activity_log = state_store.activity
+results_index = None
 system_config = {'auto_process': False, 'max_concurrent_runs': 3, 'enable_failure_detection': True, 'default_alignment_method': 'auto', 'plot_formats': ['png', 'pdf'], 'metrics': ['ate', 'rpe', 'robustness', 'alignment']}
+run_engine = RunEngine(system_config['max_concurrent_runs'], lambda run_id, event: _handle_run_event(run_id, event))
+def _get_results_index() -> ResultsIndex:
+    global results_index
+    if results_index is None:
+        results_index = ResultsIndex()
+    return results_index
 def _log_activity(action: str, resource_type: str, resource_id: str, details: Dict[str, Any] = None):
     entry = {'id': str(uuid.uuid4())[:8], 'timestamp': datetime.now().isoformat(), 'action': action, 'resource_type': resource_type, 'resource_id': resource_id, 'details': details or {}}
-    activity_log.insert(0, entry)
-    if len(activity_log) > 1000:
-        activity_log.pop()
-    asyncio.create_task(_broadcast_update({'type': 'activity', 'data': entry}))
+    activity_log.append(entry)
+    ws_connections.publish({'type': 'activity', 'data': entry})
 @app.get('/')
 def root():
     return {'name': 'openslam', 'version': '2.0.0', 'status': 'running', 'timestamp': datetime.now().isoformat(), 'uptime': 0, 'active_connections': len(ws_connections)}
@@ -59,155 +79,259 @@ async def load_dataset(data: dict = Body(...)):
     if not dataset_path.is_dir():
         raise HTTPException(400, 'path must be a directory')
     dataset_id = str(uuid.uuid4())[:8]
-    fmt = format_detector.detect_format(dataset_path)
-    structure = format_detector.get_dataset_structure(dataset_path) if hasattr(format_detector, 'get_dataset_structure') else {}
-    valid, errors = format_detector.validate_dataset(dataset_path, fmt) if hasattr(format_detector, 'validate_dataset') else (True, [])
-    file_count = sum(1 for _ in dataset_path.rglob('*') if _.is_file())
-    dir_size = _get_dir_size(dataset_path)
-    checksum = hashlib.md5(str(dataset_path).encode()).hexdigest()[:8]
-
-    # Generate preview frames immediately (no copying, just reference paths)
-    preview_frames = _get_dataset_frames(dataset_path, fmt, max_frames=5)
-    preview_data = {
-        'frames': preview_frames,
-        'count': len(preview_frames),
-        'urls': [f'/api/dataset/{dataset_id}/frame/{i}' for i in range(len(preview_frames))]
-    } if preview_frames else None
-
-    datasets[dataset_id] = {'id': dataset_id, 'name': name, 'description': description, 'tags': tags, 'path': str(dataset_path), 'format': fmt, 'structure': structure, 'valid': valid, 'errors': errors, 'status': 'uploaded', 'created': datetime.now().isoformat(), 'updated': datetime.now().isoformat(), 'frames': structure.get('frames', 0) if isinstance(structure, dict) else 0, 'sequences': structure.get('sequences', 0) if isinstance(structure, dict) else 0, 'size': dir_size, 'file_count': file_count, 'checksum': checksum, 'metadata': {}, 'sensors': structure.get('sensors', []) if isinstance(structure, dict) else [], 'ground_truth': structure.get('ground_truth', False) if isinstance(structure, dict) else False, 'processed_path': None, 'preview': preview_data, 'statistics': {}}
-    _log_activity('created', 'dataset', dataset_id, {'name': name, 'format': fmt})
-    await _broadcast_update({'type': 'dataset_created', 'dataset': datasets[dataset_id]})
-    return datasets[dataset_id]
+    dataset = datasets.put({'id': dataset_id, 'name': name, 'description': description, 'tags': tags, 'path': str(dataset_path), 'format': None, 'structure': {}, 'valid': None, 'errors': [], 'status': 'scanning', 'created': datetime.now().isoformat(), 'updated': datetime.now().isoformat(), 'frames': 0, 'sequences': 0, 'size': _format_size(0), 'size_bytes': 0, 'file_count': 0, 'checksum': None, 'metadata': {}, 'sensors': [], 'ground_truth': False, 'processed_path': None, 'preview': None, 'statistics': {}})
+    _log_activity('created', 'dataset', dataset_id, {'name': name})
+    await _broadcast_update({'type': 'dataset_created', 'dataset': dataset})
+    asyncio.create_task(_scan_dataset_async(dataset_id, dataset_path, preview=True))
+    return dataset
 @app.post('/api/upload')
 async def upload(file: UploadFile = File(...)):
     file_id = str(uuid.uuid4())[:8]
     upload_path = UPLOAD_DIR / f'{file_id}_{file.filename}'
-    with open(upload_path, 'wb') as f:
-        shutil.copyfileobj(file.file, f)
-    if file.filename.endswith('.zip'):
-        import zipfile
-        extract_dir = UPLOAD_DIR / file_id
-        with zipfile.ZipFile(upload_path, 'r') as z:
-            z.extractall(extract_dir)
-        dataset_path = extract_dir
-        upload_path.unlink()
-    elif file.filename.endswith('.tar.gz'):
-        import tarfile
-        extract_dir = UPLOAD_DIR / file_id
-        with tarfile.open(upload_path, 'r:gz') as t:
-            t.extractall(extract_dir)
-        dataset_path = extract_dir
-        upload_path.unlink()
+    async with aiofiles.open(upload_path, 'wb') as f:
+        while True:
+            block = await file.read(config.UPLOAD_HASH_BLOCK)
+            if not block:
+                break
+            await f.write(block)
+    return await _register_upload(file_id, file.filename, upload_path, 'extract')
+@app.post('/api/uploads')
+def create_upload(data: dict = Body(...)):
+    try:
+        size = int(data.get('size'))
+    except (TypeError, ValueError):
+        raise HTTPException(400, 'invalid_size')
+    session, error = uploads.create(data.get('filename', ''), size, data.get('checksum'), data.get('mode', 'extract'))
+    if error:
+        raise HTTPException(400, error)
+    return session
+@app.get('/api/uploads/{upload_id}')
+def get_upload(upload_id: str):
+    session = uploads.get(upload_id)
+    if session is None:
+        raise HTTPException(404, 'upload not found')
+    return session
+@app.put('/api/uploads/{upload_id}')
+async def upload_chunk(upload_id: str, request: Request, offset: int = Query(...), x_chunk_checksum: Optional[str] = Header(None)):
+    session = uploads.get(upload_id)
+    if session is None:
+        raise HTTPException(404, 'upload not found')
+    session, error = await uploads.write_chunk(session, offset, request.stream(), x_chunk_checksum)
+    if error == 'offset_mismatch':
+        return JSONResponse({'error': error, 'offset': uploads.get(upload_id)['offset']}, status_code=409)
+    if error:
+        raise HTTPException(400, error)
+    if session['offset'] < session['size']:
+        return session
+    valid, error = await asyncio.to_thread(uploads.verify, session)
+    if not valid:
+        session['status'] = 'failed'
+        session['error'] = error
+        uploads.save(session)
+        raise HTTPException(400, error)
+    session['status'] = 'completed'
+    uploads.save(session)
+    dataset = await _register_upload(upload_id, session['filename'], Path(session['path']), session['mode'])
+    session['dataset_id'] = dataset['id']
+    uploads.save(session)
+    return session
+@app.delete('/api/uploads/{upload_id}')
+def delete_upload(upload_id: str):
+    if uploads.get(upload_id) is None:
+        raise HTTPException(404, 'upload not found')
+    uploads.delete(upload_id)
+    return {'id': upload_id, 'status': 'deleted'}
+async def _register_upload(dataset_id: str, filename: str, upload_path: Path, mode: str) -> dict:
+    suffix = archive_suffix(filename)
+    if mode == 'archive':
+        dataset_path = upload_path
+        status = 'indexing'
+    elif suffix is not None:
+        dataset_path = UPLOAD_DIR / dataset_id
+        status = 'extracting'
     else:
         dataset_path = upload_path.parent
-    fmt = format_detector.detect_format(dataset_path)
-    structure = format_detector.get_dataset_structure(dataset_path) if hasattr(format_detector, 'get_dataset_structure') else {}
-    valid, errors = format_detector.validate_dataset(dataset_path, fmt) if hasattr(format_detector, 'validate_dataset') else (True, [])
-    file_count = sum(1 for _ in dataset_path.rglob('*') if _.is_file())
-    dir_size = _get_dir_size(dataset_path)
-    dataset_id = file_id
-    datasets[dataset_id] = {'id': dataset_id, 'name': file.filename, 'description': f'uploaded from {file.filename}', 'tags': ['uploaded'], 'path': str(dataset_path), 'format': fmt, 'structure': structure, 'valid': valid, 'errors': errors, 'status': 'uploaded', 'created': datetime.now().isoformat(), 'updated': datetime.now().isoformat(), 'frames': structure.get('frames', 0) if isinstance(structure, dict) else 0, 'sequences': structure.get('sequences', 0) if isinstance(structure, dict) else 0, 'size': dir_size, 'file_count': file_count, 'checksum': file_id, 'metadata': {}, 'sensors': structure.get('sensors', []) if isinstance(structure, dict) else [], 'ground_truth': structure.get('ground_truth', False) if isinstance(structure, dict) else False, 'processed_path': None, 'preview': None, 'statistics': {}}
-    _log_activity('uploaded', 'dataset', dataset_id, {'filename': file.filename, 'format': fmt})
-    await _broadcast_update({'type': 'dataset_uploaded', 'dataset': datasets[dataset_id]})
-    return datasets[dataset_id]
+        status = 'scanning'
+    dataset = datasets.put({'id': dataset_id, 'name': filename, 'description': f'uploaded from {filename}', 'tags': ['uploaded'], 'path': str(dataset_path), 'format': None, 'structure': {}, 'valid': None, 'errors': [], 'status': status, 'created': datetime.now().isoformat(), 'updated': datetime.now().isoformat(), 'frames': 0, 'sequences': 0, 'size': _format_size(0), 'size_bytes': 0, 'file_count': 0, 'checksum': dataset_id, 'metadata': {}, 'sensors': [], 'ground_truth': False, 'processed_path': None, 'preview': None, 'statistics': {}, 'archive': str(upload_path) if mode == 'archive' else None})
+    _log_activity('uploaded', 'dataset', dataset_id, {'filename': filename, 'mode': mode})
+    await _broadcast_update({'type': 'dataset_uploaded', 'dataset': dataset})
+    if mode == 'archive':
+        asyncio.create_task(_index_archive_async(dataset_id, upload_path))
+    elif suffix is not None:
+        asyncio.create_task(_extract_upload_async(dataset_id, upload_path, dataset_path))
+    else:
+        asyncio.create_task(_scan_dataset_async(dataset_id, dataset_path, preview=False, fingerprint_path=upload_path))
+    return dataset
+async def _extract_upload_async(dataset_id: str, archive_path: Path, dest: Path):
+    loop = asyncio.get_running_loop()
+    def progress(stats: dict):
+        loop.call_soon_threadsafe(ws_connections.publish, {'type': 'dataset_update', 'dataset_id': dataset_id, 'stage': 'extracting', **stats})
+    result, error = await asyncio.to_thread(extract_archive, archive_path, dest, progress)
+    if error:
+        datasets.patch(dataset_id, {'status': 'failed', 'error': error, 'updated': datetime.now().isoformat()})
+        _log_activity('extract_failed', 'dataset', dataset_id, {'error': error})
+        await _broadcast_update({'type': 'dataset_update', 'dataset_id': dataset_id, 'status': 'failed', 'error': error})
+        return
+    archive_path.unlink(missing_ok=True)
+    datasets.patch(dataset_id, {'status': 'scanning', 'updated': datetime.now().isoformat()})
+    await _broadcast_update({'type': 'dataset_update', 'dataset_id': dataset_id, 'status': 'scanning', 'files': result['files']})
+    await _scan_dataset_async(dataset_id, dest, preview=False)
+async def _index_archive_async(dataset_id: str, archive_path: Path):
+    try:
+        index, error = await asyncio.to_thread(load_archive_index, archive_path)
+        if error:
+            datasets.patch(dataset_id, {'status': 'failed', 'error': error, 'updated': datetime.now().isoformat()})
+            await _broadcast_update({'type': 'dataset_update', 'dataset_id': dataset_id, 'status': 'failed', 'error': error})
+            return
+        files, dirs = archive_names(index)
+        fmt = format_detector.detect_format_from_names(files, dirs)
+        valid, errors = format_detector.validate_names(fmt, files, dirs)
+        frames = archive_frames(index, 5)
+        structure = format_detector.describe_structure({'path': str(archive_path), 'files': sorted(files), 'dirs': sorted(dirs), 'sensors': [], 'frames': len(archive_frames(index, len(index['members']))), 'duration': 0, 'has_gt': False}, fmt)
+        preview_data = {'frames': frames, 'count': len(frames), 'urls': [f'/api/dataset/{dataset_id}/frame/{i}' for i in range(len(frames))]} if frames else None
+        size_bytes = sum(size for _, size in index['members'].values())
+        datasets.patch(dataset_id, {'format': fmt, 'structure': structure, 'valid': valid, 'errors': errors, 'status': 'uploaded', 'updated': datetime.now().isoformat(), 'frames': structure['frames'], 'size': _format_size(size_bytes), 'size_bytes': size_bytes, 'file_count': len(index['members']), 'sensors': structure['sensors'], 'preview': preview_data})
+        _log_activity('indexed', 'dataset', dataset_id, {'format': fmt, 'members': len(index['members'])})
+        await _broadcast_update({'type': 'dataset_update', 'dataset_id': dataset_id, 'status': 'uploaded', 'format': fmt})
+        await _fingerprint_dataset_async(dataset_id, archive_path)
+    except Exception as e:
+        datasets.patch(dataset_id, {'status': 'failed', 'error': str(e), 'updated': datetime.now().isoformat()})
+        _log_activity('index_failed', 'dataset', dataset_id, {'error': str(e)})
+        await _broadcast_update({'type': 'dataset_update', 'dataset_id': dataset_id, 'status': 'failed', 'error': str(e)})
+async def _scan_dataset_async(dataset_id: str, dataset_path: Path, preview: bool, fingerprint_path: Optional[Path] = None):
+    loop = asyncio.get_running_loop()
+    try:
+        def progress(stats: dict):
+            loop.call_soon_threadsafe(ws_connections.publish, {'type': 'scan_progress', 'dataset_id': dataset_id, **stats})
+        scan, error = await asyncio.to_thread(dataset_scanner.scan_dataset, dataset_path, progress)
+        if error:
+            datasets.patch(dataset_id, {'status': 'failed', 'error': error, 'updated': datetime.now().isoformat()})
+            _log_activity('scan_failed', 'dataset', dataset_id, {'error': error})
+            await _broadcast_update({'type': 'dataset_update', 'dataset_id': dataset_id, 'status': 'failed', 'error': error})
+            return
+        structure = scan['structure']
+        preview_data = None
+        if preview:
+            preview_frames = await asyncio.to_thread(_get_dataset_frames, dataset_path, scan['format'], 5)
+            preview_data = {'frames': preview_frames, 'count': len(preview_frames), 'urls': [f'/api/dataset/{dataset_id}/frame/{i}' for i in range(len(preview_frames))]} if preview_frames else None
+            get_thumbnail_cache().prewarm(preview_frames)
+        ds = datasets.patch(dataset_id, {'format': scan['format'], 'structure': structure, 'valid': scan['valid'], 'errors': scan['errors'], 'status': 'uploaded', 'updated': datetime.now().isoformat(), 'frames': structure.get('frames', 0), 'sequences': structure.get('sequences', 0), 'size': _format_size(scan['size_bytes']), 'size_bytes': scan['size_bytes'], 'file_count': scan['file_count'], 'sensors': structure.get('sensors', []), 'ground_truth': structure.get('ground_truth', False), 'preview': preview_data})
+        if ds is None:
+            return
+        _log_activity('scanned', 'dataset', dataset_id, {'format': scan['format'], 'file_count': scan['file_count'], 'cached': scan['cached']})
+        await _broadcast_update({'type': 'dataset_update', 'dataset_id': dataset_id, 'status': 'uploaded', 'format': scan['format'], 'file_count': scan['file_count'], 'size': ds['size']})
+        await _fingerprint_dataset_async(dataset_id, fingerprint_path or dataset_path)
+    except Exception as e:
+        datasets.patch(dataset_id, {'status': 'failed', 'error': str(e), 'updated': datetime.now().isoformat()})
+        _log_activity('scan_failed', 'dataset', dataset_id, {'error': str(e)})
+        await _broadcast_update({'type': 'dataset_update', 'dataset_id': dataset_id, 'status': 'failed', 'error': str(e)})
+async def _fingerprint_dataset_async(dataset_id: str, path: Path):
+    loop = asyncio.get_running_loop()
+    def progress(stats: dict):
+        loop.call_soon_threadsafe(ws_connections.publish, {'type': 'fingerprint_progress', 'dataset_id': dataset_id, **stats})
+    result, error = await asyncio.to_thread(fingerprint.fingerprint_dataset, path, progress)
+    if error:
+        return
+    checksum = result['fingerprint'][:config.FINGERPRINT_CHECKSUM_LENGTH]
+    duplicates = [item['id'] for item in datasets.page(filters={'checksum': checksum})[0]['items'] if item['id'] != dataset_id]
+    ds = datasets.patch(dataset_id, {'checksum': checksum, 'fingerprint': result, 'duplicates': duplicates})
+    if ds is None:
+        return
+    await _broadcast_update({'type': 'dataset_update', 'dataset_id': dataset_id, 'checksum': checksum, 'duplicates': duplicates})
 @app.post('/api/dataset/{dataset_id}/process')
 async def process_dataset(dataset_id: str):
-    if dataset_id not in datasets:
+    ds = datasets.get(dataset_id)
+    if ds is None:
         raise HTTPException(404, 'dataset not found')
-    ds = datasets[dataset_id]
     if ds['status'] == 'processing':
         raise HTTPException(400, 'dataset already processing')
+    if ds['status'] in ['scanning', 'extracting', 'indexing']:
+        raise HTTPException(400, f"dataset still {ds['status']}")
+    if ds.get('archive'):
+        raise HTTPException(400, 'archive-backed datasets must be extracted before processing')
     source = Path(ds['path'])
     output = DATA_DIR / dataset_id
     output.mkdir(parents=True, exist_ok=True)
-    datasets[dataset_id]['status'] = 'processing'
-    datasets[dataset_id]['updated'] = datetime.now().isoformat()
-    datasets[dataset_id]['progress'] = 0
+    datasets.patch(dataset_id, {'status': 'processing', 'updated': datetime.now().isoformat(), 'progress': 0})
     _log_activity('processing_started', 'dataset', dataset_id)
     await _broadcast_update({'type': 'dataset_update', 'dataset_id': dataset_id, 'status': 'processing', 'progress': 0})
+    conversions[dataset_id] = threading.Event()
     asyncio.create_task(_process_dataset_async(dataset_id, source, output, ds['format']))
     return {'id': dataset_id, 'status': 'processing', 'message': 'processing started'}
+@app.post('/api/dataset/{dataset_id}/process/cancel')
+async def cancel_dataset_processing(dataset_id: str):
+    if dataset_id not in datasets:
+        raise HTTPException(404, 'dataset not found')
+    if dataset_id not in conversions:
+        raise HTTPException(400, 'dataset not processing')
+    conversions[dataset_id].set()
+    return {'id': dataset_id, 'status': 'cancelling'}
 async def _process_dataset_async(dataset_id: str, source: Path, output: Path, fmt: str):
+    loop = asyncio.get_running_loop()
+    def progress(event: dict):
+        loop.call_soon_threadsafe(_report_conversion_progress, dataset_id, event)
     try:
-        datasets[dataset_id]['progress'] = 10
-        await _broadcast_update({'type': 'dataset_update', 'dataset_id': dataset_id, 'progress': 10})
-        await asyncio.sleep(0.5)
         converter = format_converter.DatasetConverter(source, output, fmt)
-        datasets[dataset_id]['progress'] = 30
-        await _broadcast_update({'type': 'dataset_update', 'dataset_id': dataset_id, 'progress': 30})
-        await asyncio.sleep(0.5)
-        data = converter.convert()
-        datasets[dataset_id]['progress'] = 70
-        await _broadcast_update({'type': 'dataset_update', 'dataset_id': dataset_id, 'progress': 70})
-        await asyncio.sleep(0.3)
-        datasets[dataset_id]['processed_path'] = str(output)
-        datasets[dataset_id]['metadata'] = data if isinstance(data, dict) else {'frames': len(data) if isinstance(data, list) else 0}
-        datasets[dataset_id]['status'] = 'processed'
-        datasets[dataset_id]['progress'] = 100
-        datasets[dataset_id]['updated'] = datetime.now().isoformat()
-        datasets[dataset_id]['frames'] = len(data.get('frames', [])) if isinstance(data, dict) else 0
-        datasets[dataset_id]['statistics'] = _compute_dataset_statistics(datasets[dataset_id])
+        data = await asyncio.to_thread(converter.convert, progress, conversions[dataset_id])
+        ds = datasets.patch(dataset_id, {'processed_path': str(output), 'metadata': data if isinstance(data, dict) else {'frames': len(data) if isinstance(data, list) else 0}, 'status': 'processed', 'progress': 100, 'updated': datetime.now().isoformat(), 'frames': data.get('frame_count', 0) if isinstance(data, dict) else 0})
+        datasets.patch(dataset_id, {'statistics': _compute_dataset_statistics(ds)})
+        converter.clear_parts()
         _log_activity('processing_completed', 'dataset', dataset_id)
         await _broadcast_update({'type': 'dataset_update', 'dataset_id': dataset_id, 'status': 'processed', 'progress': 100})
+    except format_converter.ConversionCancelled:
+        datasets.patch(dataset_id, {'status': 'cancelled', 'updated': datetime.now().isoformat()})
+        _log_activity('processing_cancelled', 'dataset', dataset_id)
+        await _broadcast_update({'type': 'dataset_update', 'dataset_id': dataset_id, 'status': 'cancelled'})
     except Exception as e:
-        datasets[dataset_id]['status'] = 'failed'
-        datasets[dataset_id]['error'] = str(e)
-        datasets[dataset_id]['updated'] = datetime.now().isoformat()
+        datasets.patch(dataset_id, {'status': 'failed', 'error': str(e), 'updated': datetime.now().isoformat()})
         _log_activity('processing_failed', 'dataset', dataset_id, {'error': str(e)})
         await _broadcast_update({'type': 'dataset_update', 'dataset_id': dataset_id, 'status': 'failed', 'error': str(e)})
+    finally:
+        conversions.pop(dataset_id, None)
+def _report_conversion_progress(dataset_id: str, event: dict):
+    progress = int(100 * event['completed'] / event['total']) if event['total'] else 100
+    datasets.patch(dataset_id, {'progress': progress, 'conversion': event})
+    ws_connections.publish({'type': 'dataset_update', 'dataset_id': dataset_id, 'progress': progress, 'unit': event['unit'], 'completed': event['completed'], 'total': event['total'], 'resumed': event['resumed']})
 @app.get('/api/datasets')
-def list_datasets(status: Optional[str] = Query(None), format: Optional[str] = Query(None), tag: Optional[str] = Query(None), search: Optional[str] = Query(None), sort: Optional[str] = Query('created'), order: Optional[str] = Query('desc'), limit: Optional[int] = Query(100), offset: Optional[int] = Query(0)):
-    filtered = list(datasets.values())
-    if status:
-        filtered = [d for d in filtered if d['status'] == status]
-    if format:
-        filtered = [d for d in filtered if d['format'] == format]
-    if tag:
-        filtered = [d for d in filtered if tag in d.get('tags', [])]
-    if search:
-        search_lower = search.lower()
-        filtered = [d for d in filtered if search_lower in d['name'].lower() or search_lower in d.get('description', '').lower()]
-    if sort in ['created', 'updated', 'name', 'size', 'frames']:
-        reverse = order == 'desc'
-        if sort in ['created', 'updated']:
-            filtered.sort(key=lambda x: x.get(sort, ''), reverse=reverse)
-        elif sort == 'name':
-            filtered.sort(key=lambda x: x['name'].lower(), reverse=reverse)
-        elif sort in ['size', 'frames']:
-            filtered.sort(key=lambda x: x.get(sort, 0), reverse=reverse)
-    total = len(filtered)
-    paginated = filtered[offset:offset + limit]
-    return {'datasets': paginated, 'total': total, 'limit': limit, 'offset': offset}
+def list_datasets(status: Optional[str] = Query(None), format: Optional[str] = Query(None), tag: Optional[str] = Query(None), search: Optional[str] = Query(None), sort: Optional[str] = Query('created'), order: Optional[str] = Query('desc'), limit: Optional[int] = Query(config.STATE_PAGE_LIMIT), offset: Optional[int] = Query(0), cursor: Optional[str] = Query(None)):
+    if sort == 'size':
+        sort = 'size_bytes'
+    if sort not in ['created', 'updated', 'name', 'size_bytes', 'frames']:
+        sort = 'created'
+    page, error = datasets.page({'status': status, 'format': format}, tag=tag, search=search, sort=sort, order=order, limit=min(limit, config.STATE_MAX_PAGE_LIMIT), offset=offset, cursor=cursor)
+    if error:
+        raise HTTPException(400, error)
+    return {'datasets': page['items'], 'total': page['total'], 'limit': page['limit'], 'offset': page['offset'], 'next_cursor': page['next_cursor']}
 @app.get('/api/dataset/{dataset_id}')
 def get_dataset(dataset_id: str):
-    if dataset_id not in datasets:
+    ds = datasets.get(dataset_id)
+    if ds is None:
         raise HTTPException(404, 'dataset not found')
-    return datasets[dataset_id]
+    return ds
 @app.patch('/api/dataset/{dataset_id}')
 async def update_dataset(dataset_id: str, data: dict = Body(...)):
     if dataset_id not in datasets:
         raise HTTPException(404, 'dataset not found')
     allowed_fields = ['name', 'description', 'tags']
-    for field in allowed_fields:
-        if field in data:
-            datasets[dataset_id][field] = data[field]
-    datasets[dataset_id]['updated'] = datetime.now().isoformat()
+    fields = {field: data[field] for field in allowed_fields if field in data}
+    ds = datasets.patch(dataset_id, dict(fields, updated=datetime.now().isoformat()))
     _log_activity('updated', 'dataset', dataset_id, data)
     await _broadcast_update({'type': 'dataset_updated', 'dataset_id': dataset_id})
-    return datasets[dataset_id]
+    return ds
 @app.delete('/api/dataset/{dataset_id}')
 async def delete_dataset(dataset_id: str):
-    if dataset_id not in datasets:
+    ds = datasets.get(dataset_id)
+    if ds is None:
         raise HTTPException(404, 'dataset not found')
-    _log_activity('deleted', 'dataset', dataset_id, {'name': datasets[dataset_id]['name']})
-    del datasets[dataset_id]
+    _log_activity('deleted', 'dataset', dataset_id, {'name': ds['name']})
+    datasets.delete(dataset_id)
     await _broadcast_update({'type': 'dataset_deleted', 'dataset_id': dataset_id})
     return {'id': dataset_id, 'status': 'deleted'}
 @app.get('/api/dataset/{dataset_id}/preview')
 async def get_dataset_preview(dataset_id: str, frame: Optional[int] = Query(0)):
-    if dataset_id not in datasets:
+    ds = datasets.get(dataset_id)
+    if ds is None:
         raise HTTPException(404, 'dataset not found')
-    ds = datasets[dataset_id]
     preview = ds.get('preview')
     if not preview or not preview.get('frames'):
         raise HTTPException(404, 'no preview available for this dataset')
@@ -221,13 +345,14 @@ async def get_dataset_preview(dataset_id: str, frame: Optional[int] = Query(0)):
         'frame': frame,
         'preview_url': f'/api/dataset/{dataset_id}/frame/{frame}',
         'total_preview_frames': total_preview_frames,
-        'preview_urls': preview['urls']
+        'preview_urls': preview['urls'],
+        'thumbnail_urls': {level: [f'{url}?size={level}' for url in preview['urls']] for level in config.THUMBNAIL_SIZES}
     }
 @app.get('/api/dataset/{dataset_id}/statistics')
 def get_dataset_statistics(dataset_id: str):
-    if dataset_id not in datasets:
+    ds = datasets.get(dataset_id)
+    if ds is None:
         raise HTTPException(404, 'dataset not found')
-    ds = datasets[dataset_id]
     return {'dataset_id': dataset_id, 'statistics': ds.get('statistics', {})}
 @app.post('/api/algorithm')
 async def create_algorithm(data: dict = Body(...)):
@@ -237,55 +362,45 @@ async def create_algorithm(data: dict = Body(...)):
     params = data.get('params', {})
     template = data.get('template', 'custom')
     tags = data.get('tags', [])
+    plugin = data.get('plugin')
     if not name:
         raise HTTPException(400, 'name required')
     algo_id = str(uuid.uuid4())[:8]
-    algorithms[algo_id] = {'id': algo_id, 'name': name, 'description': description, 'code': code, 'params': params, 'template': template, 'tags': tags, 'type': 'custom', 'created': datetime.now().isoformat(), 'updated': datetime.now().isoformat(), 'runs_count': 0, 'avg_ate': None, 'avg_rpe': None, 'success_rate': None, 'last_run': None}
+    algorithm = algorithms.put({'id': algo_id, 'name': name, 'description': description, 'code': code, 'params': params, 'template': template, 'tags': tags, 'plugin': plugin, 'type': 'custom', 'created': datetime.now().isoformat(), 'updated': datetime.now().isoformat(), 'runs_count': 0, 'avg_ate': None, 'avg_rpe': None, 'success_rate': None, 'last_run': None})
     _log_activity('created', 'algorithm', algo_id, {'name': name, 'template': template})
-    await _broadcast_update({'type': 'algorithm_created', 'algorithm': algorithms[algo_id]})
-    return algorithms[algo_id]
+    await _broadcast_update({'type': 'algorithm_created', 'algorithm': algorithm})
+    return algorithm
 @app.get('/api/algorithms')
-def list_algorithms(type: Optional[str] = Query(None), tag: Optional[str] = Query(None), search: Optional[str] = Query(None), sort: Optional[str] = Query('created'), order: Optional[str] = Query('desc')):
-    filtered = list(algorithms.values())
-    if type:
-        filtered = [a for a in filtered if a['type'] == type]
-    if tag:
-        filtered = [a for a in filtered if tag in a.get('tags', [])]
-    if search:
-        search_lower = search.lower()
-        filtered = [a for a in filtered if search_lower in a['name'].lower() or search_lower in a.get('description', '').lower()]
-    if sort in ['created', 'updated', 'name', 'runs_count']:
-        reverse = order == 'desc'
-        if sort in ['created', 'updated']:
-            filtered.sort(key=lambda x: x.get(sort, ''), reverse=reverse)
-        elif sort == 'name':
-            filtered.sort(key=lambda x: x['name'].lower(), reverse=reverse)
-        elif sort == 'runs_count':
-            filtered.sort(key=lambda x: x.get('runs_count', 0), reverse=reverse)
-    return {'algorithms': filtered}
+def list_algorithms(type: Optional[str] = Query(None), tag: Optional[str] = Query(None), search: Optional[str] = Query(None), sort: Optional[str] = Query('created'), order: Optional[str] = Query('desc'), limit: Optional[int] = Query(None), cursor: Optional[str] = Query(None)):
+    if sort not in ['created', 'updated', 'name', 'runs_count']:
+        sort = 'created'
+    page, error = algorithms.page({'type': type}, tag=tag, search=search, sort=sort, order=order, limit=min(limit, config.STATE_MAX_PAGE_LIMIT) if limit else None, cursor=cursor)
+    if error:
+        raise HTTPException(400, error)
+    return {'algorithms': page['items'], 'total': page['total'], 'next_cursor': page['next_cursor']}
 @app.get('/api/algorithm/{algorithm_id}')
 def get_algorithm(algorithm_id: str):
-    if algorithm_id not in algorithms:
+    algo = algorithms.get(algorithm_id)
+    if algo is None:
         raise HTTPException(404, 'algorithm not found')
-    return algorithms[algorithm_id]
+    return algo
 @app.patch('/api/algorithm/{algorithm_id}')
 async def update_algorithm(algorithm_id: str, data: dict = Body(...)):
     if algorithm_id not in algorithms:
         raise HTTPException(404, 'algorithm not found')
-    allowed_fields = ['name', 'description', 'code', 'params', 'tags']
-    for field in allowed_fields:
-        if field in data:
-            algorithms[algorithm_id][field] = data[field]
-    algorithms[algorithm_id]['updated'] = datetime.now().isoformat()
+    allowed_fields = ['name', 'description', 'code', 'params', 'tags', 'plugin']
+    fields = {field: data[field] for field in allowed_fields if field in data}
+    algo = algorithms.patch(algorithm_id, dict(fields, updated=datetime.now().isoformat()))
     _log_activity('updated', 'algorithm', algorithm_id, data)
     await _broadcast_update({'type': 'algorithm_updated', 'algorithm_id': algorithm_id})
-    return algorithms[algorithm_id]
+    return algo
 @app.delete('/api/algorithm/{algorithm_id}')
 async def delete_algorithm(algorithm_id: str):
-    if algorithm_id not in algorithms:
+    algo = algorithms.get(algorithm_id)
+    if algo is None:
         raise HTTPException(404, 'algorithm not found')
-    _log_activity('deleted', 'algorithm', algorithm_id, {'name': algorithms[algorithm_id]['name']})
-    del algorithms[algorithm_id]
+    _log_activity('deleted', 'algorithm', algorithm_id, {'name': algo['name']})
+    algorithms.delete(algorithm_id)
     await _broadcast_update({'type': 'algorithm_deleted', 'algorithm_id': algorithm_id})
     return {'id': algorithm_id, 'status': 'deleted'}
 @app.get('/api/algorithm/templates')
@@ -301,111 +416,131 @@ async def create_run(data: dict = Body(...)):
     priority = data.get('priority', 'normal')
     if not dataset_id or not algorithm_id:
         raise HTTPException(400, 'dataset_id and algorithm_id required')
-    if dataset_id not in datasets:
+    ds = datasets.get(dataset_id)
+    if ds is None:
         raise HTTPException(404, 'dataset not found')
-    if algorithm_id not in algorithms:
+    algo = algorithms.get(algorithm_id)
+    if algo is None:
         raise HTTPException(404, 'algorithm not found')
-    ds = datasets[dataset_id]
-    algo = algorithms[algorithm_id]
     if ds['status'] != 'processed':
         raise HTTPException(400, 'dataset not processed')
+    plugin = config_override.get('plugin') or algo.get('plugin')
+    if not plugin:
+        raise HTTPException(400, 'algorithm has no plugin')
     run_id = str(uuid.uuid4())[:8]
     timestamp_now = datetime.now().isoformat()
-    runs[run_id] = {'id': run_id, 'dataset_id': dataset_id, 'dataset_name': ds['name'], 'algorithm_id': algorithm_id, 'algorithm_name': algo['name'], 'status': 'queued', 'priority': priority, 'task_type': task_type, 'config': config_override, 'timestamp': timestamp_now, 'created': timestamp_now, 'updated': timestamp_now, 'started': None, 'completed': None, 'progress': 0, 'current_frame': 0, 'total_frames': ds['frames'], 'metrics': {}, 'plots': [], 'error': None, 'duration': 0, 'failure_events': [], 'robustness_timeline': [], 'task_alignment': {}}
+    run = runs.put({'id': run_id, 'dataset_id': dataset_id, 'dataset_name': ds['name'], 'algorithm_id': algorithm_id, 'algorithm_name': algo['name'], 'status': 'queued', 'priority': priority, 'task_type': task_type, 'config': config_override, 'timestamp': timestamp_now, 'created': timestamp_now, 'updated': timestamp_now, 'started': None, 'completed': None, 'progress': 0, 'current_frame': 0, 'total_frames': ds['frames'], 'metrics': {}, 'plots': [], 'error': None, 'duration': 0, 'failure_events': [], 'robustness_timeline': [], 'task_alignment': {}, 'dataset_format': ds.get('format'), 'dataset_checksum': ds.get('checksum')})
     _log_activity('created', 'run', run_id, {'dataset': ds['name'], 'algorithm': algo['name']})
-    await _broadcast_update({'type': 'run_created', 'run': runs[run_id]})
-    asyncio.create_task(_execute_run(run_id, ds, algo, config_override, task_type))
-    return runs[run_id]
+    await _broadcast_update({'type': 'run_created', 'run': run})
+    job = {'plugin': plugin, 'algorithm_name': algo['name'], 'dataset_path': ds['path'], 'dataset_format': ds.get('format'), 'ground_truth_path': config_override.get('ground_truth') or ds['path'], 'alignment': config_override.get('alignment'), 'output_dir': str(RESULTS_DIR / run_id)}
+    await run_engine.submit(run_id, job)
+    return run
 @app.get('/api/runs')
-def list_runs(status: Optional[str] = Query(None), dataset_id: Optional[str] = Query(None), algorithm_id: Optional[str] = Query(None), task_type: Optional[str] = Query(None), sort: Optional[str] = Query('timestamp'), order: Optional[str] = Query('desc'), limit: Optional[int] = Query(100), offset: Optional[int] = Query(0)):
-    filtered = list(runs.values())
-    if status:
-        filtered = [r for r in filtered if r['status'] == status]
-    if dataset_id:
-        filtered = [r for r in filtered if r['dataset_id'] == dataset_id]
-    if algorithm_id:
-        filtered = [r for r in filtered if r['algorithm_id'] == algorithm_id]
-    if task_type:
-        filtered = [r for r in filtered if r.get('task_type') == task_type]
-    if sort in ['timestamp', 'created', 'updated', 'started', 'completed', 'duration']:
-        reverse = order == 'desc'
-        if sort == 'duration':
-            filtered.sort(key=lambda x: x.get(sort, 0), reverse=reverse)
-        else:
-            filtered.sort(key=lambda x: x.get(sort, '') or '', reverse=reverse)
-    total = len(filtered)
-    paginated = filtered[offset:offset + limit]
-    return {'runs': paginated, 'total': total, 'limit': limit, 'offset': offset}
+def list_runs(status: Optional[str] = Query(None), dataset_id: Optional[str] = Query(None), algorithm_id: Optional[str] = Query(None), task_type: Optional[str] = Query(None), sort: Optional[str] = Query('timestamp'), order: Optional[str] = Query('desc'), limit: Optional[int] = Query(config.STATE_PAGE_LIMIT), offset: Optional[int] = Query(0), cursor: Optional[str] = Query(None)):
+    if sort not in ['timestamp', 'created', 'updated', 'started', 'completed', 'duration']:
+        sort = 'timestamp'
+    page, error = runs.page({'status': status, 'dataset_id': dataset_id, 'algorithm_id': algorithm_id, 'task_type': task_type}, sort=sort, order=order, limit=min(limit, config.STATE_MAX_PAGE_LIMIT), offset=offset, cursor=cursor)
+    if error:
+        raise HTTPException(400, error)
+    return {'runs': page['items'], 'total': page['total'], 'limit': page['limit'], 'offset': page['offset'], 'next_cursor': page['next_cursor']}
+@app.get('/api/results/query')
+def query_results(algorithm: Optional[str] = Query(None), dataset: Optional[str] = Query(None), format: Optional[str] = Query(None), source: Optional[str] = Query(None), where: Optional[List[str]] = Query(None), sort: Optional[str] = Query('created'), order: Optional[str] = Query('desc'), limit: Optional[int] = Query(100), offset: Optional[int] = Query(0)):
+    filters = []
+    for expression in where or []:
+        condition, error = parse_filter(expression)
+        if error:
+            raise HTTPException(400, error)
+        filters.append(condition)
+    result, error = _get_results_index().query(algorithm=algorithm, dataset=dataset, dataset_format=format, source=source, filters=filters, sort=sort, order=order, limit=limit, offset=offset)
+    if error:
+        raise HTTPException(400, error)
+    return result
 @app.get('/api/run/{run_id}')
 def get_run(run_id: str):
-    if run_id not in runs:
+    run = runs.get(run_id)
+    if run is None:
         raise HTTPException(404, 'run not found')
-    return runs[run_id]
+    return run
 @app.delete('/api/run/{run_id}')
 async def delete_run(run_id: str):
     if run_id not in runs:
         raise HTTPException(404, 'run not found')
     _log_activity('deleted', 'run', run_id)
-    del runs[run_id]
+    runs.delete(run_id)
     await _broadcast_update({'type': 'run_deleted', 'run_id': run_id})
     return {'id': run_id, 'status': 'deleted'}
 @app.post('/api/run/{run_id}/cancel')
 async def cancel_run(run_id: str):
-    if run_id not in runs:
+    run = runs.get(run_id)
+    if run is None:
         raise HTTPException(404, 'run not found')
-    if runs[run_id]['status'] not in ['running', 'queued']:
+    if run['status'] not in ['running', 'queued']:
         raise HTTPException(400, 'run cannot be cancelled')
-    runs[run_id]['status'] = 'cancelled'
-    runs[run_id]['completed'] = datetime.now().isoformat()
-    runs[run_id]['updated'] = datetime.now().isoformat()
+    run = runs.patch(run_id, {'status': 'cancelled', 'completed': datetime.now().isoformat(), 'updated': datetime.now().isoformat()})
+    await run_engine.cancel(run_id)
     _log_activity('cancelled', 'run', run_id)
     await _broadcast_update({'type': 'run_cancelled', 'run_id': run_id})
-    return runs[run_id]
+    return run
 @app.post('/api/compare')
 async def compare_runs(data: dict = Body(...)):
     run_ids = data.get('run_ids', [])
     comparison_type = data.get('type', 'metrics')
     if len(run_ids) < 2:
         raise HTTPException(400, 'need at least 2 runs')
-    valid_runs = [runs[rid] for rid in run_ids if rid in runs and runs[rid]['status'] == 'completed']
+    found = runs.get_many(run_ids)
+    valid_runs = [found[rid] for rid in run_ids if rid in found and found[rid]['status'] == 'completed']
     if len(valid_runs) < 2:
         raise HTTPException(400, 'not enough completed runs')
     comp_id = str(uuid.uuid4())[:8]
     comparison = {'id': comp_id, 'run_ids': run_ids, 'type': comparison_type, 'runs': valid_runs, 'total_runs': len(valid_runs), 'metrics_count': len(_compute_comparison_statistics(valid_runs)), 'timestamp': datetime.now().isoformat(), 'statistics': _compute_comparison_statistics(valid_runs), 'rankings': _compute_rankings(valid_runs)}
-    comparisons[comp_id] = comparison
+    comparisons.put(comparison)
     _log_activity('created', 'comparison', comp_id, {'run_count': len(valid_runs)})
     return comparison
 @app.get('/api/comparisons')
-def list_comparisons():
-    return {'comparisons': list(comparisons.values())}
+def list_comparisons(limit: Optional[int] = Query(None), cursor: Optional[str] = Query(None)):
+    page, error = comparisons.page(sort='timestamp', limit=min(limit, config.STATE_MAX_PAGE_LIMIT) if limit else None, cursor=cursor)
+    if error:
+        raise HTTPException(400, error)
+    return {'comparisons': page['items'], 'total': page['total'], 'next_cursor': page['next_cursor']}
 @app.get('/api/comparison/{comp_id}')
 def get_comparison(comp_id: str):
-    if comp_id not in comparisons:
+    comparison = comparisons.get(comp_id)
+    if comparison is None:
         raise HTTPException(404, 'comparison not found')
-    return comparisons[comp_id]
+    return comparison
 @app.get('/api/plot/{run_id}/{plot_name}')
 def get_plot(run_id: str, plot_name: str):
     plot_path = RESULTS_DIR / run_id / 'plots' / plot_name
     if not plot_path.exists():
         raise HTTPException(404, 'plot not found')
     return FileResponse(plot_path)
+@app.get('/api/run/{run_id}/trajectory.bin')
+def get_run_trajectory(run_id: str, request: Request, max_points: int = Query(config.TRAJECTORY_MAX_POINTS, ge=0), aligned: bool = Query(False)):
+    run = runs.get(run_id)
+    if run is None:
+        raise HTTPException(404, 'run not found')
+    if run_id in live_trajectories and not aligned:
+        return live_trajectory_response(live_trajectories[run_id].array(), max_points)
+    response, error = file_trajectory_response(request, results_trajectory_path(run_id, aligned), max_points)
+    if error:
+        raise HTTPException(404 if error == 'trajectory_not_found' else 500, error)
+    return response
 @app.get('/api/stats')
 def get_stats():
-    total_datasets = len(datasets)
-    total_algorithms = len(algorithms)
-    total_runs = len(runs)
-    completed_runs = len([r for r in runs.values() if r['status'] == 'completed'])
-    failed_runs = len([r for r in runs.values() if r['status'] == 'failed'])
-    running_runs = len([r for r in runs.values() if r['status'] == 'running'])
-    queued_runs = len([r for r in runs.values() if r['status'] == 'queued'])
-    processed_datasets = len([d for d in datasets.values() if d['status'] == 'processed'])
-    total_frames_processed = sum(d.get('frames', 0) for d in datasets.values() if d['status'] == 'processed')
-    avg_run_duration = np.mean([r['duration'] for r in runs.values() if r['status'] == 'completed' and r['duration'] > 0]) if completed_runs > 0 else 0
+    run_status = runs.count_by('status')
+    dataset_status = datasets.count_by('status')
+    algorithm_types = algorithms.count_by('type')
+    total_datasets = sum(dataset_status.values())
+    total_algorithms = sum(algorithm_types.values())
+    total_runs = sum(run_status.values())
+    completed_runs = run_status.get('completed', 0)
+    total_frames_processed = datasets.aggregate('SUM', 'frames', {'status': 'processed'}) or 0
+    avg_run_duration = (runs.aggregate('AVG', 'duration', {'status': 'completed'}, nonzero=True) or 0) if completed_runs > 0 else 0
     success_rate = (completed_runs / total_runs * 100) if total_runs > 0 else 0
-    return {'total_datasets': total_datasets, 'total_algorithms': total_algorithms, 'total_runs': total_runs, 'completed_runs': completed_runs, 'failed_runs': failed_runs, 'running_runs': running_runs, 'queued_runs': queued_runs, 'cancelled_runs': len([r for r in runs.values() if r['status'] == 'cancelled']), 'processed_datasets': processed_datasets, 'uploading_datasets': len([d for d in datasets.values() if d['status'] == 'uploaded']), 'processing_datasets': len([d for d in datasets.values() if d['status'] == 'processing']), 'failed_datasets': len([d for d in datasets.values() if d['status'] == 'failed']), 'custom_algorithms': len([a for a in algorithms.values() if a['type'] == 'custom']), 'builtin_algorithms': len([a for a in algorithms.values() if a['type'] == 'builtin']), 'total_frames_processed': total_frames_processed, 'avg_run_duration': round(avg_run_duration, 2), 'success_rate': round(success_rate, 2), 'timestamp': datetime.now().isoformat()}
+    return {'total_datasets': total_datasets, 'total_algorithms': total_algorithms, 'total_runs': total_runs, 'completed_runs': completed_runs, 'failed_runs': run_status.get('failed', 0), 'running_runs': run_status.get('running', 0), 'queued_runs': run_status.get('queued', 0), 'cancelled_runs': run_status.get('cancelled', 0), 'processed_datasets': dataset_status.get('processed', 0), 'uploading_datasets': dataset_status.get('uploaded', 0), 'processing_datasets': dataset_status.get('processing', 0), 'failed_datasets': dataset_status.get('failed', 0), 'custom_algorithms': algorithm_types.get('custom', 0), 'builtin_algorithms': algorithm_types.get('builtin', 0), 'total_frames_processed': total_frames_processed, 'avg_run_duration': round(avg_run_duration, 2), 'success_rate': round(success_rate, 2), 'timestamp': datetime.now().isoformat()}
 @app.get('/api/activity')
 def get_activity(limit: Optional[int] = Query(50), offset: Optional[int] = Query(0)):
-    paginated = activity_log[offset:offset + limit]
+    paginated = activity_log.page(limit, offset)
     return {'log': paginated, 'total': len(activity_log), 'limit': limit, 'offset': offset}
 @app.get('/api/config')
 def get_config():
@@ -413,93 +548,109 @@ def get_config():
 @app.post('/api/config')
 async def update_config(data: dict = Body(...)):
     system_config.update(data)
+    if 'max_concurrent_runs' in data:
+        run_engine.set_concurrency(system_config['max_concurrent_runs'])
     _log_activity('updated', 'config', 'system', data)
     await _broadcast_update({'type': 'config_updated', 'config': system_config})
     return system_config
 @app.websocket('/ws/{client_id}')
 async def websocket_endpoint(websocket: WebSocket, client_id: str):
     await websocket.accept()
-    ws_connections[client_id] = {'socket': websocket, 'connected': datetime.now().isoformat(), 'ping_count': 0}
+    client = ws_connections.connect(client_id, websocket)
     try:
-        await websocket.send_json({'type': 'connected', 'client_id': client_id, 'timestamp': datetime.now().isoformat()})
+        ws_connections.send(client_id, {'type': 'connected', 'client_id': client_id})
         while True:
             data = await websocket.receive_text()
             msg = json.loads(data)
             if msg.get('type') == 'ping':
-                ws_connections[client_id]['ping_count'] += 1
-                await websocket.send_json({'type': 'pong', 'timestamp': datetime.now().isoformat()})
+                client.ping_count += 1
+                ws_connections.send(client_id, {'type': 'pong', 'dropped': client.dropped, 'degraded': client.degraded})
             elif msg.get('type') == 'subscribe':
-                ws_connections[client_id]['subscriptions'] = msg.get('channels', [])
-                await websocket.send_json({'type': 'subscribed', 'channels': msg.get('channels', [])})
+                ws_connections.subscribe(client_id, msg.get('channels', []))
+                ws_connections.send(client_id, {'type': 'subscribed', 'channels': msg.get('channels', [])})
     except WebSocketDisconnect:
         pass
     except Exception as e:
         pass
     finally:
-        if client_id in ws_connections:
-            del ws_connections[client_id]
+        ws_connections.disconnect(client_id, client)
 async def _broadcast_update(message: dict):
-    dead_connections = []
-    for client_id, conn in list(ws_connections.items()):
-        try:
-            await conn['socket'].send_json({**message, 'timestamp': datetime.now().isoformat()})
-        except:
-            dead_connections.append(client_id)
-    for client_id in dead_connections:
-        if client_id in ws_connections:
-            del ws_connections[client_id]
-async def _execute_run(run_id: str, ds: dict, algo: dict, config_override: dict, task_type: str):
-    try:
-        start_time = time.time()
-        runs[run_id]['status'] = 'running'
-        runs[run_id]['started'] = datetime.now().isoformat()
-        runs[run_id]['updated'] = datetime.now().isoformat()
-        runs[run_id]['progress'] = 0
+    ws_connections.publish(message)
+def _run_duration(run: dict) -> float:
+    started = datetime.fromisoformat(run['started'] or run['created'])
+    return round((datetime.now() - started).total_seconds(), 2)
+async def _handle_run_event(run_id: str, event: dict):
+    run = runs.get(run_id)
+    if run is None:
+        return
+    now = datetime.now().isoformat()
+    run['updated'] = now
+    event_type = event['type']
+    if event_type == 'started':
+        run['status'] = 'running'
+        run['started'] = now
+        run['progress'] = 0
+        runs.put(run)
+        live_trajectories[run_id] = LiveTrajectory()
         _log_activity('started', 'run', run_id)
         await _broadcast_update({'type': 'run_update', 'run_id': run_id, 'status': 'running', 'progress': 0})
-        output_dir = RESULTS_DIR / run_id
-        output_dir.mkdir(parents=True, exist_ok=True)
-        (output_dir / 'plots').mkdir(parents=True, exist_ok=True)
-        total_frames = ds['frames']
-        for i in range(0, 101, 10):
-            await asyncio.sleep(0.2)
-            runs[run_id]['progress'] = i
-            runs[run_id]['current_frame'] = int(total_frames * i / 100)
-            await _broadcast_update({'type': 'run_update', 'run_id': run_id, 'progress': i, 'current_frame': runs[run_id]['current_frame']})
-        fake_metrics = {'ate_rmse': round(np.random.uniform(0.1, 2.0), 4), 'ate_mean': round(np.random.uniform(0.05, 1.5), 4), 'ate_std': round(np.random.uniform(0.02, 0.5), 4), 'ate_median': round(np.random.uniform(0.05, 1.5), 4), 'ate_max': round(np.random.uniform(1.0, 5.0), 4), 'rpe_rmse': round(np.random.uniform(0.01, 0.5), 4), 'rpe_mean': round(np.random.uniform(0.005, 0.3), 4), 'rpe_std': round(np.random.uniform(0.002, 0.1), 4), 'rpe_median': round(np.random.uniform(0.005, 0.3), 4), 'robustness_score': round(np.random.uniform(60, 95), 2), 'task_alignment_score': round(np.random.uniform(70, 98), 2), 'completion_rate': round(np.random.uniform(85, 100), 2), 'loop_closures': int(np.random.uniform(5, 50)), 'lost_frames': int(np.random.uniform(0, 20))}
-        runs[run_id]['robustness_score'] = fake_metrics['robustness_score']
-        runs[run_id]['task_alignment_score'] = fake_metrics['task_alignment_score']
-        runs[run_id]['status'] = 'completed'
-        runs[run_id]['completed'] = datetime.now().isoformat()
-        runs[run_id]['updated'] = datetime.now().isoformat()
-        runs[run_id]['progress'] = 100
-        runs[run_id]['current_frame'] = total_frames
-        runs[run_id]['metrics'] = fake_metrics
-        runs[run_id]['duration'] = round(time.time() - start_time, 2)
-        runs[run_id]['plots'] = [{'name': 'trajectory_2d', 'path': f'/api/plot/{run_id}/trajectory_2d.png', 'type': 'trajectory'}, {'name': 'trajectory_3d', 'path': f'/api/plot/{run_id}/trajectory_3d.png', 'type': 'trajectory'}, {'name': 'error_distribution', 'path': f'/api/plot/{run_id}/error_distribution.png', 'type': 'analysis'}, {'name': 'ate_over_time', 'path': f'/api/plot/{run_id}/ate_over_time.png', 'type': 'analysis'}, {'name': 'rpe_over_time', 'path': f'/api/plot/{run_id}/rpe_over_time.png', 'type': 'analysis'}, {'name': 'robustness_timeline', 'path': f'/api/plot/{run_id}/robustness_timeline.png', 'type': 'robustness'}]
-        if algo['id'] in algorithms:
-            algorithms[algo['id']]['runs_count'] += 1
-            algorithms[algo['id']]['last_run'] = datetime.now().isoformat()
-        _log_activity('completed', 'run', run_id, {'duration': runs[run_id]['duration'], 'ate_rmse': fake_metrics['ate_rmse']})
+    elif event_type == 'progress':
+        run['total_frames'] = event['total']
+        run['current_frame'] = event['frame']
+        run['progress'] = int(100 * event['frame'] / event['total']) if event['total'] else 0
+        runs.put(run)
+        await _broadcast_update({'type': 'run_update', 'run_id': run_id, 'progress': run['progress'], 'current_frame': run['current_frame']})
+        if event.get('poses') is not None and run_id in live_trajectories:
+            live_trajectories[run_id].extend(event['poses'])
+            await _broadcast_update({'type': 'trajectory_delta', 'run_id': run_id, 'total': live_trajectories[run_id].count, **encode_delta(event['poses'])})
+    elif event_type == 'result':
+        live_trajectories.pop(run_id, None)
+        if run['status'] == 'cancelled':
+            return
+        result_metrics = event['metrics']
+        run['status'] = 'completed'
+        run['completed'] = now
+        run['progress'] = 100
+        run['current_frame'] = event['frames_processed']
+        run['total_frames'] = event['total_frames']
+        run['metrics'] = result_metrics
+        run['robustness_score'] = result_metrics.get('robustness_score')
+        run['duration'] = _run_duration(run)
+        run['plots'] = [{'name': name, 'path': f'/api/plot/{run_id}/{Path(path).name}', 'type': 'trajectory' if name.startswith('trajectory') else 'analysis'} for name, path in event['plots'].items()]
+        runs.put(run)
+        algo_id = run['algorithm_id']
+        algo = algorithms.get(algo_id)
+        if algo is not None:
+            algorithms.patch(algo_id, {'runs_count': algo['runs_count'] + 1, 'last_run': now})
+        ds = datasets.get(run['dataset_id'])
+        _get_results_index().add_run(dict(result_metrics, rpe_trans_rmse=result_metrics.get('rpe_rmse'), frames_processed=event['frames_processed']), algorithm=run['algorithm_name'], dataset=ds['path'] if ds is not None else run['dataset_name'], dataset_format=run.get('dataset_format'), source='api', run_id=run_id, extra={'dataset_id': run['dataset_id'], 'algorithm_id': algo_id, 'task_type': run['task_type']})
+        _log_activity('completed', 'run', run_id, {'duration': run['duration'], 'ate_rmse': result_metrics.get('ate_rmse')})
         await _broadcast_update({'type': 'run_update', 'run_id': run_id, 'status': 'completed', 'progress': 100})
-    except Exception as e:
-        runs[run_id]['status'] = 'failed'
-        runs[run_id]['completed'] = datetime.now().isoformat()
-        runs[run_id]['updated'] = datetime.now().isoformat()
-        runs[run_id]['error'] = str(e)
-        runs[run_id]['duration'] = round(time.time() - start_time, 2)
-        _log_activity('failed', 'run', run_id, {'error': str(e)})
-        await _broadcast_update({'type': 'run_update', 'run_id': run_id, 'status': 'failed', 'error': str(e)})
-def _get_dir_size(path: Path) -> str:
-    try:
-        total_size = sum(f.stat().st_size for f in path.rglob('*') if f.is_file())
-        for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
-            if total_size < 1024:
-                return f'{total_size:.1f} {unit}'
-            total_size /= 1024
-        return f'{total_size:.1f} TB'
-    except:
-        return '0 B'
+    elif event_type == 'cancelled':
+        live_trajectories.pop(run_id, None)
+        if run['status'] != 'cancelled':
+            run['status'] = 'cancelled'
+            run['completed'] = now
+        run['duration'] = _run_duration(run)
+        runs.put(run)
+        await _broadcast_update({'type': 'run_update', 'run_id': run_id, 'status': 'cancelled'})
+    elif event_type == 'error':
+        live_trajectories.pop(run_id, None)
+        if run['status'] == 'cancelled':
+            return
+        run['status'] = 'failed'
+        run['completed'] = now
+        run['error'] = event['error']
+        run['duration'] = _run_duration(run)
+        runs.put(run)
+        _log_activity('failed', 'run', run_id, {'error': event['error']})
+        await _broadcast_update({'type': 'run_update', 'run_id': run_id, 'status': 'failed', 'error': event['error']})
+def _format_size(total_size: float) -> str:
+    for unit in ['B', 'KB', 'MB', 'GB', 'TB']:
+        if total_size < 1024:
+            return f'{total_size:.1f} {unit}'
+        total_size /= 1024
+    return f'{total_size:.1f} TB'
 def _compute_dataset_statistics(ds: dict) -> dict:
     return {'frame_rate': 30, 'duration': ds.get('frames', 0) / 30, 'sensors': len(ds.get('sensors', [])), 'has_ground_truth': ds.get('ground_truth', False), 'estimated_complexity': 'medium'}
 def _compute_comparison_statistics(runs_list: List[dict]) -> dict:
@@ -579,37 +730,72 @@ def _get_dataset_frames(dataset_path: Path, dataset_format: str, max_frames: int
     return frames[:max_frames]
 
 @app.get('/api/dataset/{dataset_id}/frame/{frame_index}')
-async def get_dataset_frame(dataset_id: str, frame_index: int):
+async def get_dataset_frame(dataset_id: str, frame_index: int, request: Request, size: Optional[str] = Query(None)):
     """Serve a frame image directly from the dataset path (no copying)"""
-    if dataset_id not in datasets:
+    ds = datasets.get(dataset_id)
+    if ds is None:
         raise HTTPException(404, 'dataset not found')
 
-    ds = datasets[dataset_id]
-    preview_frames = ds.get('preview', {}).get('frames', [])
+    preview_frames = (ds.get('preview') or {}).get('frames', [])
 
     if frame_index < 0 or frame_index >= len(preview_frames):
         raise HTTPException(404, 'frame index out of range')
 
+    level, error = resolve_size(size)
+    if error:
+        raise HTTPException(400, error)
+
+    if ds.get('archive'):
+        member = preview_frames[frame_index]
+        archive_stat = os.stat(ds['archive'])
+        if level is not None:
+            fmt = negotiate_format(request)
+            thumbnail, error = await get_thumbnail_cache().get(ds['archive'], level, fmt, member=member, loader=lambda: archive_reader.read(ds['archive'], member)[0])
+            if error:
+                raise HTTPException(404, error)
+            return cached_file_response(request, thumbnail, f'image/{fmt}', source_stat=archive_stat, variant=f'-{member}-{level}-{fmt}')
+        content, error = await asyncio.to_thread(archive_reader.read, ds['archive'], member)
+        if error:
+            raise HTTPException(404, error)
+        return cached_bytes_response(request, content, mimetypes.guess_type(member)[0] or 'application/octet-stream', archive_stat, variant=f'-{member}')
+
     frame_path = Path(preview_frames[frame_index])
 
     if not frame_path.exists():
         raise HTTPException(404, 'frame file not found')
 
-    return FileResponse(str(frame_path), media_type='image/png')
+    if level is not None:
+        fmt = negotiate_format(request)
+        thumbnail, error = await get_thumbnail_cache().get(frame_path, level, fmt)
+        if error:
+            raise HTTPException(404, error)
+        return cached_file_response(request, thumbnail, f'image/{fmt}', source_stat=frame_path.stat(), variant=f'-{level}-{fmt}')
+    return cached_file_response(request, frame_path, mimetypes.guess_type(frame_path.name)[0] or 'image/png')
 @app.on_event('startup')
 async def startup():
     for d in [UPLOAD_DIR, DATA_DIR, RESULTS_DIR]:
         Path(d).mkdir(parents=True, exist_ok=True)
+    for status in ['queued', 'running']:
+        page, _ = runs.page({'status': status})
+        for run in page['items']:
+            runs.patch(run['id'], {'status': 'failed', 'error': 'interrupted_by_restart', 'updated': datetime.now().isoformat()})
+    page, _ = datasets.page({'status': 'processing'})
+    for ds in page['items']:
+        datasets.patch(ds['id'], {'status': 'interrupted', 'updated': datetime.now().isoformat()})
+    for status in ['scanning', 'extracting', 'indexing']:
+        page, _ = datasets.page({'status': status})
+        for ds in page['items']:
+            datasets.patch(ds['id'], {'status': 'failed', 'error': 'interrupted_by_restart', 'updated': datetime.now().isoformat()})
+    await run_engine.start()
     print(f'\033[1;32m✓ openslam v2.0 started\033[0m')
     print(f'  api: http://{BACKEND_HOST}:{BACKEND_PORT}')
     print(f'  docs: http://{BACKEND_HOST}:{BACKEND_PORT}/docs')
 @app.on_event('shutdown')
 async def shutdown():
-    for client_id, conn in list(ws_connections.items()):
-        try:
-            await conn['socket'].close()
-        except:
-            pass
+    await run_engine.shutdown()
+    state_store.close()
+    await ws_connections.close_all()
+    archive_reader.close()
     print(f'\033[1;33m✓ openslam v2.0 shutdown complete\033[0m')
 if __name__ == '__main__':
     import uvicorn
@@ -1,7 +1,14 @@
-from fastapi import APIRouter
+from fastapi import APIRouter, Request
+from typing import Optional
 from shared.protocol import create_api_response
 from shared.errors import format_error
 from backend.core.dataset_manager import DatasetManager
+from backend.core.trajectory_stream import file_trajectory_lod, file_trajectory_response
+from backend.core.point_cloud import load_downsampled, load_octree, points_response
+from backend.core.thumbnail_cache import get_thumbnail_cache, resolve_size, negotiate_format, cached_file_response
+from config.openslam_config import DECIMATE_MAX_POINTS
+import numpy as np
+import asyncio
 dataset_manager = DatasetManager()
 router = APIRouter()
 @router.get("/datasets")
@@ -23,39 +30,83 @@ async def load_dataset(request: dict):
     if "error" in result:
         return result
     return create_api_response(result)
+def _ground_truth_trajectory(dataset_id, max_points):
+    selected, error = file_trajectory_lod(dataset_manager.frame_index_path(dataset_id, "poses"), max_points)
+    if error:
+        return None, error
+    poses = dataset_manager.get_frame_index(dataset_id)["poses"]
+    return [{"position": poses[i, :, 3].tolist(), "pose": poses[i].tolist(), "frame_id": int(i)} for i in selected[:, 0].astype(np.int64)], None
 @router.get("/datasets/{dataset_id}/ground-truth")
-async def get_ground_truth(dataset_id: str):
+async def get_ground_truth(dataset_id: str, max_points: int = DECIMATE_MAX_POINTS):
     dataset = dataset_manager.get_dataset(dataset_id)
     if not dataset:
         return format_error("Dataset not found", 1002, {"dataset_id": dataset_id})
     if not dataset.get("metadata", {}).get("has_ground_truth"):
         return format_error("Dataset has no ground truth", 1002, {"dataset_id": dataset_id})
-    frames = dataset_manager.load_frame_range(dataset_id, 0, dataset["sequence_length"])
-    trajectory = []
-    for frame in frames:
-        if "ground_truth_pose" in frame:
-            pose_matrix = frame["ground_truth_pose"]
-            pose_list = [[float(pose_matrix[0][0]), float(pose_matrix[0][1]), float(pose_matrix[0][2]), float(pose_matrix[0][3])], [float(pose_matrix[1][0]), float(pose_matrix[1][1]), float(pose_matrix[1][2]), float(pose_matrix[1][3])], [float(pose_matrix[2][0]), float(pose_matrix[2][1]), float(pose_matrix[2][2]), float(pose_matrix[2][3])]]
-            trajectory.append({"position": [float(pose_matrix[0][3]), float(pose_matrix[1][3]), float(pose_matrix[2][3])], "pose": pose_list, "frame_id": frame["frame_id"]})
+    trajectory, error = await asyncio.to_thread(_ground_truth_trajectory, dataset_id, max_points)
+    if error:
+        return format_error("Ground truth could not be loaded", 1003, {"dataset_id": dataset_id, "error": error})
     return {"trajectory": trajectory}
+@router.get("/datasets/{dataset_id}/ground-truth.bin")
+async def get_ground_truth_binary(dataset_id: str, request: Request, max_points: int = DECIMATE_MAX_POINTS):
+    dataset = dataset_manager.get_dataset(dataset_id)
+    if not dataset:
+        return format_error("Dataset not found", 1002, {"dataset_id": dataset_id})
+    if not dataset.get("metadata", {}).get("has_ground_truth"):
+        return format_error("Dataset has no ground truth", 1002, {"dataset_id": dataset_id})
+    response, error = await asyncio.to_thread(lambda: file_trajectory_response(request, dataset_manager.frame_index_path(dataset_id, "poses"), max_points))
+    if error:
+        return format_error("Ground truth could not be loaded", 1003, {"dataset_id": dataset_id, "error": error})
+    return response
 @router.get("/datasets/{dataset_id}/lidar/{frame_id}")
-async def get_lidar_data(dataset_id: str, frame_id: int, resolution: int = 10000):
-    lidar_data = dataset_manager.load_lidar_data(dataset_id, frame_id)
-    if lidar_data is None:
+async def get_lidar_data(dataset_id: str, frame_id: int, resolution: int = 10000, voxel_size: Optional[float] = None):
+    lidar_path = dataset_manager.get_sensor_data_path(dataset_id, "velodyne", frame_id)
+    result, stat, error = await asyncio.to_thread(load_downsampled, lidar_path or "", resolution, voxel_size)
+    if error:
+        return format_error("Lidar data not found", 1002, {"dataset_id": dataset_id, "frame_id": frame_id})
+    lidar_data, voxel = result
+    return {"x": lidar_data[:, 0].tolist(), "y": lidar_data[:, 1].tolist(), "z": lidar_data[:, 2].tolist(), "intensity": lidar_data[:, 3].tolist(), "voxel_size": voxel}
+@router.get("/datasets/{dataset_id}/lidar/{frame_id}/points.bin")
+async def get_lidar_points(dataset_id: str, frame_id: int, request: Request, resolution: int = 10000, voxel_size: Optional[float] = None):
+    lidar_path = dataset_manager.get_sensor_data_path(dataset_id, "velodyne", frame_id)
+    result, stat, error = await asyncio.to_thread(load_downsampled, lidar_path or "", resolution, voxel_size)
+    if error:
+        return format_error("Lidar data not found", 1002, {"dataset_id": dataset_id, "frame_id": frame_id})
+    points, voxel = result
+    return points_response(request, points, stat, f"-{resolution}-{voxel_size}", {"X-Voxel-Size": str(voxel)})
+@router.get("/datasets/{dataset_id}/lidar/{frame_id}/octree")
+async def get_lidar_octree(dataset_id: str, frame_id: int):
+    lidar_path = dataset_manager.get_sensor_data_path(dataset_id, "velodyne", frame_id)
+    octree, stat, error = await asyncio.to_thread(load_octree, lidar_path or "")
+    if error:
+        return format_error("Lidar data not found", 1002, {"dataset_id": dataset_id, "frame_id": frame_id})
+    return create_api_response(octree.hierarchy())
+@router.get("/datasets/{dataset_id}/lidar/{frame_id}/tiles/{level}/{x}/{y}/{z}")
+async def get_lidar_tile(dataset_id: str, frame_id: int, level: int, x: int, y: int, z: int, request: Request):
+    lidar_path = dataset_manager.get_sensor_data_path(dataset_id, "velodyne", frame_id)
+    octree, stat, error = await asyncio.to_thread(load_octree, lidar_path or "")
+    if error:
         return format_error("Lidar data not found", 1002, {"dataset_id": dataset_id, "frame_id": frame_id})
-    if len(lidar_data) > resolution:
-        import numpy as np
-        indices = np.random.choice(len(lidar_data), resolution, replace=False)
-        lidar_data = lidar_data[indices]
-    return {"x": lidar_data[:, 0].tolist(), "y": lidar_data[:, 1].tolist(), "z": lidar_data[:, 2].tolist(), "intensity": lidar_data[:, 3].tolist()}
+    tile = octree.tile(level, x, y, z)
+    if tile is None:
+        return format_error("Tile not found", 1002, {"dataset_id": dataset_id, "frame_id": frame_id, "tile": f"{level}/{x}/{y}/{z}"})
+    return points_response(request, tile, stat, f"-{level}-{x}-{y}-{z}")
 @router.get("/datasets/{dataset_id}/frame/{frame_id}/{sensor}")
-async def get_frame_image(dataset_id: str, frame_id: int, sensor: str):
-    from fastapi.responses import FileResponse
+async def get_frame_image(dataset_id: str, frame_id: int, sensor: str, request: Request, size: Optional[str] = None):
     import os
     path = dataset_manager.get_sensor_data_path(dataset_id, sensor, frame_id)
-    if path and os.path.exists(path):
-        return FileResponse(path)
-    return format_error("Image not found", 1002, {"dataset_id": dataset_id, "frame_id": frame_id, "sensor": sensor})
+    if not path or not os.path.exists(path):
+        return format_error("Image not found", 1002, {"dataset_id": dataset_id, "frame_id": frame_id, "sensor": sensor})
+    level, error = resolve_size(size)
+    if error:
+        return format_error("Unknown thumbnail size", 1001, {"size": size})
+    if level is None:
+        return cached_file_response(request, path)
+    fmt = negotiate_format(request)
+    thumbnail, error = await get_thumbnail_cache().get(path, level, fmt)
+    if error:
+        return format_error("Thumbnail failed", 1003, {"dataset_id": dataset_id, "frame_id": frame_id, "error": error})
+    return cached_file_response(request, thumbnail, f"image/{fmt}", source_stat=os.stat(path), variant=f"-{level}-{fmt}")
 @router.get("/algorithms")
 async def get_algorithms():
     return create_api_response([])
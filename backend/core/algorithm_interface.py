@@ -4,6 +4,7 @@ from typing import Dict, List, Optional, Tuple, Any
 import numpy as np
 sys.path.append('/home/arman/project/SLAM/v1/OpenSLAM_v0.1')
 from shared.models import TrajectoryPoint, PerformanceMetrics
+from backend.core.scan_cache import get_scan_cache
 class SLAMAlgorithm(ABC):
     def __init__(self, algorithm_id: str, name: str):
         self.algorithm_id = algorithm_id
@@ -120,7 +121,7 @@ class LiDARSLAM(SLAMAlgorithm):
         self.previous_scan = processed_scan
         return result
     def _load_lidar_data(self, lidar_path: str) -> np.ndarray:
-        return np.fromfile(lidar_path, dtype=np.float32).reshape(-1, 4)
+        return get_scan_cache().load(lidar_path, writable=True)
     def get_current_pose(self) -> np.ndarray:
         return self.current_pose.copy()
     def get_trajectory(self) -> List[TrajectoryPoint]:
@@ -1,74 +1,119 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
 from pathlib import Path
 import numpy as np
 import cv2
-import json
 import config
+from backend.core.image_cache import get_image_cache
+from backend.core.frame_store import open_metadata
 
+REDUCED_COLOR = {1: cv2.IMREAD_COLOR, 2: cv2.IMREAD_REDUCED_COLOR_2, 4: cv2.IMREAD_REDUCED_COLOR_4, 8: cv2.IMREAD_REDUCED_COLOR_8}
+REDUCED_GRAYSCALE = {1: cv2.IMREAD_GRAYSCALE, 2: cv2.IMREAD_REDUCED_GRAYSCALE_2, 4: cv2.IMREAD_REDUCED_GRAYSCALE_4, 8: cv2.IMREAD_REDUCED_GRAYSCALE_8}
+def decode_mode(reduce=1, grayscale=False):
+    flags = REDUCED_GRAYSCALE if grayscale else REDUCED_COLOR
+    if reduce not in flags:
+        raise ValueError(f'unsupported_reduce_factor: {reduce}')
+    variant = 'gray' if grayscale else 'rgb'
+    return flags[reduce], variant if reduce == 1 else f'{variant}/{reduce}'
 class DataLoader:
-    def __init__(self, dataset_path):
+    def __init__(self, dataset_path, image_cache=None, workers=None):
         self.path = Path(dataset_path)
         self.metadata = self._load_metadata()
-        self.frame_cache = {}
+        self.image_cache = image_cache or get_image_cache()
+        self.workers = workers or config.DECODE_WORKERS
+        self.executor = None
+        self.decode_stats = {'images': 0, 'pixels': 0, 'bytes': 0, 'seconds': 0.0}
     def _load_metadata(self):
-        meta_file = self.path / 'metadata.json'
-        if meta_file.exists():
-            with open(meta_file) as f:
-                return json.load(f)
-        return {}
-    def load_image(self, frame_id, sensor='image_0'):
-        cache_key = f'{frame_id}_{sensor}'
-        if cache_key in self.frame_cache:
-            return self.frame_cache[cache_key]
+        metadata, self.store = open_metadata(self.path)
+        return metadata
+    def _frame_path(self, frame_id, sensor):
         frames = self.metadata.get('frames', [])
         if frame_id >= len(frames):
             return None
-        frame = frames[frame_id]
-        images = frame.get('images', {})
+        images = frames[frame_id].get('images', {})
         if sensor not in images:
             return None
-        img_path = Path(images[sensor])
-        if not img_path.exists():
+        return images[sensor]
+    def load_image(self, frame_id, sensor='image_0', reduce=1, grayscale=False):
+        img_path = self._frame_path(frame_id, sensor)
+        if img_path is None:
             return None
-        img = cv2.imread(str(img_path))
-        if img is not None:
-            img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
-        self.frame_cache[cache_key] = img
-        return img
+        flag, variant = decode_mode(reduce, grayscale)
+        return self.image_cache.get(img_path, variant, lambda path: self._decode(path, flag, grayscale))
     def load_depth(self, frame_id):
-        frames = self.metadata.get('frames', [])
-        if frame_id >= len(frames):
-            return None
-        frame = frames[frame_id]
-        images = frame.get('images', {})
-        if 'depth' not in images:
-            return None
-        depth_path = Path(images['depth'])
-        if not depth_path.exists():
+        depth_path = self._frame_path(frame_id, 'depth')
+        if depth_path is None:
             return None
-        depth = cv2.imread(str(depth_path), cv2.IMREAD_ANYDEPTH)
-        return depth
+        return self.image_cache.get(depth_path, 'depth', lambda path: cv2.imread(path, cv2.IMREAD_ANYDEPTH))
+    def _decode(self, path, flag, grayscale):
+        img = cv2.imread(path, flag)
+        if img is not None and not grayscale:
+            img = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+        return img
     def load_lidar(self, frame_id):
         return None
-    def get_frame_data(self, frame_id):
+    def get_frame_data(self, frame_id, sensors=None, reduce=1, grayscale=False):
+        return self.get_frames([frame_id], sensors=sensors, reduce=reduce, grayscale=grayscale)[0]
+    def get_frames(self, frame_ids, sensors=None, reduce=1, grayscale=False):
+        decode_mode(reduce, grayscale)
         frames = self.metadata.get('frames', [])
-        if frame_id >= len(frames):
-            return None
-        frame = frames[frame_id]
-        data = {'frame_id': frame_id, 'timestamp': frame.get('timestamp', frame_id / 10.0), 'images': {}}
-        for sensor in frame.get('images', {}).keys():
-            img = self.load_image(frame_id, sensor)
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='decode')
+        started = time.perf_counter()
+        results = []
+        jobs = []
+        for frame_id in frame_ids:
+            if frame_id >= len(frames):
+                results.append(None)
+                continue
+            frame = frames[frame_id]
+            data = {'frame_id': frame_id, 'timestamp': frame.get('timestamp', frame_id / 10.0), 'images': {}}
+            results.append(data)
+            for sensor in frame.get('images', {}).keys():
+                if sensors is None or sensor in sensors:
+                    jobs.append((data['images'], sensor, self.executor.submit(self.load_image, frame_id, sensor, reduce, grayscale)))
+            if sensors is None or 'depth' in sensors:
+                jobs.append((data, 'depth', self.executor.submit(self.load_depth, frame_id)))
+            lidar = self.load_lidar(frame_id)
+            if lidar is not None:
+                data['lidar'] = lidar
+        for target, key, future in jobs:
+            img = future.result()
             if img is not None:
-                data['images'][sensor] = img
-        depth = self.load_depth(frame_id)
-        if depth is not None:
-            data['depth'] = depth
-        lidar = self.load_lidar(frame_id)
-        if lidar is not None:
-            data['lidar'] = lidar
-        return data
+                target[key] = img
+                self.decode_stats['images'] += 1
+                self.decode_stats['pixels'] += img.shape[0] * img.shape[1]
+                self.decode_stats['bytes'] += img.nbytes
+        self.decode_stats['seconds'] += time.perf_counter() - started
+        return results
+    def get_decode_stats(self):
+        stats = dict(self.decode_stats)
+        seconds = stats['seconds']
+        stats['images_per_sec'] = stats['images'] / seconds if seconds > 0 else 0.0
+        stats['megapixels_per_sec'] = stats['pixels'] / 1e6 / seconds if seconds > 0 else 0.0
+        stats['cache'] = self.image_cache.stats()
+        return stats
+    def close(self):
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
     def get_num_frames(self):
         return len(self.metadata.get('frames', []))
+    def get_imu(self):
+        if self.store is not None:
+            return self.store.imu()
+        imu = self.metadata.get('imu')
+        if not imu:
+            return None
+        return np.array([[sample['timestamp'], *sample['gyro'], *sample['accel']] for sample in imu])
     def get_ground_truth(self):
+        if self.store is not None:
+            gt = self.store.ground_truth()
+            if gt is None:
+                return None
+            if self.store.info.get('ground_truth_layout') == 'tum':
+                return np.array([self._quat_to_matrix(row[1:4], row[4:8]) for row in gt])
+            return np.array(gt)
         gt = self.metadata.get('ground_truth')
         if gt is None:
             return None
@@ -1,12 +1,20 @@
 import asyncio
+import hashlib
+import heapq
+import os
 import sys
+import time
+import cv2
 import numpy as np
-from typing import Dict, List, Optional, Tuple, AsyncGenerator
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Iterator, List, Optional, Tuple, AsyncGenerator
 from datetime import datetime
 sys.path.append('/home/arman/project/SLAM/v1/OpenSLAM_v0.1')
+import config
 from backend.core.dataset_manager import DatasetManager
+from core.playback import PlaybackQueue, PlaybackStats, parse_rate, release_offsets
 class DataStream:
-    def __init__(self, dataset_manager: DatasetManager, dataset_id: str, frame_range: Optional[Tuple[int, int]] = None):
+    def __init__(self, dataset_manager: DatasetManager, dataset_id: str, frame_range: Optional[Tuple[int, int]] = None, lookahead: Optional[int] = None, workers: Optional[int] = None, decode: bool = False):
         self.dataset_manager = dataset_manager
         self.dataset_id = dataset_id
         self.dataset = dataset_manager.get_dataset(dataset_id)
@@ -20,22 +28,154 @@ class DataStream:
             self.start_frame = 0
             self.end_frame = self.dataset.sequence_length
         self.current_frame = self.start_frame
+        self.lookahead = max(1, lookahead or config.STREAM_LOOKAHEAD)
+        self.workers = workers or config.STREAM_WORKERS
+        self.decode = decode
+        self.executor: Optional[ThreadPoolExecutor] = None
+        self.pending: Dict[int, Future] = {}
+        self.frames_yielded = 0
+        self.wait_time = 0.0
+        self.started_at: Optional[float] = None
+        self.playback_stats: Optional[PlaybackStats] = None
+        self.playback_report: Optional[Dict] = None
+    def _load(self, frame_idx: int) -> Optional[Dict]:
+        frame_data = self.dataset_manager.load_frame_data(self.dataset_id, frame_idx)
+        if frame_data is None or not self.decode:
+            return frame_data
+        for sensor in list(frame_data):
+            if sensor.startswith("image"):
+                frame_data[f"{sensor}_data"] = cv2.imread(frame_data[sensor], cv2.IMREAD_UNCHANGED)
+            elif sensor == "velodyne":
+                frame_data["velodyne_data"] = self.dataset_manager.load_lidar_data(self.dataset_id, frame_idx)
+        return frame_data
+    def _prefetch(self) -> None:
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix=f"stream-{self.dataset_id}")
+        for frame_idx in range(self.current_frame, min(self.current_frame + self.lookahead, self.end_frame)):
+            if frame_idx not in self.pending:
+                self.pending[frame_idx] = self.executor.submit(self._load, frame_idx)
+    def _cancel_outside_window(self) -> None:
+        window = range(self.current_frame, min(self.current_frame + self.lookahead, self.end_frame))
+        for frame_idx in [idx for idx in self.pending if idx not in window]:
+            self.pending.pop(frame_idx).cancel()
     async def next_frame(self) -> Optional[Dict]:
         if self.current_frame >= self.end_frame:
             return None
-        frame_data = self.dataset_manager.load_frame_data(self.dataset_id, self.current_frame)
-        self.current_frame += 1
-        return frame_data
-    async def stream_frames(self) -> AsyncGenerator[Dict, None]:
+        if self.started_at is None:
+            self.started_at = time.monotonic()
         while self.current_frame < self.end_frame:
-            frame_data = await self.next_frame()
-            if frame_data:
+            self._prefetch()
+            frame_idx = self.current_frame
+            future = self.pending[frame_idx]
+            waited = time.monotonic()
+            try:
+                frame_data = await asyncio.wrap_future(future)
+            except asyncio.CancelledError:
+                if future.cancelled() and self.current_frame != frame_idx:
+                    continue
+                raise
+            finally:
+                self.wait_time += time.monotonic() - waited
+            self.pending.pop(frame_idx, None)
+            if self.current_frame == frame_idx:
+                self.current_frame += 1
+            self.frames_yielded += 1
+            self._prefetch()
+            return frame_data
+        return None
+    async def stream_frames(self) -> AsyncGenerator[Dict, None]:
+        try:
+            while self.current_frame < self.end_frame:
+                frame_data = await self.next_frame()
+                if frame_data:
+                    yield frame_data
+        finally:
+            self.close()
+    async def playback(self, rate: Any = None, drop_policy: str = "block", queue_size: Optional[int] = None) -> AsyncGenerator[Dict, None]:
+        rate, error = parse_rate(rate)
+        if error:
+            raise ValueError(error)
+        queue = PlaybackQueue(drop_policy, queue_size)
+        first = self.current_frame
+        count = self.end_frame - first
+        timestamps = self.dataset_manager.get_frame_index(self.dataset_id)["timestamps"][first:self.end_frame]
+        stats = self.playback_stats = PlaybackStats(release_offsets(timestamps, count, rate), rate, drop_policy)
+        ready = asyncio.Condition()
+        finished = False
+        async def produce() -> None:
+            nonlocal finished
+            try:
+                for position in range(count):
+                    frame_idx = self.current_frame
+                    frame_data = await self.next_frame()
+                    delay = stats.delay(position)
+                    if delay > 0:
+                        await asyncio.sleep(delay)
+                    if not frame_data:
+                        continue
+                    async with ready:
+                        if queue.drop_policy == "block":
+                            await ready.wait_for(lambda: not queue.full())
+                        queue.put((position, frame_idx, frame_data, stats.release()))
+                        ready.notify_all()
+            finally:
+                async with ready:
+                    finished = True
+                    ready.notify_all()
+        stats.start()
+        producer = asyncio.create_task(produce())
+        try:
+            while True:
+                async with ready:
+                    await ready.wait_for(lambda: len(queue) > 0 or finished)
+                    if len(queue) == 0:
+                        break
+                    position, frame_idx, frame_data, released = queue.get()
+                    ready.notify_all()
+                began = stats.begin(position, frame_idx, released)
                 yield frame_data
+                stats.end(began)
+        finally:
+            producer.cancel()
+            try:
+                await producer
+            except asyncio.CancelledError:
+                pass
+            stats.finish()
+            self.playback_report = stats.report(queue.dropped)
+            self.close()
     def reset(self):
-        self.current_frame = self.start_frame
+        self.seek(self.start_frame)
     def seek(self, frame_idx: int):
         if self.start_frame <= frame_idx < self.end_frame:
             self.current_frame = frame_idx
+            self._cancel_outside_window()
+    def close(self) -> None:
+        for future in self.pending.values():
+            future.cancel()
+        self.pending.clear()
+        if self.executor is not None:
+            self.executor.shutdown(wait=False, cancel_futures=True)
+            self.executor = None
+    def get_fps(self) -> float:
+        if self.started_at is None or self.frames_yielded == 0:
+            return 0.0
+        elapsed = time.monotonic() - self.started_at
+        return self.frames_yielded / elapsed if elapsed > 0 else 0.0
+    def get_stats(self) -> Dict:
+        return {"fps": self.get_fps(), "frames": self.frames_yielded, "wait_time": self.wait_time, "prefetched": sum(1 for future in self.pending.values() if future.done()), "pending": len(self.pending), "lookahead": self.lookahead}
+    def merged_stream(self, imu_csv: Optional[str] = None, imu_events: bool = False) -> "MergedStream":
+        index = self.dataset_manager.get_frame_index(self.dataset_id)
+        frames = np.arange(self.start_frame, self.end_frame)
+        timelines = []
+        for sensor, present in index["sensors"].items():
+            frame_ids = frames[np.asarray(present[self.start_frame:self.end_frame])]
+            loader = (lambda frame_idx: self.dataset_manager.load_lidar_data(self.dataset_id, frame_idx)) if sensor == "velodyne" else (lambda frame_idx, sensor=sensor: self.dataset_manager.get_sensor_data_path(self.dataset_id, sensor, frame_idx))
+            timelines.append(SensorTimeline(sensor, index["timestamps"][frame_ids], lambda position, frame_ids=frame_ids, loader=loader: loader(int(frame_ids[position])), frame_ids))
+        imu = load_imu_timeline(imu_csv) if imu_csv else None
+        if imu is not None and imu_events:
+            timelines.append(imu)
+        return MergedStream(timelines, imu=imu)
     def get_frame_count(self) -> int:
         return self.end_frame - self.start_frame
     def get_progress(self) -> float:
@@ -44,6 +184,76 @@ class DataStream:
             return 1.0
         processed_frames = self.current_frame - self.start_frame
         return processed_frames / total_frames
+class SensorTimeline:
+    def __init__(self, sensor: str, timestamps: np.ndarray, loader: Optional[Callable[[int], Any]] = None, frame_ids: Optional[np.ndarray] = None, values: Optional[np.ndarray] = None):
+        self.sensor = sensor
+        self.timestamps = timestamps
+        self.loader = loader
+        self.frame_ids = frame_ids
+        self.values = values
+    def __len__(self) -> int:
+        return len(self.timestamps)
+    def window(self, start_time: float, end_time: float) -> Tuple[int, int]:
+        return int(np.searchsorted(self.timestamps, start_time, side="right")), int(np.searchsorted(self.timestamps, end_time, side="right"))
+    def event(self, position: int, load: bool = True) -> Dict:
+        event = {"sensor": self.sensor, "timestamp": float(self.timestamps[position]), "index": position}
+        if self.frame_ids is not None:
+            event["frame_id"] = int(self.frame_ids[position])
+        if load and self.loader is not None:
+            event["data"] = self.loader(position)
+        elif load and self.values is not None:
+            event["data"] = self.values[position]
+        return event
+class MergedStream:
+    def __init__(self, timelines: List[SensorTimeline], imu: Optional[SensorTimeline] = None, start_time: Optional[float] = None, end_time: Optional[float] = None, max_imu_window: Optional[int] = None, load: bool = True):
+        self.timelines = [timeline for timeline in timelines if len(timeline)]
+        self.imu = imu
+        self.start_time = start_time
+        self.end_time = end_time
+        self.max_imu_window = max_imu_window or config.STREAM_MAX_IMU_WINDOW
+        self.load = load
+    def __iter__(self) -> Iterator[Dict]:
+        heap = []
+        for order, timeline in enumerate(self.timelines):
+            position = 0 if self.start_time is None else int(np.searchsorted(timeline.timestamps, self.start_time, side="left"))
+            if position < len(timeline):
+                heap.append((float(timeline.timestamps[position]), order, position))
+        heapq.heapify(heap)
+        last_times = [self.start_time if self.start_time is not None else -np.inf] * len(self.timelines)
+        while heap:
+            timestamp, order, position = heap[0]
+            if self.end_time is not None and timestamp > self.end_time:
+                return
+            timeline = self.timelines[order]
+            if position + 1 < len(timeline):
+                heapq.heapreplace(heap, (float(timeline.timestamps[position + 1]), order, position + 1))
+            else:
+                heapq.heappop(heap)
+            event = timeline.event(position, self.load)
+            if self.imu is not None and timeline is not self.imu:
+                event["imu"] = self.imu_between(last_times[order], timestamp)
+                last_times[order] = timestamp
+            yield event
+    def imu_between(self, start_time: float, end_time: float) -> np.ndarray:
+        lo, hi = self.imu.window(start_time, end_time)
+        return self.imu.values[max(lo, hi - self.max_imu_window):hi]
+def load_imu_timeline(csv_path: str) -> Optional[SensorTimeline]:
+    if not os.path.exists(csv_path):
+        return None
+    stat = os.stat(csv_path)
+    digest = hashlib.blake2b(f"{os.path.abspath(csv_path)}|{stat.st_mtime_ns}|{stat.st_size}".encode(), digest_size=16).hexdigest()
+    index_path = os.path.join(config.STREAM_INDEX_DIR, f"{digest}.npy")
+    if not os.path.exists(index_path):
+        values = np.loadtxt(csv_path, delimiter=",", comments="#", ndmin=2, dtype=np.float64)
+        values[:, 0] /= 1e9
+        values = values[np.argsort(values[:, 0], kind="stable")]
+        os.makedirs(config.STREAM_INDEX_DIR, exist_ok=True)
+        tmp_path = f"{index_path}.tmp-{os.getpid()}"
+        with open(tmp_path, "wb") as f:
+            np.save(f, values)
+        os.replace(tmp_path, index_path)
+    values = np.load(index_path, mmap_mode="r")
+    return SensorTimeline("imu", values[:, 0], values=values)
 class DataPreprocessor:
     def __init__(self, dataset_manager: DatasetManager):
         self.dataset_manager = dataset_manager
@@ -1,6 +1,10 @@
 import os
+import json
+import hashlib
 import numpy as np
 import time
+from config import FRAME_INDEX_DIR, SCAN_ARCHIVE_NAME
+from backend.core.scan_cache import get_scan_cache, write_scan_archive
 from shared.models import create_dataset
 from shared.errors import format_error
 from shared.config import Config
@@ -13,6 +17,7 @@ class DatasetManager:
         else:
             self.data_root = config.get("paths.datasets_dir")
         self.datasets = {}
+        self.frame_indexes = {}
     def validate_kitti_format(self, dataset_path):
         errors = []
         if not os.path.exists(dataset_path):
@@ -157,6 +162,7 @@ class DatasetManager:
             file_paths[sensor] = os.path.join(dataset_path, sensor)
         dataset = create_dataset(dataset_id, f"KITTI_{dataset_id}", "KITTI", sequence_length, available_sensors, calibration, metadata, int(time.time()), file_paths)
         self.datasets[dataset_id] = dataset
+        self.frame_indexes[dataset_id] = self._build_frame_index(dataset_path, file_paths, available_sensors, sequence_length)
         return dataset
     def _extract_metadata(self, dataset_path, sensors):
         metadata = {"path": dataset_path, "sensors": {}}
@@ -185,35 +191,91 @@ class DatasetManager:
                     key, values = line.split(':', 1)
                     calib_data[key.strip()] = [float(x) for x in values.split()]
         return calib_data
+    def _frame_index_dir(self, dataset_path):
+        digest = hashlib.blake2b(os.path.abspath(dataset_path).encode(), digest_size=16).hexdigest()
+        return os.path.join(FRAME_INDEX_DIR, digest)
+    def _frame_index_stamp(self, file_paths, sensors, sequence_length):
+        stamp = {"sequence_length": sequence_length, "sensors": list(sensors)}
+        for key in ["times", "poses"] + list(sensors):
+            path = file_paths.get(key)
+            if path and os.path.exists(path):
+                stat = os.stat(path)
+                stamp[key] = [stat.st_mtime_ns, stat.st_size]
+        return stamp
+    def _sensor_extension(self, sensor):
+        if sensor.startswith("image"):
+            return ".png"
+        elif sensor == "velodyne":
+            return ".bin"
+        return None
+    def _build_frame_index(self, dataset_path, file_paths, sensors, sequence_length):
+        index_dir = self._frame_index_dir(dataset_path)
+        stamp = self._frame_index_stamp(file_paths, sensors, sequence_length)
+        stamp_path = os.path.join(index_dir, "stamp.json")
+        try:
+            with open(stamp_path, 'r') as f:
+                if json.load(f) == stamp:
+                    return self._open_frame_index(index_dir, sensors)
+        except (OSError, ValueError):
+            pass
+        arrays = {"timestamps": np.full(sequence_length, np.nan), "poses": np.full((sequence_length, 3, 4), np.nan)}
+        times_path = file_paths.get("times")
+        if times_path and os.path.exists(times_path):
+            try:
+                timestamps = np.loadtxt(times_path, dtype=np.float64, ndmin=1, max_rows=sequence_length)
+                arrays["timestamps"][:len(timestamps)] = timestamps
+            except ValueError:
+                pass
+        poses_path = file_paths.get("poses")
+        if poses_path and os.path.exists(poses_path):
+            try:
+                poses = np.loadtxt(poses_path, dtype=np.float64, ndmin=2, max_rows=sequence_length)
+                arrays["poses"][:len(poses)] = poses.reshape(-1, 3, 4)
+            except ValueError:
+                pass
+        for sensor in sensors:
+            present = np.zeros(sequence_length, dtype=bool)
+            extension = self._sensor_extension(sensor)
+            for name in os.listdir(file_paths[sensor]):
+                stem, ext = os.path.splitext(name)
+                if ext == extension and stem.isdigit() and int(stem) < sequence_length:
+                    present[int(stem)] = True
+            arrays[f"sensor_{sensor}"] = present
+        os.makedirs(index_dir, exist_ok=True)
+        for name, array in arrays.items():
+            tmp_path = os.path.join(index_dir, f"{name}.npy.tmp-{os.getpid()}")
+            with open(tmp_path, 'wb') as f:
+                np.save(f, array)
+            os.replace(tmp_path, os.path.join(index_dir, f"{name}.npy"))
+        with open(stamp_path, 'w') as f:
+            json.dump(stamp, f)
+        return self._open_frame_index(index_dir, sensors)
+    def _open_frame_index(self, index_dir, sensors):
+        return {"timestamps": np.load(os.path.join(index_dir, "timestamps.npy"), mmap_mode="r"), "poses": np.load(os.path.join(index_dir, "poses.npy"), mmap_mode="r"), "sensors": {sensor: np.load(os.path.join(index_dir, f"sensor_{sensor}.npy"), mmap_mode="r") for sensor in sensors}}
+    def get_frame_index(self, dataset_id):
+        if dataset_id not in self.frame_indexes:
+            dataset = self.get_dataset(dataset_id)
+            if not dataset:
+                return None
+            self.frame_indexes[dataset_id] = self._build_frame_index(dataset["file_paths"]["root"], dataset["file_paths"], dataset["sensors"], dataset["sequence_length"])
+        return self.frame_indexes[dataset_id]
+    def frame_index_path(self, dataset_id, name):
+        if self.get_frame_index(dataset_id) is None:
+            return None
+        return os.path.join(self._frame_index_dir(self.get_dataset(dataset_id)["file_paths"]["root"]), f"{name}.npy")
     def load_frame_data(self, dataset_id, frame_idx):
         dataset = self.get_dataset(dataset_id)
         if not dataset or frame_idx >= dataset["sequence_length"]:
             return None
-        frame_data = {"frame_id": frame_idx, "timestamp": None}
-        times_path = dataset["file_paths"].get("times")
-        if times_path and os.path.exists(times_path):
-            with open(times_path, 'r') as f:
-                lines = f.readlines()
-                if frame_idx < len(lines):
-                    frame_data["timestamp"] = float(lines[frame_idx].strip())
-        for sensor in dataset["sensors"]:
-            sensor_path = dataset["file_paths"][sensor]
-            if sensor.startswith("image"):
-                img_file = os.path.join(sensor_path, f"{frame_idx:06d}.png")
-                if os.path.exists(img_file):
-                    frame_data[sensor] = img_file
-            elif sensor == "velodyne":
-                lidar_file = os.path.join(sensor_path, f"{frame_idx:06d}.bin")
-                if os.path.exists(lidar_file):
-                    frame_data[sensor] = lidar_file
-        poses_path = dataset["file_paths"].get("poses")
-        if poses_path and os.path.exists(poses_path):
-            with open(poses_path, 'r') as f:
-                lines = f.readlines()
-                if frame_idx < len(lines):
-                    pose_values = [float(x) for x in lines[frame_idx].split()]
-                    pose_matrix = np.array(pose_values).reshape(3, 4)
-                    frame_data["ground_truth_pose"] = pose_matrix
+        index = self.get_frame_index(dataset_id)
+        timestamp = index["timestamps"][frame_idx]
+        frame_data = {"frame_id": frame_idx, "timestamp": None if np.isnan(timestamp) else float(timestamp)}
+        for sensor, present in index["sensors"].items():
+            if present[frame_idx]:
+                frame_data[sensor] = self.get_sensor_data_path(dataset_id, sensor, frame_idx)
+        pose_matrix = index["poses"][frame_idx]
+        if not np.isnan(pose_matrix[0, 0]):
+            frame_data["ground_truth_pose"] = np.array(pose_matrix)
         return frame_data
     def get_dataset(self, dataset_id):
         return self.datasets.get(dataset_id)
@@ -233,16 +295,34 @@ class DatasetManager:
         dataset = self.get_dataset(dataset_id)
         if not dataset or sensor not in dataset["sensors"]:
             return None
-        sensor_path = dataset["file_paths"][sensor]
-        if sensor.startswith("image"):
-            return os.path.join(sensor_path, f"{frame_idx:06d}.png")
-        elif sensor == "velodyne":
-            return os.path.join(sensor_path, f"{frame_idx:06d}.bin")
-        return None
+        extension = self._sensor_extension(sensor)
+        if extension is None:
+            return None
+        return os.path.join(dataset["file_paths"][sensor], f"{frame_idx:06d}{extension}")
+    def _scan_archive_path(self, dataset_id):
+        dataset = self.get_dataset(dataset_id)
+        if not dataset or "velodyne" not in dataset["sensors"]:
+            return None
+        return os.path.join(self._frame_index_dir(dataset["file_paths"]["root"]), SCAN_ARCHIVE_NAME)
+    def build_scan_archive(self, dataset_id):
+        archive_path = self._scan_archive_path(dataset_id)
+        if archive_path is None:
+            return format_error(f"Dataset {dataset_id} has no lidar data", 1002, {"dataset_id": dataset_id})
+        present = self.get_frame_index(dataset_id)["sensors"]["velodyne"]
+        scans = [(int(frame_idx), self.get_sensor_data_path(dataset_id, "velodyne", int(frame_idx))) for frame_idx in np.flatnonzero(present)]
+        result, error = write_scan_archive(archive_path, scans)
+        if error:
+            return format_error("Scan archive could not be written", 1003, {"dataset_id": dataset_id, "error": error})
+        return dict(result, path=archive_path)
     def load_lidar_data(self, dataset_id, frame_idx):
+        archive_path = self._scan_archive_path(dataset_id)
         lidar_path = self.get_sensor_data_path(dataset_id, "velodyne", frame_idx)
+        if archive_path and os.path.exists(archive_path):
+            archive, error = get_scan_cache().archive(archive_path)
+            if not error and archive.is_current(frame_idx, lidar_path):
+                return archive.get(frame_idx)
         if lidar_path and os.path.exists(lidar_path):
-            return np.fromfile(lidar_path, dtype=np.float32).reshape(-1, 4)
+            return get_scan_cache().load(lidar_path)
         return None
     def transform_coordinates(self, dataset_id, points, from_frame, to_frame):
         dataset = self.get_dataset(dataset_id)
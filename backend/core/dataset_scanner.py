@@ -0,0 +1,118 @@
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, Optional, Tuple
+import config
+from backend.core import format_detector
+
+SCAN_VERSION = 1
+
+
+def _sidecar_path(path: Path) -> Path:
+    digest = hashlib.blake2b(str(path).encode(), digest_size=16).hexdigest()
+    return Path(config.SCAN_CACHE_DIR) / f'{digest}.json'
+
+
+def _dirs_unchanged(root: Path, dir_mtimes: Dict[str, int]) -> bool:
+    for relative, mtime_ns in dir_mtimes.items():
+        try:
+            if os.stat(root / relative).st_mtime_ns != mtime_ns:
+                return False
+        except OSError:
+            return False
+    return True
+
+
+def load_cached_scan(path) -> Optional[Dict[str, Any]]:
+    root = Path(path).absolute()
+    sidecar = _sidecar_path(root)
+    try:
+        cached = json.loads(sidecar.read_text())
+    except (OSError, ValueError):
+        return None
+    if cached.get('version') != SCAN_VERSION or cached.get('path') != str(root):
+        return None
+    if not _dirs_unchanged(root, cached['dir_mtimes']):
+        return None
+    return cached
+
+
+def _walk(root: Path, progress_callback: Optional[Callable[[Dict[str, Any]], None]]) -> Dict[str, Any]:
+    image_extensions = set(config.SCAN_IMAGE_EXTENSIONS)
+    file_names = set()
+    dir_names = set()
+    top_files = []
+    top_dirs = []
+    dir_mtimes = {}
+    image_counts = {}
+    extensions = {}
+    file_count = 0
+    size_bytes = 0
+    last_report = time.monotonic()
+    stack = [(root, '.', os.stat(root).st_mtime_ns)]
+    while stack:
+        current, relative, mtime_ns = stack.pop()
+        dir_mtimes[relative] = mtime_ns
+        images = 0
+        try:
+            iterator = os.scandir(current)
+        except OSError:
+            continue
+        with iterator:
+            for entry in iterator:
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        dir_names.add(entry.name)
+                        if relative == '.':
+                            top_dirs.append(entry.name)
+                        child = entry.name if relative == '.' else f'{relative}/{entry.name}'
+                        stack.append((entry.path, child, entry.stat(follow_symlinks=False).st_mtime_ns))
+                    elif entry.is_file():
+                        file_names.add(entry.name)
+                        if relative == '.':
+                            top_files.append(entry.name)
+                        file_count += 1
+                        size_bytes += entry.stat().st_size
+                        extension = os.path.splitext(entry.name)[1].lower()
+                        extensions[extension] = extensions.get(extension, 0) + 1
+                        if extension in image_extensions:
+                            images += 1
+                except OSError:
+                    continue
+        if images:
+            image_counts[relative] = images
+        now = time.monotonic()
+        if progress_callback is not None and now - last_report >= config.SCAN_PROGRESS_INTERVAL:
+            last_report = now
+            progress_callback({'files': file_count, 'size_bytes': size_bytes, 'dirs': len(dir_mtimes)})
+    return {'file_names': file_names, 'dir_names': dir_names, 'top_files': sorted(top_files), 'top_dirs': sorted(top_dirs), 'dir_mtimes': dir_mtimes, 'image_counts': image_counts, 'extensions': extensions, 'file_count': file_count, 'size_bytes': size_bytes}
+
+
+def scan_dataset(path, progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None, use_cache: bool = True) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    root = Path(path).absolute()
+    if not root.is_dir():
+        return None, 'path_not_directory'
+    if use_cache:
+        cached = load_cached_scan(root)
+        if cached is not None:
+            cached['cached'] = True
+            return cached, None
+    started = time.monotonic()
+    walk = _walk(root, progress_callback)
+    fmt = format_detector.detect_format_from_names(walk['file_names'], walk['dir_names'])
+    valid, errors = format_detector.validate_names(fmt, walk['file_names'], walk['dir_names'])
+    structure = {'path': str(root), 'files': walk['top_files'], 'dirs': walk['top_dirs'], 'sensors': [], 'frames': max(walk['image_counts'].values(), default=0), 'duration': 0, 'has_gt': False}
+    structure = format_detector.describe_structure(structure, fmt)
+    scan = {'version': SCAN_VERSION, 'path': str(root), 'format': fmt, 'structure': structure, 'valid': valid, 'errors': errors, 'file_count': walk['file_count'], 'size_bytes': walk['size_bytes'], 'extensions': walk['extensions'], 'image_counts': walk['image_counts'], 'dir_mtimes': walk['dir_mtimes'], 'scan_seconds': round(time.monotonic() - started, 3)}
+    sidecar = _sidecar_path(root)
+    try:
+        sidecar.parent.mkdir(parents=True, exist_ok=True)
+        tmp = sidecar.with_suffix(f'.tmp-{os.getpid()}')
+        tmp.write_text(json.dumps(scan))
+        os.replace(tmp, sidecar)
+    except OSError:
+        pass
+    scan['cached'] = False
+    return scan, None
@@ -0,0 +1,137 @@
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import config
+
+FINGERPRINT_VERSION = 1
+
+
+def _sidecar_path(root: Path) -> Path:
+    digest = hashlib.blake2b(str(root).encode(), digest_size=16).hexdigest()
+    return Path(config.FINGERPRINT_CACHE_DIR) / f'{digest}.json'
+
+
+def sample_offsets(size: int) -> List[int]:
+    block = config.FINGERPRINT_BLOCK
+    if size <= config.FINGERPRINT_FULL_BYTES:
+        return [0]
+    samples = config.FINGERPRINT_SAMPLES
+    last = size - block
+    return sorted({last * i // (samples - 1) for i in range(samples)})
+
+
+def file_digest(path, size: int) -> str:
+    h = hashlib.blake2b(digest_size=16)
+    h.update(size.to_bytes(8, 'little'))
+    fd = os.open(path, os.O_RDONLY)
+    try:
+        if size <= config.FINGERPRINT_FULL_BYTES:
+            while True:
+                block = os.read(fd, config.FINGERPRINT_BLOCK)
+                if not block:
+                    break
+                h.update(block)
+        else:
+            for offset in sample_offsets(size):
+                h.update(os.pread(fd, config.FINGERPRINT_BLOCK, offset))
+    finally:
+        os.close(fd)
+    return h.hexdigest()
+
+
+def _excluded(name: str, path: str, excluded_dirs: set) -> bool:
+    return name in config.FINGERPRINT_EXCLUDE_NAMES or '.tmp-' in name or path in excluded_dirs
+
+
+def _manifest(root: Path) -> List[Tuple[str, int, int]]:
+    if root.is_file():
+        stat = root.stat()
+        return [(root.name, stat.st_size, stat.st_mtime_ns)]
+    excluded_dirs = {os.path.abspath(path) for path in config.FINGERPRINT_EXCLUDE_DIRS}
+    entries = []
+    stack = [(root, '')]
+    while stack:
+        current, prefix = stack.pop()
+        try:
+            iterator = os.scandir(current)
+        except OSError:
+            continue
+        with iterator:
+            for entry in iterator:
+                if _excluded(entry.name, entry.path, excluded_dirs):
+                    continue
+                try:
+                    if entry.is_dir(follow_symlinks=False):
+                        stack.append((entry.path, f'{prefix}{entry.name}/'))
+                    elif entry.is_file():
+                        stat = entry.stat()
+                        entries.append((f'{prefix}{entry.name}', stat.st_size, stat.st_mtime_ns))
+                except OSError:
+                    continue
+    entries.sort()
+    return entries
+
+
+def _load_sidecar(root: Path) -> Dict[str, List[Any]]:
+    try:
+        cached = json.loads(_sidecar_path(root).read_text())
+    except (OSError, ValueError):
+        return {}
+    if cached.get('version') != FINGERPRINT_VERSION or cached.get('path') != str(root) or cached.get('block') != config.FINGERPRINT_BLOCK or cached.get('samples') != config.FINGERPRINT_SAMPLES:
+        return {}
+    return cached.get('files', {})
+
+
+def _save_sidecar(root: Path, files: Dict[str, List[Any]], fingerprint: str) -> None:
+    sidecar = _sidecar_path(root)
+    try:
+        sidecar.parent.mkdir(parents=True, exist_ok=True)
+        tmp = sidecar.with_suffix(f'.tmp-{os.getpid()}')
+        tmp.write_text(json.dumps({'version': FINGERPRINT_VERSION, 'path': str(root), 'block': config.FINGERPRINT_BLOCK, 'samples': config.FINGERPRINT_SAMPLES, 'fingerprint': fingerprint, 'files': files}))
+        os.replace(tmp, sidecar)
+    except OSError:
+        pass
+
+
+def fingerprint_dataset(path, progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None, workers: Optional[int] = None) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    root = Path(path).absolute()
+    if not root.exists():
+        return None, 'path_not_found'
+    base = root if root.is_dir() else root.parent
+    started = time.monotonic()
+    manifest = _manifest(root)
+    cached = _load_sidecar(root)
+    files = {}
+    stale = []
+    for relative, size, mtime_ns in manifest:
+        entry = cached.get(relative)
+        if entry is not None and entry[0] == size and entry[1] == mtime_ns:
+            files[relative] = entry
+        else:
+            stale.append((relative, size, mtime_ns))
+    total = len(stale)
+    done = 0
+    last_report = time.monotonic()
+    with ThreadPoolExecutor(max_workers=workers or config.FINGERPRINT_WORKERS, thread_name_prefix='fingerprint') as executor:
+        futures = [(relative, size, mtime_ns, executor.submit(file_digest, str(base / relative), size)) for relative, size, mtime_ns in stale]
+        for relative, size, mtime_ns, future in futures:
+            try:
+                files[relative] = [size, mtime_ns, future.result()]
+            except OSError:
+                continue
+            done += 1
+            now = time.monotonic()
+            if progress_callback is not None and now - last_report >= config.SCAN_PROGRESS_INTERVAL:
+                last_report = now
+                progress_callback({'hashed': done, 'total': total})
+    h = hashlib.blake2b(digest_size=32)
+    for relative in sorted(files):
+        size, _, digest = files[relative]
+        h.update(f'{relative}\0{size}\0{digest}\n'.encode())
+    fingerprint = h.hexdigest()
+    _save_sidecar(root, files, fingerprint)
+    return {'fingerprint': fingerprint, 'files': len(files), 'size_bytes': sum(entry[0] for entry in files.values()), 'hashed': done, 'reused': len(files) - done, 'seconds': round(time.monotonic() - started, 3)}, None
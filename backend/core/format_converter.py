@@ -1,95 +1,298 @@
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
+import multiprocessing
 import numpy as np
 import json
+import os
 import config
 from backend.core.format_detector import detect_format
+from backend.core.frame_store import write_frame_store
+
+KITTI_IMAGE_DIRS = ['image_0', 'image_1', 'image_2', 'image_3']
+
+def _parse_kitti_calib(calib_file):
+    calib = {}
+    with open(calib_file) as f:
+        for line in f:
+            if ':' in line:
+                key, value = line.split(':', 1)
+                calib[key.strip()] = [float(x) for x in value.strip().split()]
+    return calib
+
+def _read_kitti_sequence(seq_dir):
+    seq_dir = Path(seq_dir)
+    cameras = {}
+    for name in KITTI_IMAGE_DIRS:
+        img_dir = seq_dir / name
+        if img_dir.exists():
+            cameras[name] = [str(img) for img in sorted(img_dir.glob('*.png'))]
+    return {'cameras': cameras, 'lidar': (seq_dir / 'velodyne').exists()}
+
+def _read_euroc_camera(cam_dir, cam_name):
+    cam_dir = Path(cam_dir)
+    frames = []
+    data_csv = cam_dir / 'data.csv'
+    if not data_csv.exists():
+        return frames
+
+    with open(data_csv) as f:
+        lines = f.readlines()[1:]
+        for line in lines:
+            parts = line.strip().split(',')
+            if len(parts) >= 2:
+                timestamp = float(parts[0]) / 1e9
+                image_path = cam_dir / 'data' / parts[1]
+                frames.append({'timestamp': timestamp, 'images': {cam_name: str(image_path)}})
+    return frames
+
+def _read_euroc_imu(imu_dir):
+    data_csv = Path(imu_dir) / 'data.csv'
+    if not data_csv.exists():
+        return None
+
+    imu_data = []
+    with open(data_csv) as f:
+        lines = f.readlines()[1:]
+        for line in lines:
+            parts = line.strip().split(',')
+            if len(parts) >= 7:
+                timestamp = float(parts[0]) / 1e9
+                gyro = [float(parts[1]), float(parts[2]), float(parts[3])]
+                accel = [float(parts[4]), float(parts[5]), float(parts[6])]
+                imu_data.append({'timestamp': timestamp, 'gyro': gyro, 'accel': accel})
+    return imu_data
+
+def _read_tum_images(source, txt_file, sensor_type):
+    frames = []
+    with open(txt_file) as f:
+        lines = f.readlines()
+        for line in lines:
+            if line.startswith('#'):
+                continue
+            parts = line.strip().split()
+            if len(parts) >= 2:
+                timestamp = float(parts[0])
+                image_path = Path(source) / parts[1]
+                frames.append({'timestamp': timestamp, 'images': {sensor_type: str(image_path)}})
+    return frames
+
+def _load_kitti_poses(pose_file):
+    poses = []
+    with open(pose_file) as f:
+        for line in f:
+            values = [float(x) for x in line.strip().split()]
+            if len(values) == 12:
+                mat = np.array(values).reshape(3, 4)
+                pose = np.eye(4)
+                pose[:3, :] = mat
+                poses.append(pose.tolist())
+    return poses
+
+def _load_euroc_gt(gt_file):
+    poses = []
+    with open(gt_file) as f:
+        lines = f.readlines()[1:]
+        for line in lines:
+            parts = line.strip().split(',')
+            if len(parts) >= 8:
+                timestamp = float(parts[0]) / 1e9
+                pos = [float(parts[1]), float(parts[2]), float(parts[3])]
+                quat = [float(parts[4]), float(parts[5]), float(parts[6]), float(parts[7])]
+                poses.append({'timestamp': timestamp, 'position': pos, 'quaternion': quat})
+    return poses
+
+def _load_tum_gt(gt_file):
+    poses = []
+    with open(gt_file) as f:
+        for line in f:
+            if line.startswith('#'):
+                continue
+            parts = line.strip().split()
+            if len(parts) >= 8:
+                timestamp = float(parts[0])
+                pos = [float(parts[1]), float(parts[2]), float(parts[3])]
+                quat = [float(parts[4]), float(parts[5]), float(parts[6]), float(parts[7])]
+                poses.append({'timestamp': timestamp, 'position': pos, 'quaternion': quat})
+    return poses
+
+UNIT_READERS = {
+    'kitti_calib': _parse_kitti_calib,
+    'kitti_sequence': _read_kitti_sequence,
+    'kitti_poses': _load_kitti_poses,
+    'euroc_camera': _read_euroc_camera,
+    'euroc_imu': _read_euroc_imu,
+    'euroc_gt': _load_euroc_gt,
+    'tum_images': _read_tum_images,
+    'tum_gt': _load_tum_gt,
+}
+
+def _source_stamp(path):
+    if isinstance(path, tuple):
+        return [_source_stamp(item) if os.path.exists(item) else None for item in path]
+    stat = os.stat(path)
+    return [stat.st_mtime_ns, stat.st_size]
+
+def _run_unit(kind, args, part_path, stamp_path):
+    result = UNIT_READERS[kind](*args)
+    part_path = Path(part_path)
+    tmp_path = part_path.with_name(f'{part_path.name}.tmp-{os.getpid()}')
+    with open(tmp_path, 'w') as f:
+        json.dump({'stamp': _source_stamp(stamp_path), 'result': result}, f)
+    os.replace(tmp_path, part_path)
+    return result
+
+class ConversionCancelled(Exception):
+    pass
 
 class DatasetConverter:
-    def __init__(self, source_path, output_path):
+    def __init__(self, source_path, output_path, fmt=None, workers=None):
         self.source = Path(source_path)
         self.output = Path(output_path)
-        self.format = detect_format(source_path)
+        self.format = fmt or detect_format(source_path)
+        self.workers = workers or config.CONVERT_WORKERS
+        self.parts_dir = self.output / config.CONVERT_PARTS_DIR
         self.output.mkdir(parents=True, exist_ok=True)
 
-    def convert(self):
+    def plan(self):
+        units = []
         if self.format == 'kitti':
-            return self._convert_kitti()
+            calib_file = self.source / 'calib.txt'
+            if calib_file.exists():
+                units.append(('calibration', 'kitti_calib', (str(calib_file),), calib_file))
+            seq_dir = self.source / 'sequences'
+            if seq_dir.exists():
+                for seq in sorted(seq_dir.iterdir()):
+                    if seq.is_dir():
+                        units.append((f'sequence_{seq.name}', 'kitti_sequence', (str(seq),), (seq, *(seq / name for name in KITTI_IMAGE_DIRS))))
+            poses_dir = self.source / 'poses'
+            if poses_dir.exists():
+                for pose_file in sorted(poses_dir.glob('*.txt')):
+                    units.append((f'poses_{pose_file.stem}', 'kitti_poses', (str(pose_file),), pose_file))
         elif self.format == 'euroc':
-            return self._convert_euroc()
+            mav0 = self.source / 'mav0'
+            for cam in ['cam0', 'cam1']:
+                cam_dir = mav0 / cam
+                if cam_dir.exists():
+                    units.append((f'camera_{cam}', 'euroc_camera', (str(cam_dir), cam), self._stamp_path(cam_dir)))
+            imu_dir = mav0 / 'imu0'
+            if imu_dir.exists():
+                units.append(('imu', 'euroc_imu', (str(imu_dir),), self._stamp_path(imu_dir)))
+            gt_file = mav0 / 'state_groundtruth_estimate0' / 'data.csv'
+            if gt_file.exists():
+                units.append(('ground_truth', 'euroc_gt', (str(gt_file),), gt_file))
         elif self.format == 'tum':
-            return self._convert_tum()
-        elif self.format == 'rosbag':
-            return self._convert_rosbag()
+            for sensor_type in ['rgb', 'depth']:
+                txt_file = self.source / f'{sensor_type}.txt'
+                if txt_file.exists():
+                    units.append((sensor_type, 'tum_images', (str(self.source), str(txt_file), sensor_type), txt_file))
+            gt_file = self.source / 'groundtruth.txt'
+            if gt_file.exists():
+                units.append(('ground_truth', 'tum_gt', (str(gt_file),), gt_file))
+        return units
+
+    def _stamp_path(self, sensor_dir):
+        data_csv = sensor_dir / 'data.csv'
+        return data_csv if data_csv.exists() else sensor_dir
+
+    def _load_part(self, name, stamp_path):
+        part_path = self.parts_dir / f'{name}.json'
+        try:
+            with open(part_path) as f:
+                part = json.load(f)
+        except (OSError, ValueError):
+            return False, None
+        if part.get('stamp') != _source_stamp(stamp_path):
+            return False, None
+        return True, part['result']
+
+    def convert(self, progress_callback=None, cancel_event=None):
+        if self.format not in ['kitti', 'euroc', 'tum']:
+            return self._convert_rosbag() if self.format == 'rosbag' else self._convert_custom()
+        self.parts_dir.mkdir(parents=True, exist_ok=True)
+        units = self.plan()
+        results = {}
+        pending = []
+        total = len(units)
+
+        def report(name, resumed=False):
+            if progress_callback is not None:
+                progress_callback({'unit': name, 'completed': len(results), 'total': total, 'resumed': resumed})
+
+        for name, kind, args, stamp_path in units:
+            found, cached = self._load_part(name, stamp_path)
+            if found:
+                results[name] = cached
+                report(name, resumed=True)
+            else:
+                pending.append((name, kind, args, stamp_path))
+        if len(pending) <= 1 or self.workers <= 1:
+            for name, kind, args, stamp_path in pending:
+                if cancel_event is not None and cancel_event.is_set():
+                    raise ConversionCancelled()
+                results[name] = _run_unit(kind, args, self.parts_dir / f'{name}.json', stamp_path)
+                report(name)
         else:
-            return self._convert_custom()
-
-    def _convert_kitti(self):
-        data = {'format': 'kitti', 'sensors': [], 'frames': []}
-
-        calib_file = self.source / 'calib.txt'
-        if calib_file.exists():
-            calib = self._parse_kitti_calib(calib_file)
-            data['calibration'] = calib
-
-        seq_dir = self.source / 'sequences'
-        if seq_dir.exists():
-            for seq in seq_dir.iterdir():
-                if seq.is_dir():
-                    self._process_kitti_sequence(seq, data)
-
-        poses_dir = self.source / 'poses'
-        if poses_dir.exists():
-            for pose_file in poses_dir.glob('*.txt'):
-                data['ground_truth'] = self._load_kitti_poses(pose_file)
-
-        self._save_metadata(data)
+            context = multiprocessing.get_context(config.CONVERT_START_METHOD)
+            executor = ProcessPoolExecutor(max_workers=min(self.workers, len(pending)), mp_context=context)
+            try:
+                futures = {executor.submit(_run_unit, kind, args, str(self.parts_dir / f'{name}.json'), stamp_path): name for name, kind, args, stamp_path in pending}
+                remaining = set(futures)
+                while remaining:
+                    done, remaining = wait(remaining, timeout=config.CONVERT_POLL_INTERVAL, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        results[futures[future]] = future.result()
+                        report(futures[future])
+                    if cancel_event is not None and cancel_event.is_set():
+                        raise ConversionCancelled()
+            finally:
+                executor.shutdown(wait=True, cancel_futures=True)
+        data = self._merge(units, results)
+        return self._save_metadata(data)
+
+    def _merge(self, units, results):
+        data = {'format': self.format, 'sensors': [], 'frames': []}
+        for name, kind, args, stamp_path in units:
+            result = results.get(name)
+            if kind == 'kitti_calib':
+                data['calibration'] = result
+            elif kind == 'kitti_sequence':
+                for cam_name, images in result['cameras'].items():
+                    for idx, img in enumerate(images):
+                        if idx < len(data['frames']):
+                            data['frames'][idx]['images'][cam_name] = img
+                        else:
+                            data['frames'].append({'id': idx, 'timestamp': idx / 10.0, 'images': {cam_name: img}})
+                if result['lidar']:
+                    data['sensors'].append('lidar')
+            elif kind in ['kitti_poses', 'euroc_gt', 'tum_gt']:
+                data['ground_truth'] = result
+            elif kind == 'euroc_camera':
+                data['sensors'].append(name)
+                data['frames'].extend(result)
+            elif kind == 'euroc_imu':
+                data['sensors'].append('imu')
+                if result is not None:
+                    data['imu'] = result
+            elif kind == 'tum_images':
+                data['sensors'].append(name)
+                data['frames'].extend(result)
         return data
 
-    def _convert_euroc(self):
-        data = {'format': 'euroc', 'sensors': [], 'frames': []}
-
-        mav0 = self.source / 'mav0'
-        if not mav0.exists():
-            return data
-
-        for cam in ['cam0', 'cam1']:
-            cam_dir = mav0 / cam
-            if cam_dir.exists():
-                data['sensors'].append(f'camera_{cam}')
-                self._process_euroc_camera(cam_dir, data, cam)
-
-        imu_dir = mav0 / 'imu0'
-        if imu_dir.exists():
-            data['sensors'].append('imu')
-            self._process_euroc_imu(imu_dir, data)
+    def clear_parts(self):
+        if not self.parts_dir.exists():
+            return
+        for part in self.parts_dir.iterdir():
+            part.unlink()
+        self.parts_dir.rmdir()
 
-        gt_file = mav0 / 'state_groundtruth_estimate0' / 'data.csv'
-        if gt_file.exists():
-            data['ground_truth'] = self._load_euroc_gt(gt_file)
+    def _convert_kitti(self):
+        return self.convert()
 
-        self._save_metadata(data)
-        return data
+    def _convert_euroc(self):
+        return self.convert()
 
     def _convert_tum(self):
-        data = {'format': 'tum', 'sensors': [], 'frames': []}
-
-        rgb_file = self.source / 'rgb.txt'
-        depth_file = self.source / 'depth.txt'
-
-        if rgb_file.exists():
-            data['sensors'].append('rgb')
-            self._process_tum_images(rgb_file, data, 'rgb')
-
-        if depth_file.exists():
-            data['sensors'].append('depth')
-            self._process_tum_images(depth_file, data, 'depth')
-
-        gt_file = self.source / 'groundtruth.txt'
-        if gt_file.exists():
-            data['ground_truth'] = self._load_tum_gt(gt_file)
-
-        self._save_metadata(data)
-        return data
+        return self.convert()
 
     def _convert_rosbag(self):
         data = {'format': 'rosbag', 'sensors': [], 'frames': [], 'topics': []}
@@ -98,125 +301,11 @@ class DatasetConverter:
         if bag_files:
             data['bag_file'] = str(bag_files[0])
 
-        self._save_metadata(data)
-        return data
+        return self._save_metadata(data)
 
     def _convert_custom(self):
         data = {'format': 'custom', 'sensors': [], 'frames': []}
-        self._save_metadata(data)
-        return data
-
-    def _parse_kitti_calib(self, calib_file):
-        calib = {}
-        with open(calib_file) as f:
-            for line in f:
-                if ':' in line:
-                    key, value = line.split(':', 1)
-                    calib[key.strip()] = [float(x) for x in value.strip().split()]
-        return calib
-
-    def _process_kitti_sequence(self, seq_dir, data):
-        image_dirs = [seq_dir / 'image_0', seq_dir / 'image_1', seq_dir / 'image_2', seq_dir / 'image_3']
-
-        for img_dir in image_dirs:
-            if img_dir.exists():
-                images = sorted(img_dir.glob('*.png'))
-                for idx, img in enumerate(images):
-                    frame = {'id': idx, 'timestamp': idx / 10.0, 'images': {img_dir.name: str(img)}}
-                    if idx < len(data['frames']):
-                        data['frames'][idx]['images'][img_dir.name] = str(img)
-                    else:
-                        data['frames'].append(frame)
-
-        velodyne_dir = seq_dir / 'velodyne'
-        if velodyne_dir.exists():
-            data['sensors'].append('lidar')
-
-    def _process_euroc_camera(self, cam_dir, data, cam_name):
-        data_csv = cam_dir / 'data.csv'
-        if not data_csv.exists():
-            return
-
-        with open(data_csv) as f:
-            lines = f.readlines()[1:]
-            for line in lines:
-                parts = line.strip().split(',')
-                if len(parts) >= 2:
-                    timestamp = float(parts[0]) / 1e9
-                    image_path = cam_dir / 'data' / parts[1]
-                    frame = {'timestamp': timestamp, 'images': {cam_name: str(image_path)}}
-                    data['frames'].append(frame)
-
-    def _process_euroc_imu(self, imu_dir, data):
-        data_csv = imu_dir / 'data.csv'
-        if not data_csv.exists():
-            return
-
-        imu_data = []
-        with open(data_csv) as f:
-            lines = f.readlines()[1:]
-            for line in lines:
-                parts = line.strip().split(',')
-                if len(parts) >= 7:
-                    timestamp = float(parts[0]) / 1e9
-                    gyro = [float(parts[1]), float(parts[2]), float(parts[3])]
-                    accel = [float(parts[4]), float(parts[5]), float(parts[6])]
-                    imu_data.append({'timestamp': timestamp, 'gyro': gyro, 'accel': accel})
-        data['imu'] = imu_data
-
-    def _process_tum_images(self, txt_file, data, sensor_type):
-        with open(txt_file) as f:
-            lines = f.readlines()
-            for line in lines:
-                if line.startswith('#'):
-                    continue
-                parts = line.strip().split()
-                if len(parts) >= 2:
-                    timestamp = float(parts[0])
-                    image_path = self.source / parts[1]
-                    frame = {'timestamp': timestamp, 'images': {sensor_type: str(image_path)}}
-                    data['frames'].append(frame)
-
-    def _load_kitti_poses(self, pose_file):
-        poses = []
-        with open(pose_file) as f:
-            for line in f:
-                values = [float(x) for x in line.strip().split()]
-                if len(values) == 12:
-                    mat = np.array(values).reshape(3, 4)
-                    pose = np.eye(4)
-                    pose[:3, :] = mat
-                    poses.append(pose.tolist())
-        return poses
-
-    def _load_euroc_gt(self, gt_file):
-        poses = []
-        with open(gt_file) as f:
-            lines = f.readlines()[1:]
-            for line in lines:
-                parts = line.strip().split(',')
-                if len(parts) >= 8:
-                    timestamp = float(parts[0]) / 1e9
-                    pos = [float(parts[1]), float(parts[2]), float(parts[3])]
-                    quat = [float(parts[4]), float(parts[5]), float(parts[6]), float(parts[7])]
-                    poses.append({'timestamp': timestamp, 'position': pos, 'quaternion': quat})
-        return poses
-
-    def _load_tum_gt(self, gt_file):
-        poses = []
-        with open(gt_file) as f:
-            for line in f:
-                if line.startswith('#'):
-                    continue
-                parts = line.strip().split()
-                if len(parts) >= 8:
-                    timestamp = float(parts[0])
-                    pos = [float(parts[1]), float(parts[2]), float(parts[3])]
-                    quat = [float(parts[4]), float(parts[5]), float(parts[6]), float(parts[7])]
-                    poses.append({'timestamp': timestamp, 'position': pos, 'quaternion': quat})
-        return poses
+        return self._save_metadata(data)
 
     def _save_metadata(self, data):
-        metadata_file = self.output / 'metadata.json'
-        with open(metadata_file, 'w') as f:
-            json.dump(data, f, indent=2)
+        return write_frame_store(self.output, data)
@@ -1,5 +1,6 @@
 from pathlib import Path
 import config
+from core import format_detection
 
 def detect_format(path):
     path = Path(path)
@@ -7,35 +8,10 @@ def detect_format(path):
     if not path.exists():
         return None
 
-    files = {f.name for f in path.rglob('*') if f.is_file()}
-    dirs = {d.name for d in path.rglob('*') if d.is_dir()}
+    return format_detection.detect(path, config.DATASET_FORMATS)['format']
 
-    scores = {}
-
-    for fmt, rules in config.DATASET_FORMATS.items():
-        score = 0
-        required = rules['required']
-        optional = rules['optional']
-
-        if fmt == 'rosbag':
-            if any(f.endswith('.bag') for f in files):
-                score += 100
-        else:
-            for req in required:
-                if req in files or req in dirs:
-                    score += 10
-                else:
-                    score = 0
-                    break
-
-            for opt in optional:
-                if opt in files or opt in dirs:
-                    score += 1
-
-        scores[fmt] = score
-
-    best_fmt = max(scores, key=scores.get)
-    return best_fmt if scores[best_fmt] > 0 else 'custom'
+def detect_format_from_names(files, dirs):
+    return format_detection.score_formats(files, dirs, config.DATASET_FORMATS)
 
 def get_dataset_structure(path):
     path = Path(path)
@@ -49,6 +25,9 @@ def get_dataset_structure(path):
             structure['dirs'].append(item.name)
 
     fmt = detect_format(path)
+    return describe_structure(structure, fmt)
+
+def describe_structure(structure, fmt):
     structure['format'] = fmt
 
     if 'image' in ' '.join(structure['dirs']).lower() or any('cam' in d for d in structure['dirs']):
@@ -68,21 +47,30 @@ def get_dataset_structure(path):
 def validate_dataset(path, fmt=None):
     path = Path(path)
 
+    if not path.exists():
+        return False, ['path does not exist']
+
+    detected = format_detection.detect(path, config.DATASET_FORMATS)
     if fmt is None:
-        fmt = detect_format(path)
+        fmt = detected['format']
 
     if fmt not in config.DATASET_FORMATS:
         return False, [f'unknown format: {fmt}']
 
+    if fmt != detected['format']:
+        detected = format_detection.detect(path, {fmt: config.DATASET_FORMATS[fmt]})
+
+    return validate_names(fmt, detected['files'], detected['dirs'])
+
+def validate_names(fmt, files, dirs):
+    if fmt not in config.DATASET_FORMATS:
+        return False, [f'unknown format: {fmt}']
+
     errors = []
     required = config.DATASET_FORMATS[fmt]['required']
 
-    files = {f.name for f in path.rglob('*') if f.is_file()}
-    dirs = {d.name for d in path.rglob('*') if d.is_dir()}
-
     for req in required:
-        if req not in files and req not in dirs:
-            if not (fmt == 'rosbag' and any(f.endswith('.bag') for f in files)):
-                errors.append(f'missing required: {req}')
+        if not format_detection.has_marker(req, files, dirs):
+            errors.append(f'missing required: {req}')
 
     return len(errors) == 0, errors
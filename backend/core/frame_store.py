@@ -0,0 +1,131 @@
+import json
+import os
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+import numpy as np
+import config
+
+STORE_VERSION = 1
+
+
+def _save_array(path: Path, array: np.ndarray) -> None:
+    tmp = path.with_name(f'{path.stem}.tmp-{os.getpid()}.npy')
+    np.save(tmp, array)
+    os.replace(tmp, path)
+
+
+def _ground_truth_array(ground_truth: List[Any]) -> Tuple[Optional[np.ndarray], Optional[str]]:
+    if not ground_truth:
+        return None, None
+    first = ground_truth[0]
+    if isinstance(first, dict) and 'position' in first and 'quaternion' in first:
+        return np.array([[item['timestamp'], *item['position'], *item['quaternion']] for item in ground_truth], dtype=np.float64), 'tum'
+    return np.asarray(ground_truth, dtype=np.float64), 'matrix'
+
+
+def write_frame_store(output, data: Dict[str, Any]) -> Dict[str, Any]:
+    output = Path(output)
+    store_dir = output / config.FRAME_STORE_DIR
+    store_dir.mkdir(parents=True, exist_ok=True)
+    frames = data.get('frames', [])
+    image_sensors = sorted({sensor for frame in frames for sensor in frame.get('images', {})})
+    _save_array(store_dir / 'timestamps.npy', np.array([frame.get('timestamp', idx / 10.0) for idx, frame in enumerate(frames)], dtype=np.float64))
+    _save_array(store_dir / 'ids.npy', np.array([frame.get('id', idx) for idx, frame in enumerate(frames)], dtype=np.int64))
+    for sensor in image_sensors:
+        _save_array(store_dir / f'images_{sensor}.npy', np.array([frame.get('images', {}).get(sensor, '').encode() for frame in frames], dtype=np.bytes_))
+    summary = {key: value for key, value in data.items() if key not in ['frames', 'imu', 'ground_truth']}
+    store = {'version': STORE_VERSION, 'dir': config.FRAME_STORE_DIR, 'image_sensors': image_sensors, 'frames': len(frames)}
+    imu = data.get('imu')
+    if imu:
+        _save_array(store_dir / 'imu.npy', np.array([[sample['timestamp'], *sample['gyro'], *sample['accel']] for sample in imu], dtype=np.float64))
+        store['imu'] = len(imu)
+        store['imu_fields'] = ['timestamp', 'gyro_x', 'gyro_y', 'gyro_z', 'accel_x', 'accel_y', 'accel_z']
+    ground_truth, layout = _ground_truth_array(data.get('ground_truth'))
+    if ground_truth is not None:
+        _save_array(store_dir / 'ground_truth.npy', ground_truth)
+        store['ground_truth'] = len(ground_truth)
+        store['ground_truth_layout'] = layout
+    if frames:
+        timestamps = [frame.get('timestamp', idx / 10.0) for idx, frame in enumerate(frames)]
+        summary['time_range'] = [float(min(timestamps)), float(max(timestamps))]
+    summary['frame_count'] = len(frames)
+    summary['store'] = store
+    metadata_file = output / 'metadata.json'
+    tmp = metadata_file.with_name(f'metadata.json.tmp-{os.getpid()}')
+    with open(tmp, 'w') as f:
+        json.dump(summary, f, indent=2)
+    os.replace(tmp, metadata_file)
+    return summary
+
+
+class FrameTable:
+    def __init__(self, store_dir, image_sensors: List[str]):
+        self.store_dir = Path(store_dir)
+        self.image_sensors = image_sensors
+        self.arrays: Dict[str, np.ndarray] = {}
+
+    def _array(self, name: str) -> np.ndarray:
+        if name not in self.arrays:
+            self.arrays[name] = np.load(self.store_dir / f'{name}.npy', mmap_mode='r')
+        return self.arrays[name]
+
+    @property
+    def timestamps(self) -> np.ndarray:
+        return self._array('timestamps')
+
+    def paths(self, sensor: str) -> Optional[np.ndarray]:
+        if sensor not in self.image_sensors:
+            return None
+        return self._array(f'images_{sensor}')
+
+    def __len__(self) -> int:
+        return len(self.timestamps)
+
+    def __iter__(self):
+        for idx in range(len(self)):
+            yield self[idx]
+
+    def __getitem__(self, idx):
+        if isinstance(idx, slice):
+            return [self[i] for i in range(*idx.indices(len(self)))]
+        if idx < 0:
+            idx += len(self)
+        if not 0 <= idx < len(self):
+            raise IndexError('frame index out of range')
+        images = {}
+        for sensor in self.image_sensors:
+            path = self._array(f'images_{sensor}')[idx]
+            if path:
+                images[sensor] = path.decode()
+        return {'id': int(self._array('ids')[idx]), 'timestamp': float(self.timestamps[idx]), 'images': images}
+
+
+class FrameStore:
+    def __init__(self, root, summary: Dict[str, Any]):
+        self.root = Path(root)
+        self.summary = summary
+        self.info = summary['store']
+        self.store_dir = self.root / self.info['dir']
+        self.frames = FrameTable(self.store_dir, self.info['image_sensors'])
+
+    def imu(self) -> Optional[np.ndarray]:
+        if not self.info.get('imu'):
+            return None
+        return np.load(self.store_dir / 'imu.npy', mmap_mode='r')
+
+    def ground_truth(self) -> Optional[np.ndarray]:
+        if not self.info.get('ground_truth'):
+            return None
+        return np.load(self.store_dir / 'ground_truth.npy', mmap_mode='r')
+
+
+def open_metadata(dataset_path) -> Tuple[Dict[str, Any], Optional[FrameStore]]:
+    metadata_file = Path(dataset_path) / 'metadata.json'
+    if not metadata_file.exists():
+        return {}, None
+    with open(metadata_file) as f:
+        metadata = json.load(f)
+    if 'store' not in metadata:
+        return metadata, None
+    store = FrameStore(dataset_path, metadata)
+    return dict(metadata, frames=store.frames), store
@@ -0,0 +1,140 @@
+import atexit
+import hashlib
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Callable, Dict, Optional, Tuple
+import numpy as np
+import config
+
+
+def _key(path, variant: str) -> Tuple[str, int, int, str]:
+    path = str(path)
+    stat = os.stat(path)
+    return path, stat.st_mtime_ns, stat.st_size, variant
+
+
+class SharedImageTier:
+    def __init__(self, shared_dir=None, max_bytes: Optional[int] = None):
+        self.shared_dir = Path(shared_dir or config.IMAGE_CACHE_SHARED_DIR)
+        self.shared_dir.mkdir(parents=True, exist_ok=True)
+        self.max_bytes = max_bytes or config.IMAGE_CACHE_SHARED_BYTES
+        self.owned: 'OrderedDict[Path, int]' = OrderedDict()
+        self.bytes = 0
+        self.lock = threading.Lock()
+
+    def path_for(self, key: Tuple[str, int, int, str]) -> Path:
+        return self.shared_dir / f'{hashlib.blake2b(repr(key).encode(), digest_size=16).hexdigest()}.npy'
+
+    def get(self, key: Tuple[str, int, int, str]) -> Optional[np.ndarray]:
+        try:
+            return np.load(self.path_for(key), mmap_mode='r')
+        except (OSError, ValueError):
+            return None
+
+    def put(self, key: Tuple[str, int, int, str], image: np.ndarray) -> bool:
+        if image.nbytes > self.max_bytes:
+            return False
+        path = self.path_for(key)
+        tmp = path.with_name(f'{path.stem}.tmp-{os.getpid()}-{threading.get_ident()}.npy')
+        try:
+            np.save(tmp, image)
+            os.replace(tmp, path)
+        except OSError:
+            tmp.unlink(missing_ok=True)
+            return False
+        with self.lock:
+            if path not in self.owned:
+                self.owned[path] = image.nbytes
+                self.bytes += image.nbytes
+            while self.bytes > self.max_bytes and len(self.owned) > 1:
+                evicted, size = self.owned.popitem(last=False)
+                self.bytes -= size
+                evicted.unlink(missing_ok=True)
+        return True
+
+    def clear(self) -> None:
+        with self.lock:
+            for path in self.owned:
+                path.unlink(missing_ok=True)
+            self.owned.clear()
+            self.bytes = 0
+
+
+class ImageCache:
+    def __init__(self, max_bytes: Optional[int] = None, shared: Optional[bool] = None):
+        self.max_bytes = max_bytes or config.IMAGE_CACHE_BYTES
+        self.shared = SharedImageTier() if (config.IMAGE_CACHE_SHARED if shared is None else shared) else None
+        self.entries: 'OrderedDict[Tuple[str, int, int, str], np.ndarray]' = OrderedDict()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.shared_hits = 0
+        self.evictions = 0
+        self.lock = threading.Lock()
+
+    def get(self, path, variant: str, decode: Callable[[str], Optional[np.ndarray]]) -> Optional[np.ndarray]:
+        try:
+            key = _key(path, variant)
+        except OSError:
+            return None
+        with self.lock:
+            image = self.entries.get(key)
+            if image is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return image
+            self.misses += 1
+        image = self.shared.get(key) if self.shared is not None else None
+        if image is not None:
+            with self.lock:
+                self.shared_hits += 1
+        else:
+            image = decode(key[0])
+            if image is None:
+                return None
+            image.setflags(write=False)
+            if self.shared is not None:
+                self.shared.put(key, image)
+        self._store(key, image)
+        return image
+
+    def _store(self, key: Tuple[str, int, int, str], image: np.ndarray) -> None:
+        with self.lock:
+            if key in self.entries or image.nbytes > self.max_bytes:
+                return
+            self.entries[key] = image
+            self.bytes += image.nbytes
+            while self.bytes > self.max_bytes:
+                _, evicted = self.entries.popitem(last=False)
+                self.bytes -= evicted.nbytes
+                self.evictions += 1
+
+    def stats(self) -> Dict[str, int]:
+        stats = {'entries': len(self.entries), 'bytes': self.bytes, 'max_bytes': self.max_bytes, 'hits': self.hits, 'misses': self.misses, 'evictions': self.evictions, 'shared_hits': self.shared_hits}
+        if self.shared is not None:
+            stats['shared_files'] = len(self.shared.owned)
+            stats['shared_bytes'] = self.shared.bytes
+        return stats
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.bytes = 0
+        if self.shared is not None:
+            self.shared.clear()
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_image_cache() -> ImageCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ImageCache()
+            if _cache.shared is not None:
+                atexit.register(_cache.shared.clear)
+        return _cache
@@ -7,12 +7,17 @@ import json
 import sys
 sys.path.insert(0, str(Path(__file__).parent.parent.parent))
 import config
+from core.plot_cache import PlotBatch
+from core import decimation
 
 try:
     plt.style.use(config.PLOT_STYLE)
 except:
     plt.style.use('default')
 
+def _decimate_positions(positions, dims, figsize):
+    return positions[decimation.decimate(positions[:, :dims], figsize=figsize, dpi=config.PLOT_DPI)]
+
 def plot_trajectory_2d(trajectories, labels, ground_truth=None, output_path=None):
     fig, ax = plt.subplots(figsize=(10, 10), dpi=config.PLOT_DPI)
 
@@ -22,6 +27,7 @@ def plot_trajectory_2d(trajectories, labels, ground_truth=None, output_path=None
         else:
             positions = traj[:, :3]
 
+        positions = _decimate_positions(positions, 2, (10, 10))
         ax.plot(positions[:, 0], positions[:, 1], label=label, linewidth=2)
 
     if ground_truth is not None:
@@ -30,6 +36,7 @@ def plot_trajectory_2d(trajectories, labels, ground_truth=None, output_path=None
         else:
             gt_positions = ground_truth[:, :3]
 
+        gt_positions = _decimate_positions(gt_positions, 2, (10, 10))
         ax.plot(gt_positions[:, 0], gt_positions[:, 1], 'k--', label='Ground Truth', linewidth=2)
 
     ax.set_xlabel('X [m]')
@@ -56,6 +63,7 @@ def plot_trajectory_3d(trajectories, labels, ground_truth=None, output_path=None
         else:
             positions = traj[:, :3]
 
+        positions = _decimate_positions(positions, 3, (12, 10))
         ax.plot(positions[:, 0], positions[:, 1], positions[:, 2], label=label, linewidth=2)
 
     if ground_truth is not None:
@@ -64,6 +72,7 @@ def plot_trajectory_3d(trajectories, labels, ground_truth=None, output_path=None
         else:
             gt_positions = ground_truth[:, :3]
 
+        gt_positions = _decimate_positions(gt_positions, 3, (12, 10))
         ax.plot(gt_positions[:, 0], gt_positions[:, 1], gt_positions[:, 2], 'k--', label='Ground Truth', linewidth=2)
 
     ax.set_xlabel('X [m]')
@@ -82,9 +91,11 @@ def plot_trajectory_3d(trajectories, labels, ground_truth=None, output_path=None
 def plot_error_over_time(errors, timestamps=None, output_path=None):
     fig, ax = plt.subplots(figsize=(12, 6), dpi=config.PLOT_DPI)
 
-    x = timestamps if timestamps is not None else range(len(errors))
+    errors = np.asarray(errors)
+    x = np.asarray(timestamps) if timestamps is not None else np.arange(len(errors))
+    indices = decimation.decimate_series(errors, 12 * config.PLOT_DPI)
 
-    ax.plot(x, errors, linewidth=2)
+    ax.plot(x[indices], errors[indices], linewidth=2)
     ax.set_xlabel('Time [s]' if timestamps is not None else 'Frame')
     ax.set_ylabel('Error [m]')
     ax.set_title('Error Over Time')
@@ -164,15 +175,17 @@ def generate_all_plots(trajectories, labels, ground_truth, metrics, output_dir):
     output_dir = Path(output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    plots = {}
+    batch = PlotBatch()
 
-    plots['trajectory_2d'] = plot_trajectory_2d(trajectories, labels, ground_truth, output_dir / 'trajectory_2d.png')
+    batch.add('trajectory_2d', plot_trajectory_2d, output_dir / 'trajectory_2d.png', trajectories, labels, ground_truth)
 
-    plots['trajectory_3d'] = plot_trajectory_3d(trajectories, labels, ground_truth, output_dir / 'trajectory_3d.png')
+    batch.add('trajectory_3d', plot_trajectory_3d, output_dir / 'trajectory_3d.png', trajectories, labels, ground_truth)
 
     if metrics and 'ate' in metrics and 'errors' in metrics['ate']:
-        plots['error_time'] = plot_error_over_time(metrics['ate']['errors'], None, output_dir / 'error_time.png')
-        plots['error_dist'] = plot_error_distribution(metrics['ate']['errors'], output_dir / 'error_dist.png')
+        batch.add('error_time', plot_error_over_time, output_dir / 'error_time.png', metrics['ate']['errors'], None)
+        batch.add('error_dist', plot_error_distribution, output_dir / 'error_dist.png', metrics['ate']['errors'])
+
+    plots = {name: path for name, (path, error) in batch.render().items()}
 
     plots_json = output_dir / 'plots.json'
     with open(plots_json, 'w') as f:
@@ -184,21 +197,23 @@ def create_comparison_plots(results_list, output_dir):
     output_dir = Path(output_dir)
     output_dir.mkdir(parents=True, exist_ok=True)
 
-    plots = {}
+    batch = PlotBatch()
 
     trajectories = [r['trajectory'] for r in results_list]
     labels = [r['label'] for r in results_list]
     ground_truth = results_list[0].get('ground_truth')
 
-    plots['trajectory_2d'] = plot_trajectory_2d(trajectories, labels, ground_truth, output_dir / 'comparison_trajectory_2d.png')
+    batch.add('trajectory_2d', plot_trajectory_2d, output_dir / 'comparison_trajectory_2d.png', trajectories, labels, ground_truth)
 
-    plots['trajectory_3d'] = plot_trajectory_3d(trajectories, labels, ground_truth, output_dir / 'comparison_trajectory_3d.png')
+    batch.add('trajectory_3d', plot_trajectory_3d, output_dir / 'comparison_trajectory_3d.png', trajectories, labels, ground_truth)
 
     metrics_dict = {r['label']: r['metrics'] for r in results_list if 'metrics' in r}
 
     if metrics_dict:
         ate_data = {label: [m['ate']['rmse']] for label, m in metrics_dict.items()}
-        plots['ate_box'] = plot_comparison_box(ate_data, 'ate_rmse', output_dir / 'ate_comparison.png')
+        batch.add('ate_box', plot_comparison_box, output_dir / 'ate_comparison.png', ate_data, 'ate_rmse')
+
+    plots = {name: path for name, (path, error) in batch.render().items()}
 
     plots_json = output_dir / 'comparison_plots.json'
     with open(plots_json, 'w') as f:
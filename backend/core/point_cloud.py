@@ -0,0 +1,136 @@
+import os
+from functools import lru_cache
+from typing import Any, Dict, Optional, Tuple
+import numpy as np
+from fastapi import Request
+import config
+from backend.core.thumbnail_cache import cached_bytes_response
+from backend.core.scan_cache import get_scan_cache
+
+FIELDS = ['x', 'y', 'z', 'intensity']
+STRIDE = len(FIELDS)
+MEDIA_TYPE = 'application/octet-stream'
+
+
+def voxel_downsample(points: np.ndarray, voxel_size: float, origin: Optional[np.ndarray] = None) -> Tuple[np.ndarray, np.ndarray]:
+    if len(points) == 0 or voxel_size <= 0:
+        return points, np.zeros((len(points), 3), dtype=np.int64)
+    xyz = points[:, :3].astype(np.float64)
+    origin = xyz.min(axis=0) if origin is None else origin
+    cells = np.floor((xyz - origin) / voxel_size).astype(np.int64)
+    dims = cells.max(axis=0) + 1
+    keys = (cells[:, 0] * dims[1] + cells[:, 1]) * dims[2] + cells[:, 2]
+    unique, first, inverse, counts = np.unique(keys, return_index=True, return_inverse=True, return_counts=True)
+    downsampled = np.empty((len(unique), points.shape[1]), dtype=np.float32)
+    for column in range(points.shape[1]):
+        downsampled[:, column] = np.bincount(inverse, weights=points[:, column], minlength=len(unique)) / counts
+    return downsampled, cells[first]
+
+
+def downsample_to(points: np.ndarray, max_points: int, voxel_size: Optional[float] = None) -> Tuple[np.ndarray, float]:
+    if voxel_size is not None:
+        return voxel_downsample(points, voxel_size)[0], voxel_size
+    if max_points <= 0 or len(points) <= max_points:
+        return points, 0.0
+    extent = np.ptp(points[:, :3], axis=0)
+    voxel = max(float(np.linalg.norm(extent[:2])) / np.sqrt(max_points), config.LIDAR_MIN_VOXEL)
+    best, best_voxel = None, voxel
+    for _ in range(config.LIDAR_VOXEL_SEARCH_STEPS):
+        downsampled = voxel_downsample(points, voxel)[0]
+        if len(downsampled) <= max_points:
+            best, best_voxel = downsampled, voxel
+            if voxel <= config.LIDAR_MIN_VOXEL:
+                break
+            voxel /= config.LIDAR_VOXEL_STEP
+        elif best is not None:
+            break
+        else:
+            voxel *= config.LIDAR_VOXEL_STEP
+    if best is None:
+        best = voxel_downsample(points, voxel)[0]
+        best_voxel = voxel
+    return best, best_voxel
+
+
+class Octree:
+    def __init__(self, points: np.ndarray, grid: Optional[int] = None, max_depth: Optional[int] = None):
+        self.grid = grid or config.LIDAR_TILE_GRID
+        self.count = len(points)
+        xyz = points[:, :3]
+        self.origin = xyz.min(axis=0).astype(np.float64) if len(points) else np.zeros(3)
+        self.size = float(np.ptp(xyz, axis=0).max()) * (1 + 1e-6) + 1e-6 if len(points) else 1.0
+        self.levels = []
+        self.nodes: Dict[str, int] = {}
+        self.tiles: Dict[Tuple[int, int, int, int], Tuple[int, int]] = {}
+        for level in range((max_depth or config.LIDAR_TILE_MAX_DEPTH) + 1):
+            voxel = self.size / (self.grid * 2 ** level)
+            downsampled, cells = voxel_downsample(points, voxel, self.origin)
+            node_cells = np.minimum(cells // self.grid, 2 ** level - 1)
+            keys = (node_cells[:, 0] * 2 ** level + node_cells[:, 1]) * 2 ** level + node_cells[:, 2]
+            order = np.argsort(keys, kind='stable')
+            downsampled, node_cells, keys = downsampled[order], node_cells[order], keys[order]
+            starts = np.flatnonzero(np.r_[True, np.diff(keys) != 0])
+            ends = np.r_[starts[1:], len(keys)]
+            for start, end in zip(starts, ends):
+                x, y, z = (int(v) for v in node_cells[start])
+                self.tiles[(level, x, y, z)] = (start, end)
+                self.nodes[f'{level}/{x}/{y}/{z}'] = int(end - start)
+            self.levels.append(downsampled)
+            if len(downsampled) >= len(points) or voxel <= config.LIDAR_MIN_VOXEL:
+                break
+
+    def hierarchy(self) -> Dict[str, Any]:
+        return {'origin': self.origin.tolist(), 'size': self.size, 'grid': self.grid, 'depth': len(self.levels) - 1, 'points': self.count, 'stride': STRIDE, 'fields': FIELDS, 'nodes': self.nodes}
+
+    def tile(self, level: int, x: int, y: int, z: int) -> Optional[np.ndarray]:
+        bounds = self.tiles.get((level, x, y, z))
+        if bounds is None:
+            return None
+        return self.levels[level][bounds[0]:bounds[1]]
+
+
+@lru_cache(maxsize=config.LIDAR_CACHE_SIZE)
+def _downsampled(path: str, mtime_ns: int, size: int, max_points: int, voxel_size: Optional[float]) -> Tuple[np.ndarray, float]:
+    points, voxel = downsample_to(get_scan_cache().load(path), max_points, voxel_size)
+    points.setflags(write=False)
+    return points, voxel
+
+
+@lru_cache(maxsize=config.LIDAR_CACHE_FRAMES)
+def _octree(path: str, mtime_ns: int, size: int) -> Octree:
+    return Octree(get_scan_cache().load(path))
+
+
+def _stat(path) -> Tuple[Optional[os.stat_result], Optional[str]]:
+    try:
+        return os.stat(path), None
+    except OSError:
+        return None, 'lidar_not_found'
+
+
+def load_downsampled(path, max_points: int, voxel_size: Optional[float] = None) -> Tuple[Optional[Tuple[np.ndarray, float]], Optional[os.stat_result], Optional[str]]:
+    stat, error = _stat(path)
+    if error:
+        return None, None, error
+    try:
+        return _downsampled(str(path), stat.st_mtime_ns, stat.st_size, max_points, voxel_size), stat, None
+    except ValueError as e:
+        return None, None, f'lidar_read_failed: {e}'
+
+
+def load_octree(path) -> Tuple[Optional[Octree], Optional[os.stat_result], Optional[str]]:
+    stat, error = _stat(path)
+    if error:
+        return None, None, error
+    try:
+        return _octree(str(path), stat.st_mtime_ns, stat.st_size), stat, None
+    except ValueError as e:
+        return None, None, f'lidar_read_failed: {e}'
+
+
+def points_response(request: Optional[Request], points: np.ndarray, stat: os.stat_result, variant: str, extra_headers: Optional[Dict[str, str]] = None):
+    headers = {'X-Point-Count': str(len(points)), 'X-Point-Stride': str(STRIDE), 'X-Point-Fields': ','.join(FIELDS), **(extra_headers or {})}
+    headers['Access-Control-Expose-Headers'] = ', '.join(headers)
+    response = cached_bytes_response(request, np.ascontiguousarray(points, dtype='<f4').tobytes(), MEDIA_TYPE, stat, variant)
+    response.headers.update(headers)
+    return response
@@ -0,0 +1,201 @@
+import asyncio
+import multiprocessing
+import time
+from pathlib import Path
+from typing import Any, Awaitable, Callable, Dict, Optional
+import numpy as np
+import config
+
+
+def execute_run_job(job: Dict[str, Any], conn) -> None:
+    try:
+        _execute_run_job(job, conn)
+    except Exception as e:
+        conn.send({'type': 'error', 'error': f'run_failed: {e}'})
+        conn.close()
+
+
+def _execute_run_job(job: Dict[str, Any], conn) -> None:
+    from config import openslam_config as cfg
+    from core import dataset_loader, trajectory, metrics, visualization, export
+    from core.plot_cache import PlotBatch
+    from core.plugin_executor import PluginExecutor
+    from backend.core.trajectory_stream import pack_poses
+    last_sent = [0.0]
+    poses_sent = [0]
+
+    def progress(frame: int, total: int) -> None:
+        now = time.time()
+        if frame < total and now - last_sent[0] < config.RUN_PROGRESS_INTERVAL:
+            return
+        last_sent[0] = now
+        new_poses = executor.trajectory[poses_sent[0]:]
+        packed, error = pack_poses(new_poses, start=poses_sent[0]) if len(new_poses) else (None, None)
+        if packed is not None:
+            poses_sent[0] += len(new_poses)
+        conn.send({'type': 'progress', 'frame': frame, 'total': total, 'poses': packed})
+
+    def fail(error: str) -> None:
+        conn.send({'type': 'error', 'error': error})
+        conn.close()
+
+    executor = PluginExecutor(job['plugin'])
+    result, error = executor.run_on_dataset(job['dataset_path'], job.get('dataset_format'), progress_callback=progress)
+    if error:
+        return fail(f'run_failed: {error}')
+    raw_poses = est_poses = result['trajectory']
+    est_timestamps = result['timestamps']
+    gt_dataset, error = dataset_loader.load_dataset(job['ground_truth_path'], job.get('dataset_format'))
+    if error:
+        return fail(f'ground_truth_failed: {error}')
+    gt_source = gt_dataset['sequences'][0] if 'sequences' in gt_dataset else gt_dataset
+    gt_poses = gt_source['poses']
+    gt_timestamps = gt_source.get('timestamps')
+    if est_timestamps is not None and gt_timestamps is not None:
+        sync_result, error = trajectory.synchronize_trajectories(est_timestamps, est_poses, gt_timestamps, gt_poses)
+        if error:
+            return fail(f'sync_failed: {error}')
+        est_poses = sync_result['traj1']['poses']
+        gt_poses = sync_result['traj2']['poses']
+    align_result, error = trajectory.align_trajectories(est_poses, gt_poses, method=job.get('alignment') or cfg.DEFAULT_ALIGNMENT)
+    if error:
+        return fail(f'alignment_failed: {error}')
+    est_poses = align_result['aligned_poses']
+    eval_results, error = metrics.evaluate_trajectory(est_poses, gt_poses)
+    if error:
+        return fail(f'evaluation_failed: {error}')
+    output_dir = Path(job['output_dir'])
+    plot_dir = output_dir / 'plots'
+    plot_dir.mkdir(parents=True, exist_ok=True)
+    np.save(output_dir / 'trajectory.npy', raw_poses)
+    np.save(output_dir / 'trajectory_aligned.npy', est_poses)
+    export.export_to_json(eval_results, output_dir / 'results.json')
+    ate = eval_results['ate']
+    rpe = next(iter(eval_results['rpe'].values())) if eval_results.get('rpe') else None
+    plot_specs = {'trajectory_2d': (visualization.plot_trajectory_2d, (est_poses,), {'ground_truth': gt_poses, 'label': job['algorithm_name']}), 'trajectory_3d': (visualization.plot_trajectory_3d, (est_poses,), {'ground_truth': gt_poses, 'label': job['algorithm_name']}), 'error_distribution': (visualization.plot_error_distribution, (ate['errors'],), {'title': 'ATE Distribution'}), 'ate_over_time': (visualization.plot_error_over_frames, (ate['errors'],), {'title': 'ATE Over Frames'})}
+    if rpe is not None:
+        plot_specs['rpe_over_time'] = (visualization.plot_error_over_frames, (rpe['translation']['errors'],), {'title': 'RPE Over Frames'})
+    plots = PlotBatch(workers=1)
+    for name in config.RUN_PLOTS:
+        if name in plot_specs:
+            func, args, kwargs = plot_specs[name]
+            plots.add(name, func, plot_dir / f'{name}.png', *args, **kwargs)
+    rendered = plots.render()
+    summary = {'ate_rmse': ate['rmse'], 'ate_mean': ate['mean'], 'ate_std': ate['std'], 'ate_median': ate['median'], 'ate_max': ate['max']}
+    if rpe is not None:
+        summary.update({'rpe_rmse': rpe['translation']['rmse'], 'rpe_mean': rpe['translation']['mean'], 'rpe_std': rpe['translation']['std'], 'rpe_median': rpe['translation']['median'], 'rpe_rot_rmse': rpe['rotation']['rmse']})
+    if eval_results.get('robustness') is not None:
+        summary['robustness_score'] = eval_results['robustness']['score']
+    if eval_results.get('completion') is not None:
+        summary['completion_rate'] = eval_results['completion']['completion_rate']
+    if eval_results.get('failures') is not None:
+        summary['failure_count'] = eval_results['failures']['count']
+    summary = {k: float(v) for k, v in summary.items()}
+    conn.send({'type': 'result', 'metrics': summary, 'plots': {name: path for name, (path, error) in rendered.items() if not error}, 'frames_processed': result['frames_processed'], 'total_frames': result['total_frames'], 'processing_times': [float(t) for t in result['processing_times']]})
+    conn.close()
+
+
+class RunEngine:
+    def __init__(self, max_concurrent: int, event_handler: Callable[[str, Dict[str, Any]], Awaitable[None]], start_method: Optional[str] = None):
+        self.max_concurrent = max_concurrent
+        self.event_handler = event_handler
+        self.context = multiprocessing.get_context(start_method or config.RUN_START_METHOD)
+        self.queue: Optional[asyncio.Queue] = None
+        self.workers = []
+        self.processes = {}
+        self.cancelled = set()
+        self.pending_stops = 0
+
+    async def start(self) -> None:
+        self.queue = asyncio.Queue()
+        self.set_concurrency(self.max_concurrent)
+
+    def set_concurrency(self, max_concurrent: int) -> None:
+        self.max_concurrent = max(1, int(max_concurrent))
+        self.workers = [w for w in self.workers if not w.done()]
+        effective = len(self.workers) - self.pending_stops
+        while effective < self.max_concurrent and self.pending_stops > 0:
+            self.pending_stops -= 1
+            effective += 1
+        while effective < self.max_concurrent:
+            self.workers.append(asyncio.create_task(self._worker()))
+            effective += 1
+        while effective > self.max_concurrent:
+            self.queue.put_nowait(None)
+            self.pending_stops += 1
+            effective -= 1
+
+    async def submit(self, run_id: str, job: Dict[str, Any]) -> None:
+        await self.queue.put((run_id, job))
+
+    def queued_count(self) -> int:
+        return self.queue.qsize() if self.queue is not None else 0
+
+    def running_count(self) -> int:
+        return len(self.processes)
+
+    async def cancel(self, run_id: str) -> bool:
+        self.cancelled.add(run_id)
+        process = self.processes.get(run_id)
+        if process is None:
+            return False
+        process.terminate()
+        await asyncio.get_running_loop().run_in_executor(None, process.join, config.RUN_JOIN_TIMEOUT)
+        if process.is_alive():
+            process.kill()
+        return True
+
+    async def shutdown(self) -> None:
+        for run_id in list(self.processes):
+            await self.cancel(run_id)
+        for worker in self.workers:
+            worker.cancel()
+        self.workers = []
+
+    async def _worker(self) -> None:
+        while True:
+            item = await self.queue.get()
+            if item is None:
+                if self.pending_stops > 0:
+                    self.pending_stops -= 1
+                    return
+                continue
+            run_id, job = item
+            if run_id in self.cancelled:
+                self.cancelled.discard(run_id)
+                continue
+            try:
+                await self._run_job(run_id, job)
+            except Exception as e:
+                await self.event_handler(run_id, {'type': 'error', 'error': str(e)})
+            finally:
+                self.processes.pop(run_id, None)
+                self.cancelled.discard(run_id)
+
+    async def _run_job(self, run_id: str, job: Dict[str, Any]) -> None:
+        loop = asyncio.get_running_loop()
+        parent_conn, child_conn = self.context.Pipe(duplex=False)
+        process = self.context.Process(target=execute_run_job, args=(job, child_conn))
+        process.start()
+        child_conn.close()
+        self.processes[run_id] = process
+        await self.event_handler(run_id, {'type': 'started', 'pid': process.pid})
+        finished = False
+        try:
+            while True:
+                try:
+                    message = await loop.run_in_executor(None, parent_conn.recv)
+                except (EOFError, OSError):
+                    break
+                if message['type'] in ['result', 'error']:
+                    finished = True
+                await self.event_handler(run_id, message)
+        finally:
+            parent_conn.close()
+            await loop.run_in_executor(None, process.join, config.RUN_JOIN_TIMEOUT)
+        if finished:
+            return
+        if run_id in self.cancelled:
+            await self.event_handler(run_id, {'type': 'cancelled'})
+        else:
+            await self.event_handler(run_id, {'type': 'error', 'error': f'worker_exited: {process.exitcode}'})
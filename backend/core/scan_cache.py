@@ -0,0 +1,173 @@
+import os
+import threading
+from collections import OrderedDict
+from typing import Dict, Iterable, Optional, Tuple
+import numpy as np
+import config
+
+SCAN_FIELDS = 4
+ARCHIVE_MAGIC = b'OSLSCAN1'
+ARCHIVE_ALIGN = 16
+
+
+def open_scan(path, writable: bool = False) -> np.ndarray:
+    if os.path.getsize(path) == 0:
+        return np.empty((0, SCAN_FIELDS), dtype=np.float32)
+    return np.memmap(path, dtype=np.float32, mode='c' if writable else 'r').reshape(-1, SCAN_FIELDS)
+
+
+class ScanCache:
+    def __init__(self, max_bytes: Optional[int] = None):
+        self.max_bytes = max_bytes or config.SCAN_CACHE_BYTES
+        self.entries: 'OrderedDict[Tuple[str, int, int], np.ndarray]' = OrderedDict()
+        self.archives: Dict[str, 'ScanArchive'] = {}
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.lock = threading.Lock()
+
+    def load(self, path, writable: bool = False) -> np.ndarray:
+        if writable:
+            return open_scan(path, writable=True)
+        path = str(path)
+        stat = os.stat(path)
+        key = (path, stat.st_mtime_ns, stat.st_size)
+        with self.lock:
+            scan = self.entries.get(key)
+            if scan is not None:
+                self.entries.move_to_end(key)
+                self.hits += 1
+                return scan
+            self.misses += 1
+        scan = open_scan(path)
+        with self.lock:
+            if key not in self.entries and scan.nbytes <= self.max_bytes:
+                self.entries[key] = scan
+                self.bytes += scan.nbytes
+                while self.bytes > self.max_bytes:
+                    _, evicted = self.entries.popitem(last=False)
+                    self.bytes -= evicted.nbytes
+        return scan
+
+    def archive(self, path) -> Tuple[Optional['ScanArchive'], Optional[str]]:
+        path = str(path)
+        with self.lock:
+            archive = self.archives.get(path)
+            try:
+                if archive is None or archive.mtime_ns != os.stat(path).st_mtime_ns:
+                    archive = self.archives[path] = ScanArchive(path)
+            except OSError:
+                return None, 'scan_archive_not_found'
+            except ValueError as e:
+                return None, str(e)
+            return archive, None
+
+    def stats(self) -> Dict[str, int]:
+        return {'entries': len(self.entries), 'bytes': self.bytes, 'max_bytes': self.max_bytes, 'hits': self.hits, 'misses': self.misses, 'archives': len(self.archives)}
+
+    def clear(self) -> None:
+        with self.lock:
+            self.entries.clear()
+            self.archives.clear()
+            self.bytes = 0
+
+
+class ScanArchive:
+    def __init__(self, path):
+        self.path = str(path)
+        self.mtime_ns = os.stat(self.path).st_mtime_ns
+        with open(self.path, 'rb') as f:
+            if f.read(len(ARCHIVE_MAGIC)) != ARCHIVE_MAGIC:
+                raise ValueError('not_a_scan_archive')
+            count = int(np.frombuffer(f.read(8), dtype='<u8')[0])
+        header = len(ARCHIVE_MAGIC) + 8
+        self.frame_ids = np.memmap(self.path, dtype='<i8', mode='r', offset=header, shape=(count,))
+        self.offsets = np.memmap(self.path, dtype='<u8', mode='r', offset=header + 8 * count, shape=(count + 1,))
+        data_offset = _data_offset(count)
+        points = int(self.offsets[-1]) if count else 0
+        if points:
+            self.data = np.memmap(self.path, dtype='<f4', mode='r', offset=data_offset, shape=(points, SCAN_FIELDS))
+        else:
+            self.data = np.empty((0, SCAN_FIELDS), dtype=np.float32)
+        self.positions = {int(frame_id): position for position, frame_id in enumerate(self.frame_ids)}
+        try:
+            self.stamps = np.load(_stamps_path(self.path), mmap_mode='r')
+        except (OSError, ValueError):
+            self.stamps = None
+
+    def __len__(self) -> int:
+        return len(self.frame_ids)
+
+    def __contains__(self, frame_id: int) -> bool:
+        return frame_id in self.positions
+
+    def get(self, frame_id: int) -> Optional[np.ndarray]:
+        position = self.positions.get(frame_id)
+        if position is None:
+            return None
+        return self.data[int(self.offsets[position]):int(self.offsets[position + 1])]
+
+    def is_current(self, frame_id: int, source) -> bool:
+        position = self.positions.get(frame_id)
+        if position is None or self.stamps is None or len(self.stamps) != len(self.frame_ids):
+            return False
+        try:
+            stat = os.stat(source)
+        except OSError:
+            return False
+        return int(self.stamps[position, 0]) == stat.st_mtime_ns and int(self.stamps[position, 1]) == stat.st_size
+
+
+def _stamps_path(archive_path) -> str:
+    return f'{archive_path}.stamps.npy'
+
+
+def _data_offset(count: int) -> int:
+    header = len(ARCHIVE_MAGIC) + 8 + 8 * count + 8 * (count + 1)
+    return -(-header // ARCHIVE_ALIGN) * ARCHIVE_ALIGN
+
+
+def write_scan_archive(archive_path, scans: Iterable[Tuple[int, str]]) -> Tuple[Optional[Dict[str, int]], Optional[str]]:
+    scans = sorted(scans)
+    sizes = []
+    stamps = np.zeros((len(scans), 2), dtype=np.int64)
+    for position, (frame_id, path) in enumerate(scans):
+        stat = os.stat(path)
+        if stat.st_size % (4 * SCAN_FIELDS):
+            return None, f'invalid_scan_size: {path}'
+        sizes.append(stat.st_size // (4 * SCAN_FIELDS))
+        stamps[position] = [stat.st_mtime_ns, stat.st_size]
+    os.makedirs(os.path.dirname(os.path.abspath(archive_path)), exist_ok=True)
+    count = len(scans)
+    offsets = np.zeros(count + 1, dtype='<u8')
+    offsets[1:] = np.cumsum(sizes, dtype=np.uint64)
+    tmp_path = f'{archive_path}.tmp-{os.getpid()}'
+    with open(tmp_path, 'wb') as out:
+        out.write(ARCHIVE_MAGIC)
+        out.write(np.array([count], dtype='<u8').tobytes())
+        out.write(np.array([frame_id for frame_id, _ in scans], dtype='<i8').tobytes())
+        out.write(offsets.tobytes())
+        out.write(b'\0' * (_data_offset(count) - out.tell()))
+        for _, path in scans:
+            with open(path, 'rb') as f:
+                while True:
+                    block = f.read(config.SCAN_ARCHIVE_BLOCK)
+                    if not block:
+                        break
+                    out.write(block)
+    np.save(f'{tmp_path}.npy', stamps)
+    os.replace(f'{tmp_path}.npy', _stamps_path(archive_path))
+    os.replace(tmp_path, archive_path)
+    return {'scans': count, 'points': int(offsets[-1]), 'bytes': os.path.getsize(archive_path)}, None
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_scan_cache() -> ScanCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ScanCache()
+        return _cache
@@ -2,6 +2,7 @@ import numpy as np
 from pathlib import Path
 import json
 import config
+from backend.core.frame_store import open_metadata
 
 class SLAMAlgorithm:
     def initialize(self, cfg):
@@ -100,16 +101,16 @@ class Dataset:
         self.ground_truth = None
 
     def load(self):
-        metadata_file = self.path / 'metadata.json'
-
-        if metadata_file.exists():
-            with open(metadata_file) as f:
-                self.metadata = json.load(f)
+        metadata, store = open_metadata(self.path)
 
+        if metadata:
+            self.metadata = metadata
             self.frames = self.metadata.get('frames', [])
             self.calibration = self.metadata.get('calibration', {})
 
-            if 'ground_truth' in self.metadata:
+            if store is not None:
+                self.ground_truth = store.ground_truth()
+            elif 'ground_truth' in self.metadata:
                 self.ground_truth = np.array(self.metadata['ground_truth'])
 
         return self
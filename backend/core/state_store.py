@@ -0,0 +1,245 @@
+import base64
+import json
+import sqlite3
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, Tuple
+import numpy as np
+import config
+
+
+def _text(field: str) -> Callable[[Dict[str, Any]], str]:
+    return lambda doc: doc.get(field) or ''
+
+
+def _lower(field: str) -> Callable[[Dict[str, Any]], str]:
+    return lambda doc: (doc.get(field) or '').lower()
+
+
+def _number(field: str) -> Callable[[Dict[str, Any]], float]:
+    return lambda doc: doc.get(field) or 0
+
+
+DATASET_COLUMNS = {'status': _text('status'), 'format': _text('format'), 'name': _lower('name'), 'description': _lower('description'), 'created': _text('created'), 'updated': _text('updated'), 'size_bytes': _number('size_bytes'), 'frames': _number('frames'), 'checksum': _text('checksum')}
+ALGORITHM_COLUMNS = {'type': _text('type'), 'name': _lower('name'), 'description': _lower('description'), 'created': _text('created'), 'updated': _text('updated'), 'runs_count': _number('runs_count')}
+RUN_COLUMNS = {'status': _text('status'), 'dataset_id': _text('dataset_id'), 'algorithm_id': _text('algorithm_id'), 'task_type': _text('task_type'), 'timestamp': _text('timestamp'), 'created': _text('created'), 'updated': _text('updated'), 'started': _text('started'), 'completed': _text('completed'), 'duration': _number('duration')}
+COMPARISON_COLUMNS = {'type': _text('type'), 'timestamp': _text('timestamp')}
+COLLECTIONS = {
+    'datasets': {'columns': DATASET_COLUMNS, 'tags': True, 'indexes': [('status', 'created'), ('format', 'created'), ('created',), ('updated',), ('name',), ('size_bytes',), ('frames',), ('checksum',)]},
+    'algorithms': {'columns': ALGORITHM_COLUMNS, 'tags': True, 'indexes': [('type', 'created'), ('created',), ('updated',), ('name',), ('runs_count',)]},
+    'runs': {'columns': RUN_COLUMNS, 'tags': False, 'indexes': [('status', 'timestamp'), ('dataset_id', 'timestamp'), ('algorithm_id', 'timestamp'), ('task_type', 'timestamp'), ('timestamp',), ('created',), ('updated',), ('started',), ('completed',), ('duration',)]},
+    'comparisons': {'columns': COMPARISON_COLUMNS, 'tags': False, 'indexes': [('timestamp',)]},
+}
+AGGREGATES = ['COUNT', 'SUM', 'AVG', 'MIN', 'MAX']
+
+
+def _encode(value: Any) -> Any:
+    if isinstance(value, np.ndarray):
+        return value.tolist()
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, Path):
+        return str(value)
+    raise TypeError(f'not_serializable: {type(value).__name__}')
+
+
+def encode_cursor(value: Any, doc_id: str) -> str:
+    return base64.urlsafe_b64encode(json.dumps([value, doc_id]).encode()).decode()
+
+
+def decode_cursor(cursor: str) -> Tuple[Optional[Tuple[Any, str]], Optional[str]]:
+    try:
+        value, doc_id = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+    except (ValueError, TypeError):
+        return None, 'invalid_cursor'
+    return (value, doc_id), None
+
+
+class Collection:
+    def __init__(self, store: 'StateStore', name: str, columns: Dict[str, Callable[[Dict[str, Any]], Any]], tags: bool, indexes: List[Tuple[str, ...]]):
+        self.store = store
+        self.name = name
+        self.columns = columns
+        self.tags = tags
+        self.indexes = indexes
+
+    def create_schema(self, conn: sqlite3.Connection) -> None:
+        columns = ', '.join(self.columns)
+        conn.execute(f'CREATE TABLE IF NOT EXISTS {self.name} (id TEXT PRIMARY KEY, {columns}, doc TEXT NOT NULL)')
+        existing = {row[1] for row in conn.execute(f'PRAGMA table_info({self.name})')}
+        missing = [column for column in self.columns if column not in existing]
+        for column in missing:
+            conn.execute(f'ALTER TABLE {self.name} ADD COLUMN {column}')
+        if missing:
+            rows = conn.execute(f'SELECT id, doc FROM {self.name}').fetchall()
+            conn.executemany(f'UPDATE {self.name} SET {", ".join(f"{column} = ?" for column in missing)} WHERE id = ?', [[self.columns[column](json.loads(doc)) for column in missing] + [doc_id] for doc_id, doc in rows])
+        for index in self.indexes:
+            conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{self.name}_{"_".join(index)} ON {self.name} ({", ".join(index)}, id)')
+        if self.tags:
+            conn.execute(f'CREATE TABLE IF NOT EXISTS {self.name}_tags (tag TEXT NOT NULL, id TEXT NOT NULL, PRIMARY KEY (tag, id)) WITHOUT ROWID')
+            conn.execute(f'CREATE INDEX IF NOT EXISTS idx_{self.name}_tags_id ON {self.name}_tags (id)')
+
+    def __contains__(self, doc_id: str) -> bool:
+        with self.store.lock:
+            return self.store.conn.execute(f'SELECT 1 FROM {self.name} WHERE id = ?', (doc_id,)).fetchone() is not None
+
+    def __len__(self) -> int:
+        return self.count()
+
+    def get(self, doc_id: str) -> Optional[Dict[str, Any]]:
+        with self.store.lock:
+            row = self.store.conn.execute(f'SELECT doc FROM {self.name} WHERE id = ?', (doc_id,)).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def get_many(self, doc_ids: Iterable[str]) -> Dict[str, Dict[str, Any]]:
+        doc_ids = list(doc_ids)
+        if not doc_ids:
+            return {}
+        with self.store.lock:
+            rows = self.store.conn.execute(f'SELECT id, doc FROM {self.name} WHERE id IN ({", ".join("?" for _ in doc_ids)})', doc_ids).fetchall()
+        return {row[0]: json.loads(row[1]) for row in rows}
+
+    def put(self, doc: Dict[str, Any]) -> Dict[str, Any]:
+        values = [doc['id']] + [extract(doc) for extract in self.columns.values()] + [json.dumps(doc, default=_encode)]
+        placeholders = ', '.join('?' for _ in values)
+        with self.store.lock, self.store.conn:
+            self.store.conn.execute(f'INSERT OR REPLACE INTO {self.name} (id, {", ".join(self.columns)}, doc) VALUES ({placeholders})', values)
+            if self.tags:
+                self.store.conn.execute(f'DELETE FROM {self.name}_tags WHERE id = ?', (doc['id'],))
+                self.store.conn.executemany(f'INSERT OR IGNORE INTO {self.name}_tags (tag, id) VALUES (?, ?)', [(str(tag), doc['id']) for tag in doc.get('tags') or []])
+        return doc
+
+    def patch(self, doc_id: str, fields: Dict[str, Any]) -> Optional[Dict[str, Any]]:
+        with self.store.lock:
+            doc = self.get(doc_id)
+            if doc is None:
+                return None
+            doc.update(fields)
+            return self.put(doc)
+
+    def delete(self, doc_id: str) -> bool:
+        with self.store.lock, self.store.conn:
+            deleted = self.store.conn.execute(f'DELETE FROM {self.name} WHERE id = ?', (doc_id,)).rowcount
+            if self.tags:
+                self.store.conn.execute(f'DELETE FROM {self.name}_tags WHERE id = ?', (doc_id,))
+        return deleted > 0
+
+    def _where(self, filters: Optional[Dict[str, Any]], tag: Optional[str], search: Optional[str]) -> Tuple[List[str], List[Any]]:
+        clauses = []
+        params = []
+        for column, value in (filters or {}).items():
+            if value is None:
+                continue
+            if column not in self.columns:
+                raise KeyError(column)
+            clauses.append(f'{column} = ?')
+            params.append(value)
+        if tag is not None and self.tags:
+            clauses.append(f'id IN (SELECT id FROM {self.name}_tags WHERE tag = ?)')
+            params.append(tag)
+        if search:
+            pattern = '%' + search.lower().replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+            clauses.append("(name LIKE ? ESCAPE '\\' OR description LIKE ? ESCAPE '\\')")
+            params.extend([pattern, pattern])
+        return clauses, params
+
+    def count(self, filters: Optional[Dict[str, Any]] = None, tag: Optional[str] = None, search: Optional[str] = None) -> int:
+        clauses, params = self._where(filters, tag, search)
+        where = f'WHERE {" AND ".join(clauses)}' if clauses else ''
+        with self.store.lock:
+            return self.store.conn.execute(f'SELECT COUNT(*) FROM {self.name} {where}', params).fetchone()[0]
+
+    def count_by(self, column: str, filters: Optional[Dict[str, Any]] = None) -> Dict[Any, int]:
+        if column not in self.columns:
+            raise KeyError(column)
+        clauses, params = self._where(filters, None, None)
+        where = f'WHERE {" AND ".join(clauses)}' if clauses else ''
+        with self.store.lock:
+            rows = self.store.conn.execute(f'SELECT {column}, COUNT(*) FROM {self.name} {where} GROUP BY {column}', params).fetchall()
+        return {row[0]: row[1] for row in rows}
+
+    def aggregate(self, function: str, column: str, filters: Optional[Dict[str, Any]] = None, nonzero: bool = False) -> Optional[float]:
+        if function not in AGGREGATES:
+            raise ValueError(function)
+        if column not in self.columns:
+            raise KeyError(column)
+        clauses, params = self._where(filters, None, None)
+        if nonzero:
+            clauses.append(f'{column} != 0')
+        where = f'WHERE {" AND ".join(clauses)}' if clauses else ''
+        with self.store.lock:
+            return self.store.conn.execute(f'SELECT {function}({column}) FROM {self.name} {where}', params).fetchone()[0]
+
+    def page(self, filters: Optional[Dict[str, Any]] = None, tag: Optional[str] = None, search: Optional[str] = None, sort: str = 'created', order: str = 'desc', limit: Optional[int] = None, offset: int = 0, cursor: Optional[str] = None) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        if sort not in self.columns:
+            return None, 'unknown_sort_column'
+        try:
+            clauses, params = self._where(filters, tag, search)
+        except KeyError:
+            return None, 'unknown_filter_column'
+        direction = 'DESC' if order == 'desc' else 'ASC'
+        comparison = '<' if order == 'desc' else '>'
+        with self.store.lock:
+            where = f'WHERE {" AND ".join(clauses)}' if clauses else ''
+            total = self.store.conn.execute(f'SELECT COUNT(*) FROM {self.name} {where}', params).fetchone()[0]
+            if cursor:
+                position, error = decode_cursor(cursor)
+                if error:
+                    return None, error
+                clauses.append(f'({sort}, id) {comparison} (?, ?)')
+                params.extend(position)
+                offset = 0
+            where = f'WHERE {" AND ".join(clauses)}' if clauses else ''
+            limit_clause = 'LIMIT ? OFFSET ?' if limit is not None else ''
+            page_params = params + ([limit, offset] if limit is not None else [])
+            rows = self.store.conn.execute(f'SELECT id, {sort}, doc FROM {self.name} {where} ORDER BY {sort} {direction}, id {direction} {limit_clause}', page_params).fetchall()
+        next_cursor = encode_cursor(rows[-1][1], rows[-1][0]) if limit is not None and len(rows) == limit else None
+        return {'items': [json.loads(row[2]) for row in rows], 'total': total, 'limit': limit, 'offset': offset, 'next_cursor': next_cursor}, None
+
+
+class ActivityLog:
+    def __init__(self, store: 'StateStore', max_entries: int):
+        self.store = store
+        self.max_entries = max_entries
+
+    def create_schema(self, conn: sqlite3.Connection) -> None:
+        conn.execute('CREATE TABLE IF NOT EXISTS activity_log (seq INTEGER PRIMARY KEY AUTOINCREMENT, id TEXT, timestamp TEXT, resource_type TEXT, resource_id TEXT, doc TEXT NOT NULL)')
+        conn.execute('CREATE INDEX IF NOT EXISTS idx_activity_resource ON activity_log (resource_type, resource_id)')
+
+    def append(self, entry: Dict[str, Any]) -> Dict[str, Any]:
+        with self.store.lock, self.store.conn:
+            seq = self.store.conn.execute('INSERT INTO activity_log (id, timestamp, resource_type, resource_id, doc) VALUES (?, ?, ?, ?, ?)', (entry['id'], entry['timestamp'], entry['resource_type'], entry['resource_id'], json.dumps(entry, default=_encode))).lastrowid
+            self.store.conn.execute('DELETE FROM activity_log WHERE seq <= ?', (seq - self.max_entries,))
+        return entry
+
+    def __len__(self) -> int:
+        with self.store.lock:
+            return self.store.conn.execute('SELECT COUNT(*) FROM activity_log').fetchone()[0]
+
+    def page(self, limit: int, offset: int = 0) -> List[Dict[str, Any]]:
+        with self.store.lock:
+            rows = self.store.conn.execute('SELECT doc FROM activity_log ORDER BY seq DESC LIMIT ? OFFSET ?', (limit, offset)).fetchall()
+        return [json.loads(row[0]) for row in rows]
+
+
+class StateStore:
+    def __init__(self, db_path: Optional[str] = None):
+        self.db_path = Path(db_path or config.DB_PATH)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self.lock = threading.RLock()
+        self.conn = sqlite3.connect(str(self.db_path), timeout=config.STATE_DB_TIMEOUT, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.collections = {name: Collection(self, name, spec['columns'], spec['tags'], spec['indexes']) for name, spec in COLLECTIONS.items()}
+        self.activity = ActivityLog(self, config.STATE_ACTIVITY_LIMIT)
+        with self.lock, self.conn:
+            for collection in self.collections.values():
+                collection.create_schema(self.conn)
+            self.activity.create_schema(self.conn)
+
+    def __getitem__(self, name: str) -> Collection:
+        return self.collections[name]
+
+    def close(self) -> None:
+        with self.lock:
+            self.conn.close()
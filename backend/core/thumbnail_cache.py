@@ -0,0 +1,171 @@
+import asyncio
+import atexit
+import hashlib
+import os
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from email.utils import formatdate, parsedate_to_datetime
+from pathlib import Path
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+import cv2
+import numpy as np
+from fastapi import Request
+from fastapi.responses import FileResponse, Response
+import config
+
+ENCODE_PARAMS = {'jpeg': ('.jpg', cv2.IMWRITE_JPEG_QUALITY), 'webp': ('.webp', cv2.IMWRITE_WEBP_QUALITY)}
+
+
+def resolve_size(size: Optional[str]) -> Tuple[Optional[str], Optional[str]]:
+    if size is None or size in ['full', 'original']:
+        return None, None
+    if size in config.THUMBNAIL_SIZES:
+        return size, None
+    return None, 'unknown_thumbnail_size'
+
+
+def negotiate_format(request: Optional[Request]) -> str:
+    if request is not None and 'image/webp' in request.headers.get('accept', ''):
+        return 'webp'
+    return config.THUMBNAIL_FORMAT
+
+
+def _etag(stat: os.stat_result, extra: str = '') -> str:
+    if extra:
+        extra = f"-{hashlib.blake2b(extra.encode('utf-8', 'surrogateescape'), digest_size=8).hexdigest()}"
+    return f'W/"{stat.st_mtime_ns:x}-{stat.st_size:x}{extra}"'
+
+
+def not_modified(request: Optional[Request], etag: str, mtime: float) -> bool:
+    if request is None:
+        return False
+    if_none_match = request.headers.get('if-none-match')
+    if if_none_match is not None:
+        return etag in [tag.strip() for tag in if_none_match.split(',')] or if_none_match.strip() == '*'
+    if_modified_since = request.headers.get('if-modified-since')
+    if if_modified_since is not None:
+        try:
+            return int(mtime) <= parsedate_to_datetime(if_modified_since).timestamp()
+        except (TypeError, ValueError):
+            return False
+    return False
+
+
+def caching_headers(etag: str, mtime: float) -> Dict[str, str]:
+    return {'ETag': etag, 'Last-Modified': formatdate(mtime, usegmt=True), 'Cache-Control': f'public, max-age={config.THUMBNAIL_MAX_AGE}', 'Vary': 'Accept'}
+
+
+def cached_file_response(request: Optional[Request], path, media_type: Optional[str] = None, source_stat: Optional[os.stat_result] = None, variant: str = ''):
+    path = Path(path)
+    stat = source_stat or path.stat()
+    etag = _etag(stat, variant)
+    headers = caching_headers(etag, stat.st_mtime)
+    if not_modified(request, etag, stat.st_mtime):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(str(path), media_type=media_type, headers=headers)
+
+
+def cached_bytes_response(request: Optional[Request], content: bytes, media_type: str, source_stat: os.stat_result, variant: str = ''):
+    etag = _etag(source_stat, variant)
+    headers = caching_headers(etag, source_stat.st_mtime)
+    if not_modified(request, etag, source_stat.st_mtime):
+        return Response(status_code=304, headers=headers)
+    return Response(content, media_type=media_type, headers=headers)
+
+
+class ThumbnailCache:
+    def __init__(self, cache_dir=None, workers: Optional[int] = None):
+        self.cache_dir = Path(cache_dir or config.THUMBNAIL_CACHE_DIR)
+        self.cache_dir.mkdir(parents=True, exist_ok=True)
+        self.executor = ThreadPoolExecutor(max_workers=workers or config.THUMBNAIL_WORKERS, thread_name_prefix='thumbnail')
+        self.inflight: Dict[str, threading.Event] = {}
+        self.lock = threading.Lock()
+
+    def _key(self, source: str, stat: os.stat_result, member: Optional[str]) -> str:
+        return hashlib.blake2b(f'{source}|{member or ""}|{stat.st_mtime_ns}|{stat.st_size}'.encode(), digest_size=16).hexdigest()
+
+    def path_for(self, key: str, level: str, fmt: str) -> Path:
+        return self.cache_dir / key[:2] / f'{key}_{level}{ENCODE_PARAMS[fmt][0]}'
+
+    def _render_pyramid(self, key: str, image: np.ndarray, fmt: str) -> Optional[str]:
+        suffix, quality_flag = ENCODE_PARAMS[fmt]
+        height, width = image.shape[:2]
+        current = image
+        for level, edge in sorted(config.THUMBNAIL_SIZES.items(), key=lambda item: -item[1]):
+            scale = min(1.0, edge / max(height, width))
+            target = (max(1, int(round(width * scale))), max(1, int(round(height * scale))))
+            if (current.shape[1], current.shape[0]) != target:
+                current = cv2.resize(current, target, interpolation=cv2.INTER_AREA)
+            ok, encoded = cv2.imencode(suffix, current, [quality_flag, config.THUMBNAIL_QUALITY])
+            if not ok:
+                return 'thumbnail_encode_failed'
+            path = self.path_for(key, level, fmt)
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp = path.with_name(f'{path.name}.tmp-{threading.get_ident()}')
+            tmp.write_bytes(encoded.tobytes())
+            os.replace(tmp, path)
+        return None
+
+    def render(self, source, level: str, fmt: str, member: Optional[str] = None, loader: Optional[Callable[[], bytes]] = None) -> Tuple[Optional[Path], Optional[str]]:
+        source = str(source)
+        try:
+            stat = os.stat(source)
+        except OSError:
+            return None, 'source_not_found'
+        key = self._key(source, stat, member)
+        path = self.path_for(key, level, fmt)
+        if path.exists():
+            return path, None
+        with self.lock:
+            event = self.inflight.get(key + fmt)
+            owner = event is None
+            if owner:
+                event = self.inflight[key + fmt] = threading.Event()
+        if not owner:
+            event.wait()
+            return (path, None) if path.exists() else (None, 'thumbnail_failed')
+        try:
+            if loader is not None:
+                content = loader()
+                if content is None:
+                    return None, 'member_not_found'
+                image = cv2.imdecode(np.frombuffer(content, dtype=np.uint8), cv2.IMREAD_UNCHANGED)
+            else:
+                image = cv2.imread(source, cv2.IMREAD_UNCHANGED)
+            if image is None:
+                return None, 'image_decode_failed'
+            if image.dtype != np.uint8:
+                image = cv2.normalize(image, None, 0, 255, cv2.NORM_MINMAX).astype(np.uint8)
+            error = self._render_pyramid(key, image, fmt)
+            if error:
+                return None, error
+            return path, None
+        finally:
+            with self.lock:
+                self.inflight.pop(key + fmt, None)
+            event.set()
+
+    async def get(self, source, level: str, fmt: str, member: Optional[str] = None, loader: Optional[Callable[[], bytes]] = None) -> Tuple[Optional[Path], Optional[str]]:
+        return await asyncio.get_running_loop().run_in_executor(self.executor, self.render, source, level, fmt, member, loader)
+
+    def prewarm(self, sources: Iterable[str], formats: Optional[List[str]] = None) -> None:
+        level = min(config.THUMBNAIL_SIZES, key=config.THUMBNAIL_SIZES.get)
+        for source in sources:
+            for fmt in formats or config.THUMBNAIL_PREWARM_FORMATS:
+                self.executor.submit(self.render, source, level, fmt)
+
+    def shutdown(self) -> None:
+        self.executor.shutdown(wait=False, cancel_futures=True)
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_thumbnail_cache() -> ThumbnailCache:
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ThumbnailCache()
+            atexit.register(_cache.shutdown)
+        return _cache
@@ -0,0 +1,160 @@
+import base64
+import os
+from functools import lru_cache
+from pathlib import Path
+from typing import Any, Dict, Optional, Tuple
+import numpy as np
+from fastapi import Request
+from fastapi.responses import Response
+import config
+from backend.core.thumbnail_cache import cached_bytes_response
+from core import decimation
+
+FIELDS = ['frame', 'x', 'y', 'z', 'qx', 'qy', 'qz', 'qw']
+STRIDE = len(FIELDS)
+MEDIA_TYPE = 'application/octet-stream'
+
+
+def rotations_to_quaternions(rotations: np.ndarray) -> np.ndarray:
+    r = np.asarray(rotations, dtype=np.float64).reshape(-1, 3, 3)
+    trace = r[:, 0, 0] + r[:, 1, 1] + r[:, 2, 2]
+    diagonal = np.stack([trace, r[:, 0, 0], r[:, 1, 1], r[:, 2, 2]], axis=1)
+    case = np.argmax(diagonal, axis=1)
+    quats = np.empty((len(r), 4), dtype=np.float64)
+    s = np.sqrt(np.maximum(1.0 + 2.0 * diagonal[np.arange(len(r)), case] - trace, 1e-12)) * 2.0
+    m = case == 0
+    quats[m] = np.stack([r[m, 2, 1] - r[m, 1, 2], r[m, 0, 2] - r[m, 2, 0], r[m, 1, 0] - r[m, 0, 1], 0.25 * s[m] ** 2], axis=1) / s[m, None]
+    m = case == 1
+    quats[m] = np.stack([0.25 * s[m] ** 2, r[m, 0, 1] + r[m, 1, 0], r[m, 0, 2] + r[m, 2, 0], r[m, 2, 1] - r[m, 1, 2]], axis=1) / s[m, None]
+    m = case == 2
+    quats[m] = np.stack([r[m, 0, 1] + r[m, 1, 0], 0.25 * s[m] ** 2, r[m, 1, 2] + r[m, 2, 1], r[m, 0, 2] - r[m, 2, 0]], axis=1) / s[m, None]
+    m = case == 3
+    quats[m] = np.stack([r[m, 0, 2] + r[m, 2, 0], r[m, 1, 2] + r[m, 2, 1], 0.25 * s[m] ** 2, r[m, 1, 0] - r[m, 0, 1]], axis=1) / s[m, None]
+    quats[quats[:, 3] < 0] *= -1
+    return quats
+
+
+def pack_poses(poses, start: int = 0) -> Tuple[Optional[np.ndarray], Optional[str]]:
+    poses = np.asarray(poses, dtype=np.float64)
+    if poses.size == 0:
+        return np.empty((0, STRIDE), dtype=np.float32), None
+    if poses.ndim == 2 and poses.shape[1] in [12, 16]:
+        poses = poses.reshape(len(poses), -1, 4)
+    packed = np.zeros((len(poses), STRIDE), dtype=np.float32)
+    packed[:, 0] = np.arange(start, start + len(poses))
+    if poses.ndim == 3 and poses.shape[1:] in [(3, 4), (4, 4)]:
+        packed[:, 1:4] = poses[:, :3, 3]
+        packed[:, 4:8] = rotations_to_quaternions(poses[:, :3, :3])
+    elif poses.ndim == 2 and poses.shape[1] == 7:
+        packed[:, 1:8] = poses
+    elif poses.ndim == 2 and poses.shape[1] == 3:
+        packed[:, 1:4] = poses
+        packed[:, 7] = 1.0
+    else:
+        return None, 'unsupported_pose_shape'
+    return packed, None
+
+
+@lru_cache(maxsize=config.TRAJECTORY_CACHE_SIZE)
+def _load_cached(path: str, mtime_ns: int, size: int, limit: Optional[int]) -> Tuple[Optional[np.ndarray], Optional[str]]:
+    try:
+        if path.endswith('.npy'):
+            poses = np.load(path)
+        else:
+            poses = np.loadtxt(path, dtype=np.float64, ndmin=2, max_rows=limit)
+    except (OSError, ValueError) as e:
+        return None, f'pose_load_failed: {e}'
+    packed, error = pack_poses(poses[:limit] if limit is not None else poses)
+    if error:
+        return None, error
+    packed = packed[~np.isnan(packed[:, 1:4]).any(axis=1)]
+    packed.setflags(write=False)
+    return packed, None
+
+
+def level_of_detail(packed: np.ndarray, max_points: int) -> np.ndarray:
+    if max_points <= 0 or len(packed) <= max_points:
+        return packed
+    indices = decimation.decimate(packed[:, 1:4], max_points=max_points)
+    if len(indices) > max_points:
+        indices = indices[np.linspace(0, len(indices) - 1, max_points).astype(np.int64)]
+    return packed[indices]
+
+
+def trajectory_headers(packed: np.ndarray, total: int) -> Dict[str, str]:
+    return {'X-Trajectory-Count': str(len(packed)), 'X-Trajectory-Total': str(total), 'X-Trajectory-Stride': str(STRIDE), 'X-Trajectory-Fields': ','.join(FIELDS), 'Access-Control-Expose-Headers': 'X-Trajectory-Count, X-Trajectory-Total, X-Trajectory-Stride, X-Trajectory-Fields'}
+
+
+def _encode(packed: np.ndarray, max_points: int) -> Tuple[bytes, Dict[str, str]]:
+    selected = level_of_detail(packed, max_points)
+    return np.ascontiguousarray(selected, dtype='<f4').tobytes(), trajectory_headers(selected, len(packed))
+
+
+@lru_cache(maxsize=config.TRAJECTORY_CACHE_SIZE)
+def _lod_cached(path: str, mtime_ns: int, size: int, limit: Optional[int], max_points: int) -> Tuple[Optional[np.ndarray], int, Optional[str]]:
+    packed, error = _load_cached(path, mtime_ns, size, limit)
+    if error:
+        return None, 0, error
+    selected = level_of_detail(packed, max_points)
+    selected.setflags(write=False)
+    return selected, len(packed), None
+
+
+@lru_cache(maxsize=config.TRAJECTORY_CACHE_SIZE)
+def _encode_cached(path: str, mtime_ns: int, size: int, limit: Optional[int], max_points: int) -> Tuple[Optional[bytes], Optional[Dict[str, str]], Optional[str]]:
+    selected, total, error = _lod_cached(path, mtime_ns, size, limit, max_points)
+    if error:
+        return None, None, error
+    return np.ascontiguousarray(selected, dtype='<f4').tobytes(), trajectory_headers(selected, total), None
+
+
+def file_trajectory_lod(path, max_points: int, limit: Optional[int] = None) -> Tuple[Optional[np.ndarray], Optional[str]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None, 'trajectory_not_found'
+    selected, _, error = _lod_cached(str(path), stat.st_mtime_ns, stat.st_size, limit, max_points)
+    return selected, error
+
+
+def file_trajectory_response(request: Optional[Request], path, max_points: int, limit: Optional[int] = None) -> Tuple[Optional[Response], Optional[str]]:
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return None, 'trajectory_not_found'
+    content, headers, error = _encode_cached(str(path), stat.st_mtime_ns, stat.st_size, limit, max_points)
+    if error:
+        return None, error
+    response = cached_bytes_response(request, content, MEDIA_TYPE, stat, f'-{limit}-{max_points}')
+    response.headers.update(headers)
+    return response, None
+
+
+def live_trajectory_response(packed: np.ndarray, max_points: int) -> Response:
+    content, headers = _encode(packed, max_points)
+    return Response(content, media_type=MEDIA_TYPE, headers={**headers, 'Cache-Control': 'no-store'})
+
+
+def encode_delta(packed: np.ndarray) -> Dict[str, Any]:
+    start = int(packed[0, 0]) if len(packed) else 0
+    return {'start': start, 'count': len(packed), 'stride': STRIDE, 'fields': FIELDS, 'encoding': 'float32-le-base64', 'data': base64.b64encode(np.ascontiguousarray(packed, dtype='<f4').tobytes()).decode('ascii')}
+
+
+class LiveTrajectory:
+    def __init__(self):
+        self.chunks = []
+        self.count = 0
+
+    def extend(self, packed: np.ndarray) -> None:
+        if len(packed):
+            self.chunks.append(packed)
+            self.count += len(packed)
+
+    def array(self) -> np.ndarray:
+        if len(self.chunks) > 1:
+            self.chunks = [np.concatenate(self.chunks)]
+        return self.chunks[0] if self.chunks else np.empty((0, STRIDE), dtype=np.float32)
+
+
+def results_trajectory_path(run_id: str, aligned: bool = False) -> Path:
+    return Path(config.RESULTS_DIR) / run_id / ('trajectory_aligned.npy' if aligned else 'trajectory.npy')
@@ -0,0 +1,289 @@
+import hashlib
+import json
+import os
+import shutil
+import tarfile
+import threading
+import time
+import uuid
+import zipfile
+from collections import OrderedDict
+from datetime import datetime
+from pathlib import Path, PurePosixPath
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Tuple
+import aiofiles
+import config
+
+ARCHIVE_SUFFIXES = {'.zip': 'zip', '.tar': 'tar', '.tar.gz': 'tar', '.tgz': 'tar', '.tar.bz2': 'tar', '.tar.xz': 'tar'}
+INDEXABLE_SUFFIXES = ['.zip', '.tar']
+
+
+def archive_suffix(filename: str) -> Optional[str]:
+    lower = filename.lower()
+    for suffix in sorted(ARCHIVE_SUFFIXES, key=len, reverse=True):
+        if lower.endswith(suffix):
+            return suffix
+    return None
+
+
+def _safe_member_path(dest: Path, name: str) -> Optional[Path]:
+    parts = [part for part in PurePosixPath(name.replace('\\', '/')).parts if part not in ['', '.', '/']]
+    if not parts or '..' in parts:
+        return None
+    return dest.joinpath(*parts)
+
+
+class UploadStore:
+    def __init__(self, upload_dir=None):
+        self.upload_dir = Path(upload_dir or config.UPLOAD_DIR)
+        self.session_dir = self.upload_dir / config.UPLOAD_SESSION_DIR
+        self.session_dir.mkdir(parents=True, exist_ok=True)
+        self.locks: Dict[str, threading.Lock] = {}
+
+    def _session_path(self, upload_id: str) -> Path:
+        return self.session_dir / f'{upload_id}.json'
+
+    def create(self, filename: str, size: int, checksum: Optional[str] = None, mode: str = 'extract') -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        filename = Path(filename).name
+        if not filename:
+            return None, 'filename_required'
+        if size < 0 or size > config.MAX_UPLOAD_SIZE:
+            return None, 'invalid_upload_size'
+        if mode not in ['extract', 'archive']:
+            return None, 'unknown_upload_mode'
+        if mode == 'archive' and archive_suffix(filename) not in INDEXABLE_SUFFIXES:
+            return None, 'archive_not_indexable'
+        upload_id = str(uuid.uuid4())[:8]
+        session = {'id': upload_id, 'filename': filename, 'size': size, 'checksum': checksum.lower() if checksum else None, 'mode': mode, 'offset': 0, 'status': 'uploading', 'path': str(self.upload_dir / f'{upload_id}_{filename}'), 'created': datetime.now().isoformat(), 'updated': datetime.now().isoformat()}
+        Path(session['path']).touch()
+        self.save(session)
+        return session, None
+
+    def get(self, upload_id: str) -> Optional[Dict[str, Any]]:
+        try:
+            return json.loads(self._session_path(upload_id).read_text())
+        except (OSError, ValueError):
+            return None
+
+    def save(self, session: Dict[str, Any]) -> None:
+        session['updated'] = datetime.now().isoformat()
+        path = self._session_path(session['id'])
+        tmp = path.with_suffix(f'.tmp-{os.getpid()}')
+        tmp.write_text(json.dumps(session))
+        os.replace(tmp, path)
+
+    def delete(self, upload_id: str) -> None:
+        session = self.get(upload_id)
+        if session is not None and session['status'] != 'completed':
+            Path(session['path']).unlink(missing_ok=True)
+        self._session_path(upload_id).unlink(missing_ok=True)
+
+    async def write_chunk(self, session: Dict[str, Any], offset: int, stream: AsyncIterator[bytes], checksum: Optional[str] = None) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        if session['status'] != 'uploading':
+            return None, 'upload_not_active'
+        if offset != session['offset']:
+            return None, 'offset_mismatch'
+        lock = self.locks.setdefault(session['id'], threading.Lock())
+        if not lock.acquire(blocking=False):
+            return None, 'chunk_in_progress'
+        try:
+            digest = hashlib.sha256()
+            written = 0
+            async with aiofiles.open(session['path'], 'r+b') as f:
+                await f.seek(offset)
+                async for block in stream:
+                    if offset + written + len(block) > session['size']:
+                        await f.truncate(offset)
+                        return None, 'chunk_exceeds_size'
+                    digest.update(block)
+                    await f.write(block)
+                    written += len(block)
+                if checksum and digest.hexdigest() != checksum.lower():
+                    await f.truncate(offset)
+                    return None, 'chunk_checksum_mismatch'
+                await f.truncate(offset + written)
+            session['offset'] = offset + written
+            self.save(session)
+            return session, None
+        finally:
+            lock.release()
+
+    def verify(self, session: Dict[str, Any]) -> Tuple[bool, Optional[str]]:
+        if session['offset'] != session['size']:
+            return False, 'upload_incomplete'
+        if not session['checksum']:
+            return True, None
+        digest = hashlib.sha256()
+        with open(session['path'], 'rb') as f:
+            for block in iter(lambda: f.read(config.UPLOAD_HASH_BLOCK), b''):
+                digest.update(block)
+        if digest.hexdigest() != session['checksum']:
+            return False, 'checksum_mismatch'
+        return True, None
+
+
+def extract_archive(archive_path, dest, progress_callback: Optional[Callable[[Dict[str, Any]], None]] = None) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    archive_path = Path(archive_path)
+    dest = Path(dest)
+    suffix = archive_suffix(archive_path.name)
+    if suffix is None:
+        return None, 'unsupported_archive'
+    dest.mkdir(parents=True, exist_ok=True)
+    extracted = 0
+    done_bytes = 0
+    last_report = time.monotonic()
+
+    def report(total_bytes, force=False):
+        nonlocal last_report
+        now = time.monotonic()
+        if progress_callback is not None and (force or now - last_report >= config.EXTRACT_PROGRESS_INTERVAL):
+            last_report = now
+            progress_callback({'files': extracted, 'bytes': done_bytes, 'total_bytes': total_bytes})
+
+    try:
+        if ARCHIVE_SUFFIXES[suffix] == 'zip':
+            with zipfile.ZipFile(archive_path) as archive:
+                members = [m for m in archive.infolist() if not m.is_dir()]
+                total_bytes = sum(m.file_size for m in members)
+                for member in members:
+                    target = _safe_member_path(dest, member.filename)
+                    if target is None:
+                        continue
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    with archive.open(member) as src, open(target, 'wb') as out:
+                        shutil.copyfileobj(src, out, config.UPLOAD_HASH_BLOCK)
+                    extracted += 1
+                    done_bytes += member.file_size
+                    report(total_bytes)
+        else:
+            with tarfile.open(archive_path, 'r:*') as archive:
+                total_bytes = None
+                for member in archive:
+                    if not member.isfile():
+                        continue
+                    target = _safe_member_path(dest, member.name)
+                    if target is None:
+                        continue
+                    target.parent.mkdir(parents=True, exist_ok=True)
+                    with archive.extractfile(member) as src, open(target, 'wb') as out:
+                        shutil.copyfileobj(src, out, config.UPLOAD_HASH_BLOCK)
+                    extracted += 1
+                    done_bytes += member.size
+                    report(total_bytes)
+    except (zipfile.BadZipFile, tarfile.TarError, OSError) as e:
+        return None, f'extract_failed: {e}'
+    report(done_bytes, force=True)
+    return {'path': str(dest), 'files': extracted, 'bytes': done_bytes}, None
+
+
+def _index_path(archive_path: Path) -> Path:
+    return archive_path.with_name(archive_path.name + config.ARCHIVE_INDEX_SUFFIX)
+
+
+def build_archive_index(archive_path) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    archive_path = Path(archive_path)
+    suffix = archive_suffix(archive_path.name)
+    if suffix not in INDEXABLE_SUFFIXES:
+        return None, 'archive_not_indexable'
+    members = {}
+    try:
+        if suffix == '.zip':
+            with zipfile.ZipFile(archive_path) as archive:
+                for info in archive.infolist():
+                    if not info.is_dir():
+                        members[info.filename] = [info.header_offset, info.file_size]
+        else:
+            with tarfile.open(archive_path, 'r:') as archive:
+                for member in archive:
+                    if member.isfile():
+                        members[member.name] = [member.offset_data, member.size]
+    except (zipfile.BadZipFile, tarfile.TarError, OSError) as e:
+        return None, f'index_failed: {e}'
+    stat = archive_path.stat()
+    index = {'archive': str(archive_path), 'kind': ARCHIVE_SUFFIXES[suffix], 'mtime_ns': stat.st_mtime_ns, 'size': stat.st_size, 'members': members}
+    _index_path(archive_path).write_text(json.dumps(index))
+    return index, None
+
+
+def load_archive_index(archive_path) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+    archive_path = Path(archive_path)
+    try:
+        index = json.loads(_index_path(archive_path).read_text())
+        stat = archive_path.stat()
+    except (OSError, ValueError):
+        return build_archive_index(archive_path)
+    if index.get('mtime_ns') != stat.st_mtime_ns or index.get('size') != stat.st_size:
+        return build_archive_index(archive_path)
+    return index, None
+
+
+def archive_names(index: Dict[str, Any]) -> Tuple[set, set]:
+    files = set()
+    dirs = set()
+    for name in index['members']:
+        parts = PurePosixPath(name).parts
+        files.add(parts[-1])
+        dirs.update(parts[:-1])
+    return files, dirs
+
+
+def archive_frames(index: Dict[str, Any], max_frames: int) -> List[str]:
+    extensions = tuple(config.SCAN_IMAGE_EXTENSIONS)
+    counts: Dict[str, List[str]] = {}
+    for name in index['members']:
+        if name.lower().endswith(extensions):
+            counts.setdefault(str(PurePosixPath(name).parent), []).append(name)
+    if not counts:
+        return []
+    largest = max(counts.values(), key=len)
+    return sorted(largest)[:max_frames]
+
+
+class ArchiveReader:
+    def __init__(self, max_handles: Optional[int] = None):
+        self.max_handles = max_handles or config.ARCHIVE_HANDLE_CACHE
+        self.handles: 'OrderedDict[str, Tuple[Any, threading.Lock]]' = OrderedDict()
+        self.indexes: Dict[str, Dict[str, Any]] = {}
+        self.lock = threading.Lock()
+
+    def _handle(self, archive_path: str, kind: str) -> Tuple[Any, threading.Lock]:
+        with self.lock:
+            if archive_path in self.handles:
+                self.handles.move_to_end(archive_path)
+                return self.handles[archive_path]
+            handle = zipfile.ZipFile(archive_path) if kind == 'zip' else open(archive_path, 'rb')
+            self.handles[archive_path] = (handle, threading.Lock())
+            while len(self.handles) > self.max_handles:
+                _, (old, old_lock) = self.handles.popitem(last=False)
+                with old_lock:
+                    old.close()
+            return self.handles[archive_path]
+
+    def index(self, archive_path) -> Tuple[Optional[Dict[str, Any]], Optional[str]]:
+        archive_path = str(archive_path)
+        if archive_path not in self.indexes:
+            index, error = load_archive_index(archive_path)
+            if error:
+                return None, error
+            self.indexes[archive_path] = index
+        return self.indexes[archive_path], None
+
+    def read(self, archive_path, member: str) -> Tuple[Optional[bytes], Optional[str]]:
+        index, error = self.index(archive_path)
+        if error:
+            return None, error
+        if member not in index['members']:
+            return None, 'member_not_found'
+        handle, lock = self._handle(str(archive_path), index['kind'])
+        with lock:
+            if index['kind'] == 'zip':
+                return handle.read(member), None
+            offset, size = index['members'][member]
+            handle.seek(offset)
+            return handle.read(size), None
+
+    def close(self) -> None:
+        with self.lock:
+            for handle, lock in self.handles.values():
+                handle.close()
+            self.handles.clear()
@@ -0,0 +1,177 @@
+import asyncio
+import time
+from datetime import datetime
+from fnmatch import fnmatchcase
+from typing import Any, Dict, Iterable, List, Optional, Tuple
+import config
+
+RESOURCE_KEYS = [('run', 'run_id', 'runs'), ('dataset', 'dataset_id', 'datasets'), ('algorithm', 'algorithm_id', 'algorithms')]
+PROGRESS_TYPES = ['run_update', 'dataset_update', 'conversion_progress', 'scan_progress']
+
+
+def message_channels(message: Dict[str, Any]) -> List[str]:
+    channels = []
+    for resource, id_key, collection in RESOURCE_KEYS:
+        resource_id = message.get(id_key)
+        if resource_id is None and isinstance(message.get(resource), dict):
+            resource_id = message[resource].get('id')
+        if resource_id is not None:
+            channels.extend([f'{resource}:{resource_id}', collection])
+    if message.get('type') == 'activity':
+        channels.append('activity')
+    return channels or ['global']
+
+
+def coalesce_key(message: Dict[str, Any]) -> Optional[Tuple[str, str]]:
+    if message.get('type') not in PROGRESS_TYPES or 'status' in message:
+        return None
+    channels = message_channels(message)
+    return (message['type'], channels[0])
+
+
+class ClientChannel:
+    def __init__(self, client_id: str, socket, queue_size: int):
+        self.client_id = client_id
+        self.socket = socket
+        self.queue: asyncio.Queue = asyncio.Queue(queue_size)
+        self.latest: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self.subscriptions: List[str] = []
+        self.connected = datetime.now().isoformat()
+        self.ping_count = 0
+        self.degraded = False
+        self.dropped = 0
+        self.writer: Optional[asyncio.Task] = None
+
+    def wants(self, channels: Iterable[str]) -> bool:
+        if not self.subscriptions:
+            return True
+        return any(fnmatchcase(channel, pattern) for channel in channels for pattern in self.subscriptions)
+
+    def offer(self, message: Dict[str, Any], key: Optional[Tuple[str, str]]) -> bool:
+        if key is not None:
+            if key in self.latest:
+                self.latest[key] = message
+                return True
+            if self.degraded or self.queue.full():
+                self.dropped += 1
+                return True
+            self.latest[key] = message
+            self.queue.put_nowait(key)
+        else:
+            if self.queue.full():
+                return False
+            self.queue.put_nowait(message)
+        if self.queue.qsize() >= self.queue.maxsize * config.WS_DEGRADE_WATERMARK:
+            self.degraded = True
+        return True
+
+
+class Broadcaster:
+    def __init__(self, queue_size: Optional[int] = None, progress_interval: Optional[float] = None, send_timeout: Optional[float] = None):
+        self.queue_size = queue_size or config.WS_CLIENT_QUEUE_SIZE
+        self.progress_interval = config.WS_PROGRESS_INTERVAL if progress_interval is None else progress_interval
+        self.send_timeout = send_timeout or config.WS_SEND_TIMEOUT
+        self.clients: Dict[str, ClientChannel] = {}
+        self.last_emit: Dict[Tuple[str, str], float] = {}
+        self.throttled: Dict[Tuple[str, str], Dict[str, Any]] = {}
+
+    def __len__(self) -> int:
+        return len(self.clients)
+
+    def connect(self, client_id: str, socket) -> ClientChannel:
+        previous = self.clients.pop(client_id, None)
+        if previous is not None and previous.writer is not None:
+            previous.writer.cancel()
+        client = ClientChannel(client_id, socket, self.queue_size)
+        client.writer = asyncio.create_task(self._writer(client))
+        self.clients[client_id] = client
+        return client
+
+    def disconnect(self, client_id: str, client: Optional[ClientChannel] = None) -> None:
+        current = self.clients.get(client_id)
+        if current is None or (client is not None and current is not client):
+            return
+        del self.clients[client_id]
+        if current.writer is not None and current.writer is not asyncio.current_task():
+            current.writer.cancel()
+
+    def subscribe(self, client_id: str, channels: List[str]) -> None:
+        if client_id in self.clients:
+            self.clients[client_id].subscriptions = list(channels)
+
+    def send(self, client_id: str, message: Dict[str, Any]) -> bool:
+        client = self.clients.get(client_id)
+        if client is None:
+            return False
+        if not client.offer({**message, 'timestamp': datetime.now().isoformat()}, None):
+            self._drop(client, 'queue_full')
+            return False
+        return True
+
+    def publish(self, message: Dict[str, Any]) -> None:
+        key = coalesce_key(message)
+        if key is None:
+            resource = message_channels(message)[0]
+            for progress_key in [k for k in self.throttled if k[1] == resource]:
+                self.throttled.pop(progress_key, None)
+            self._dispatch(message, None)
+            return
+        now = time.monotonic()
+        wait = self.last_emit.get(key, 0.0) + self.progress_interval - now
+        if wait <= 0:
+            self.last_emit[key] = now
+            self._dispatch(message, key)
+            return
+        if key not in self.throttled:
+            asyncio.get_running_loop().call_later(wait, self._flush, key)
+        self.throttled[key] = message
+
+    def _flush(self, key: Tuple[str, str]) -> None:
+        message = self.throttled.pop(key, None)
+        if message is None:
+            return
+        self.last_emit[key] = time.monotonic()
+        self._dispatch(message, key)
+
+    def _dispatch(self, message: Dict[str, Any], key: Optional[Tuple[str, str]]) -> None:
+        channels = message_channels(message)
+        stamped = {**message, 'channels': channels, 'timestamp': datetime.now().isoformat()}
+        if key is None and message.get('status') in ['completed', 'failed', 'cancelled', 'processed']:
+            self.last_emit.pop((message['type'], channels[0]), None)
+        for client in list(self.clients.values()):
+            if client.wants(channels) and not client.offer(stamped, key):
+                self._drop(client, 'queue_full')
+
+    def _drop(self, client: ClientChannel, reason: str) -> None:
+        self.disconnect(client.client_id, client)
+        asyncio.create_task(self._close(client, reason))
+
+    async def _close(self, client: ClientChannel, reason: str) -> None:
+        try:
+            await asyncio.wait_for(client.socket.close(code=config.WS_SLOW_CLIENT_CLOSE_CODE, reason=reason), self.send_timeout)
+        except Exception:
+            pass
+
+    async def _writer(self, client: ClientChannel) -> None:
+        while True:
+            item = await client.queue.get()
+            message = client.latest.pop(item, None) if isinstance(item, tuple) else item
+            if message is None:
+                continue
+            try:
+                await asyncio.wait_for(client.socket.send_json(message), self.send_timeout)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                self._drop(client, 'send_failed')
+                return
+            if client.degraded and client.queue.qsize() <= client.queue.maxsize * config.WS_RECOVER_WATERMARK:
+                client.degraded = False
+
+    async def close_all(self) -> None:
+        for client_id, client in list(self.clients.items()):
+            self.disconnect(client_id, client)
+            try:
+                await client.socket.close()
+            except Exception:
+                pass
@@ -17,6 +17,11 @@ FRONTEND_PORT = int(os.getenv('OPENSLAM_FRONTEND_PORT', 3001))
 
 MAX_UPLOAD_SIZE = 10 * 1024 * 1024 * 1024
 CHUNK_SIZE = 8192
+UPLOAD_SESSION_DIR = '.sessions'
+UPLOAD_HASH_BLOCK = 1024 * 1024
+EXTRACT_PROGRESS_INTERVAL = 0.5
+ARCHIVE_INDEX_SUFFIX = '.index.json'
+ARCHIVE_HANDLE_CACHE = 16
 MAX_WORKERS = int(os.getenv('OPENSLAM_MAX_WORKERS', os.cpu_count() or 4))
 
 DATASET_FORMATS = {
@@ -68,6 +73,14 @@ VIZ_UPDATE_RATE = 30
 VIZ_BUFFER_SIZE = 1000
 VIZ_POINT_CLOUD_SUBSAMPLE = 10
 
+THUMBNAIL_CACHE_DIR = Path(CACHE_DIR) / 'thumbnails'
+THUMBNAIL_SIZES = {'small': 160, 'medium': 480, 'large': 1024}
+THUMBNAIL_FORMAT = 'jpeg'
+THUMBNAIL_PREWARM_FORMATS = ['webp', THUMBNAIL_FORMAT]
+THUMBNAIL_QUALITY = 85
+THUMBNAIL_WORKERS = min(4, os.cpu_count() or 1)
+THUMBNAIL_MAX_AGE = 86400
+
 FAILURE_RISK_THRESHOLD = 0.75
 FAILURE_PREDICTION_WINDOW = 5.0
 
@@ -90,19 +103,81 @@ DOCKER_BASE_IMAGE = f'{DOCKER_REGISTRY}/base:latest'
 
 POPULAR_ALGORITHMS = ['orb_slam3', 'vins_mono', 'vins_fusion', 'lio_sam', 'rtabmap', 'cartographer', 'loam', 'dso', 'svo']
 
+RUN_START_METHOD = 'spawn'
+RUN_PROGRESS_INTERVAL = 0.5
+RUN_JOIN_TIMEOUT = 5
+RUN_PLOTS = ['trajectory_2d', 'trajectory_3d', 'error_distribution', 'ate_over_time', 'rpe_over_time']
+
+CONVERT_WORKERS = int(os.getenv('OPENSLAM_CONVERT_WORKERS', min(4, os.cpu_count() or 1)))
+CONVERT_START_METHOD = 'spawn'
+CONVERT_POLL_INTERVAL = 0.2
+CONVERT_PARTS_DIR = '.parts'
+
+TRAJECTORY_CACHE_SIZE = 32
+TRAJECTORY_MAX_POINTS = 5000
+
+FRAME_INDEX_DIR = Path(CACHE_DIR) / 'frame_index'
+FRAME_STORE_DIR = 'frame_store'
+
+SCAN_CACHE_BYTES = int(os.getenv('OPENSLAM_SCAN_CACHE_BYTES', 512 * 1024 * 1024))
+SCAN_ARCHIVE_NAME = 'velodyne.scans'
+SCAN_ARCHIVE_BLOCK = 4 * 1024 * 1024
+
+IMAGE_CACHE_BYTES = int(os.getenv('OPENSLAM_IMAGE_CACHE_BYTES', 512 * 1024 * 1024))
+IMAGE_CACHE_SHARED = os.getenv('OPENSLAM_IMAGE_CACHE_SHARED', '0') == '1'
+IMAGE_CACHE_SHARED_DIR = Path(os.getenv('OPENSLAM_IMAGE_CACHE_SHARED_DIR', '/dev/shm/openslam-images' if os.path.isdir('/dev/shm') else Path(CACHE_DIR) / 'shared_images'))
+IMAGE_CACHE_SHARED_BYTES = int(os.getenv('OPENSLAM_IMAGE_CACHE_SHARED_BYTES', 1024 * 1024 * 1024))
+DECODE_WORKERS = int(os.getenv('OPENSLAM_DECODE_WORKERS', min(8, os.cpu_count() or 1)))
+
+STREAM_LOOKAHEAD = 8
+STREAM_WORKERS = min(4, os.cpu_count() or 1)
+STREAM_INDEX_DIR = Path(CACHE_DIR) / 'stream_index'
+STREAM_MAX_IMU_WINDOW = 1000
+
+LIDAR_MIN_VOXEL = 0.05
+LIDAR_VOXEL_STEP = 1.25
+LIDAR_VOXEL_SEARCH_STEPS = 40
+LIDAR_TILE_GRID = 32
+LIDAR_TILE_MAX_DEPTH = 6
+LIDAR_CACHE_FRAMES = 16
+LIDAR_CACHE_SIZE = 128
+
 WS_HEARTBEAT_INTERVAL = 30
 WS_MAX_MESSAGE_SIZE = 10 * 1024 * 1024
+WS_CLIENT_QUEUE_SIZE = 256
+WS_PROGRESS_INTERVAL = 0.25
+WS_SEND_TIMEOUT = 5
+WS_DEGRADE_WATERMARK = 0.75
+WS_RECOVER_WATERMARK = 0.25
+WS_SLOW_CLIENT_CLOSE_CODE = 1013
 
 LOG_LEVEL = os.getenv('OPENSLAM_LOG_LEVEL', 'INFO')
 LOG_FORMAT = '%(asctime)s - %(name)s - %(levelname)s - %(message)s'
 
 DB_TYPE = os.getenv('OPENSLAM_DB_TYPE', 'sqlite')
-DB_PATH = os.getenv('OPENSLAM_DB_PATH', str(BASE_DIR / 'openslam.db'))
+DB_PATH = os.getenv('OPENSLAM_DB_PATH', str(Path(DATA_DIR) / 'openslam.db'))
 DB_POOL_SIZE = 10
+STATE_DB_TIMEOUT = 30
+STATE_PAGE_LIMIT = 100
+STATE_MAX_PAGE_LIMIT = 1000
+STATE_ACTIVITY_LIMIT = 1000
 
 CACHE_ENABLED = os.getenv('OPENSLAM_CACHE_ENABLED', 'true').lower() == 'true'
 CACHE_TTL = 3600
 
+SCAN_CACHE_DIR = Path(CACHE_DIR) / 'scans'
+SCAN_PROGRESS_INTERVAL = 0.5
+SCAN_IMAGE_EXTENSIONS = ['.png', '.jpg', '.jpeg', '.bmp', '.tif', '.tiff', '.pgm']
+
+FINGERPRINT_CACHE_DIR = Path(CACHE_DIR) / 'fingerprints'
+FINGERPRINT_BLOCK = 64 * 1024
+FINGERPRINT_SAMPLES = 8
+FINGERPRINT_FULL_BYTES = 1024 * 1024
+FINGERPRINT_WORKERS = min(8, (os.cpu_count() or 1) * 2)
+FINGERPRINT_CHECKSUM_LENGTH = 16
+FINGERPRINT_EXCLUDE_NAMES = [SCAN_ARCHIVE_NAME, f'{SCAN_ARCHIVE_NAME}.stamps.npy', FRAME_STORE_DIR]
+FINGERPRINT_EXCLUDE_DIRS = [CACHE_DIR, THUMBNAIL_CACHE_DIR, FRAME_INDEX_DIR]
+
 # Create required directories
 for d in [DATA_DIR, LOG_DIR, TEMP_DIR, UPLOAD_DIR, RESULTS_DIR, CACHE_DIR]:
     Path(d).mkdir(parents=True, exist_ok=True)
@@ -1,6 +1,6 @@
 CONNECTOR_DIR = 'connectors'
 
-CONNECTOR_TYPES = ['transform', 'parser', 'generator', 'validator']
+CONNECTOR_TYPES = ['transform', 'parser', 'generator', 'validator', 'writer']
 
 BUILTIN_TRANSFORMS = {
     'identity': 'pass through unchanged',
@@ -27,8 +27,27 @@ BUILTIN_GENERATORS = {
     'vocabulary_download': 'download vocabulary file from url'
 }
 
+BUILTIN_WRITERS = {
+    'records_writer': 'append chunks to a memory-mappable npy record file',
+    'tum_writer': 'write poses as TUM trajectory text',
+    'kitti_writer': 'write poses as KITTI trajectory text'
+}
+
 VARIABLE_PATTERN = r'\$\{([^}]+)\}'
 PATH_PATTERN = r'([a-zA-Z_][a-zA-Z0-9_]*(?:\.[a-zA-Z_][a-zA-Z0-9_]*)*)'
 
 MOUNT_MODE_RO = 'ro'
 MOUNT_MODE_RW = 'rw'
+
+SCRIPT_TIMEOUT = 30
+SCRIPT_WORKERS = 2
+SCRIPT_PERSISTENT_WORKERS = True
+SCRIPT_WORKER_START_METHOD = 'spawn'
+SCRIPT_WORKER_JOIN_TIMEOUT = 5
+SCRIPT_PICKLE_PROTOCOL = 5
+
+STREAM_CHUNK_ROWS = 65536
+STREAM_DEFAULT_WRITER = 'records_writer'
+STREAM_RECORD_SUFFIX = '.npy'
+TUM_RECORD_DTYPE = [('timestamps', 'f8'), ('poses', 'f8', (4, 4))]
+KITTI_RECORD_DTYPE = [('poses', 'f8', (4, 4))]
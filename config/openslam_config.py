@@ -18,6 +18,14 @@ PLOT_STYLE = 'seaborn-v0_8-whitegrid'
 FIGURE_SIZE_2D = (12, 10)
 FIGURE_SIZE_3D = (14, 10)
 FIGURE_SIZE_ERROR = (12, 6)
+PLOT_CACHE_ENABLED = True
+PLOT_CACHE_DIR = CACHE_DIR / 'plots'
+PLOT_WORKERS = min(4, os.cpu_count() or 1)
+PLOT_KEY_SUFFIX = '.plotkey'
+DECIMATE_PIXEL_TOLERANCE = 0.5
+DECIMATE_MIN_POINTS = 2000
+DECIMATE_MAX_POINTS = 5000
+DECIMATE_SEARCH_STEPS = 8
 DATASET_FORMATS = {
     'kitti': {'extensions': ['.txt'], 'has_timestamps': True, 'pose_format': 'matrix_3x4'},
     'euroc': {'extensions': ['.csv'], 'has_timestamps': True, 'pose_format': 'xyz_quat'},
@@ -39,5 +47,25 @@ LATEX_STYLES = ['ieee', 'neurips', 'icra', 'cvpr', 'plain']
 PARALLEL_WORKERS = os.cpu_count()
 LOG_LEVEL = 'INFO'
 PRECISION_DECIMALS = 4
+COLUMNAR_STATS = ['rmse', 'mean', 'median', 'std', 'max', 'min']
+COLUMNAR_CHUNK_ROWS = 1024
+COLUMNAR_ERROR_CHUNK = 65536
+COLUMNAR_COMPRESSION = 'gzip'
+COLUMNAR_COMPRESSION_LEVEL = 4
+COLUMNAR_LOCK_SUFFIX = '.lock'
+RESULTS_INDEX_ENABLED = True
+RESULTS_INDEX_PATH = RESULTS_DIR / 'results_index.db'
+RESULTS_INDEX_ARRAYS = RESULTS_DIR / 'results_arrays.h5'
+RESULTS_INDEX_TIMEOUT = 30
+RESULTS_INDEX_QUERY_LIMIT = 1000
+RESULTS_INDEX_COLUMNS = ['ate_rmse', 'ate_mean', 'ate_median', 'ate_std', 'ate_max', 'rpe_trans_rmse', 'rpe_rot_rmse', 'robustness_score', 'completion_rate', 'failure_count', 'frames_processed', 'avg_processing_time']
+RESULTS_INDEX_KEYS = ['algorithm', 'dataset', 'dataset_format', 'source', 'status', 'created']
+PLAYBACK_DROP_POLICIES = ['block', 'drop-oldest', 'skip-to-latest']
+PLAYBACK_QUEUE_SIZE = 4
+PLAYBACK_DEFAULT_FPS = 10.0
+FORMAT_MARKERS = {'kitti': {'required': ['sequences'], 'optional': []}, 'euroc': {'required': ['mav0'], 'optional': []}, 'tum': {'required': ['rgb.txt', 'depth.txt'], 'optional': []}}
+FORMAT_DETECT_MAX_DEPTH = 3
+FORMAT_DETECT_MAX_ENTRIES = 50000
+FORMAT_DETECT_CACHE_SIZE = 256
 for d in [DATA_DIR, RESULTS_DIR, CACHE_DIR, PLOT_DIR, TEMP_DIR]:
     d.mkdir(parents=True, exist_ok=True)
@@ -2,15 +2,15 @@ import sys
 import json
 import numpy as np
 
-input_json = sys.stdin.read()
-data = json.loads(input_json)
+def run(data):
+    input_data = data.get('input')
+    if isinstance(input_data, dict) and 'poses' in input_data:
+        output = input_data['poses']
+    else:
+        output = input_data
+    return {'result': output}
 
-input_data = data.get('input')
-if isinstance(input_data, dict) and 'poses' in input_data:
-    poses = input_data['poses']
-    output = poses
-else:
-    output = input_data
-
-result = {'result': output}
-print(json.dumps(result))
+if __name__ == '__main__':
+    input_json = sys.stdin.read()
+    result = run(json.loads(input_json))
+    print(json.dumps(result))
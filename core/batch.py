@@ -2,7 +2,8 @@ import yaml
 from pathlib import Path
 from concurrent.futures import ProcessPoolExecutor, as_completed
 from config import openslam_config as cfg
-from core import dataset_loader, trajectory, metrics
+from core import dataset_loader, trajectory, metrics, export
+from core.results_index import ResultsIndex
 def load_batch_config(config_path):
     config_path = Path(config_path)
     if not config_path.exists():
@@ -54,7 +55,24 @@ def evaluate_single_pair(dataset_info, algorithm_info, align=True):
     eval_results['name'] = algorithm_name
     eval_results['dataset'] = dataset_path
     return eval_results, None
-def run_batch_evaluation(config, parallel=1):
+def _strip_error_arrays(result):
+    if isinstance(result, dict):
+        return {k: _strip_error_arrays(v) for k, v in result.items() if k != 'errors'}
+    return result
+def evaluate_and_export(dataset_info, algorithm_info, align=True, columnar_path=None):
+    result, error = evaluate_single_pair(dataset_info, algorithm_info, align)
+    result['dataset_format'] = dataset_info.get('format')
+    if columnar_path is None:
+        return result, error
+    appended, export_error = export.append_runs_columnar([result], columnar_path, append=True)
+    if export_error:
+        result['export_error'] = export_error
+        return result, error
+    result = _strip_error_arrays(result)
+    result['columnar_path'] = appended['path']
+    result['columnar_row'] = appended['start_row']
+    return result, error
+def run_batch_evaluation(config, parallel=1, columnar_path=None, index_path=None):
     datasets = config['datasets']
     algorithms = config['algorithms']
     evaluation_pairs = []
@@ -66,15 +84,24 @@ def run_batch_evaluation(config, parallel=1):
     results = []
     if parallel <= 1:
         for dataset_info, algorithm_info in evaluation_pairs:
-            result, error = evaluate_single_pair(dataset_info, algorithm_info, align=True)
+            result, error = evaluate_and_export(dataset_info, algorithm_info, True, columnar_path)
             if error:
                 results.append(result)
             else:
                 results.append(result)
     else:
         with ProcessPoolExecutor(max_workers=parallel) as executor:
-            futures = {executor.submit(evaluate_single_pair, dataset_info, algorithm_info, True): (dataset_info, algorithm_info) for dataset_info, algorithm_info in evaluation_pairs}
+            futures = {executor.submit(evaluate_and_export, dataset_info, algorithm_info, True, columnar_path): (dataset_info, algorithm_info) for dataset_info, algorithm_info in evaluation_pairs}
             for future in as_completed(futures):
                 result, error = future.result()
                 results.append(result)
-    return {'results': results, 'total_evaluations': len(evaluation_pairs), 'successful': sum(1 for r in results if 'error' not in r)}, None
+    batch_result = {'results': results, 'total_evaluations': len(evaluation_pairs), 'successful': sum(1 for r in results if 'error' not in r)}
+    if columnar_path is not None:
+        batch_result['columnar_path'] = str(columnar_path)
+    if cfg.RESULTS_INDEX_ENABLED:
+        entries = [(r, {'dataset_format': r.get('dataset_format'), 'source': 'batch', 'arrays_path': r.get('columnar_path'), 'arrays_row': r.get('columnar_row')}) for r in results]
+        run_ids, error = ResultsIndex(index_path).add_runs(entries)
+        if not error:
+            for r, run_id in zip(results, run_ids):
+                r['run_id'] = run_id
+    return batch_result, None
@@ -1,8 +1,12 @@
 import yaml
+import os
 import re
+import struct
+import itertools
 import numpy as np
 from pathlib import Path
 from config import connector_config as ccfg
+from core import script_worker
 
 class ConnectorEngine:
     def __init__(self):
@@ -10,6 +14,7 @@ class ConnectorEngine:
         self.transforms = {}
         self.parsers = {}
         self.generators = {}
+        self.writers = {}
         self._load_builtin()
         self._load_connector_library()
 
@@ -17,6 +22,7 @@ class ConnectorEngine:
         self.transforms = dict(ccfg.BUILTIN_TRANSFORMS)
         self.parsers = dict(ccfg.BUILTIN_PARSERS)
         self.generators = dict(ccfg.BUILTIN_GENERATORS)
+        self.writers = dict(ccfg.BUILTIN_WRITERS)
 
     def _load_connector_library(self):
         connector_dir = Path(ccfg.CONNECTOR_DIR)
@@ -42,6 +48,8 @@ class ConnectorEngine:
             self.parsers[connector_name] = config
         elif connector_type == 'generator':
             self.generators[connector_name] = config
+        elif connector_type == 'writer':
+            self.writers[connector_name] = config
         return config, None
 
     def execute_connector(self, connector_name, input_data, params=None):
@@ -55,6 +63,8 @@ class ConnectorEngine:
             return self._execute_parser(config, input_data, params)
         elif connector_type == 'generator':
             return self._execute_generator(config, input_data, params)
+        elif connector_type == 'writer':
+            return self._execute_writer(config, input_data, params.get('output') if params else None)
         return None, 'unknown_connector_type'
 
     def _execute_transform(self, config, input_data, params):
@@ -153,67 +163,290 @@ class ConnectorEngine:
         script_file = Path(script_path)
         if not script_file.exists():
             return None, 'script_file_not_found'
+        timeout = config.get('timeout', ccfg.SCRIPT_TIMEOUT)
+        payload = {'input': input_data, 'params': params}
+        if config.get('persistent', ccfg.SCRIPT_PERSISTENT_WORKERS):
+            output, error = script_worker.get_worker_pool().execute(script_file.resolve(), payload, timeout)
+            if error != 'script_run_missing':
+                return output, error
+        return self._execute_script_subprocess(script_file, payload, timeout)
+
+    def _execute_script_subprocess(self, script_file, payload, timeout):
         import subprocess
         import json
-        input_json = json.dumps({'input': input_data, 'params': params})
-        result = subprocess.run(['python3', str(script_file)], input=input_json, capture_output=True, text=True, timeout=30)
+        input_json = json.dumps(payload)
+        try:
+            result = subprocess.run(['python3', str(script_file)], input=input_json, capture_output=True, text=True, timeout=timeout)
+        except subprocess.TimeoutExpired:
+            return None, 'script_timeout'
         if result.returncode != 0:
             return None, 'script_execution_failed'
         output = json.loads(result.stdout)
         return output, None
 
     def _parse_tum(self, file_path):
-        poses = []
-        timestamps = []
-        with open(file_path, 'r') as f:
-            for line in f:
-                if line.startswith('#'):
-                    continue
-                parts = line.strip().split()
-                if len(parts) < 8:
-                    continue
-                timestamp = float(parts[0])
-                tx, ty, tz = float(parts[1]), float(parts[2]), float(parts[3])
-                qx, qy, qz, qw = float(parts[4]), float(parts[5]), float(parts[6]), float(parts[7])
-                R = self._quaternion_to_matrix([qw, qx, qy, qz])
-                pose = np.eye(4)
-                pose[:3, :3] = R
-                pose[:3, 3] = [tx, ty, tz]
-                poses.append(pose)
-                timestamps.append(timestamp)
-        return {'poses': np.array(poses), 'timestamps': np.array(timestamps)}
+        return self._collect_records(self._iter_tum(file_path), ccfg.TUM_RECORD_DTYPE)
 
     def _parse_kitti(self, file_path):
-        poses = []
-        with open(file_path, 'r') as f:
-            for line in f:
-                values = [float(x) for x in line.strip().split()]
-                if len(values) < 12:
-                    continue
-                pose = np.eye(4)
-                pose[0, :] = values[0:4]
-                pose[1, :] = values[4:8]
-                pose[2, :] = values[8:12]
-                poses.append(pose)
-        return {'poses': np.array(poses)}
+        return self._collect_records(self._iter_kitti(file_path), ccfg.KITTI_RECORD_DTYPE)
 
     def _parse_regex(self, config, file_path):
-        pattern = config.get('pattern')
-        groups = config.get('groups', {})
         results = []
-        with open(file_path, 'r') as f:
-            for line in f:
-                match = re.match(pattern, line.strip())
-                if match:
-                    data = {}
-                    for key, group_idx in groups.items():
-                        if isinstance(group_idx, int):
-                            data[key] = match.group(group_idx)
-                        elif isinstance(group_idx, list):
-                            data[key] = [match.group(i) for i in group_idx]
-                    results.append(data)
+        for chunk in self._iter_regex(config, file_path):
+            names = chunk.dtype.names
+            results.extend(dict(zip(names, row)) for row in chunk.tolist())
         return results
 
+    def _iter_lines(self, file_path, chunk_rows=None):
+        if chunk_rows is None:
+            chunk_rows = ccfg.STREAM_CHUNK_ROWS
+        with open(file_path, 'r') as f:
+            while True:
+                lines = list(itertools.islice(f, chunk_rows))
+                if not lines:
+                    break
+                yield lines
+
+    def _iter_tum(self, file_path, chunk_rows=None):
+        for lines in self._iter_lines(file_path, chunk_rows):
+            rows = [parts[:8] for parts in (line.split() for line in lines if not line.startswith('#')) if len(parts) >= 8]
+            if not rows:
+                continue
+            values = np.array(rows, dtype=np.float64)
+            chunk = np.empty(len(values), dtype=ccfg.TUM_RECORD_DTYPE)
+            chunk['timestamps'] = values[:, 0]
+            chunk['poses'] = self._quaternions_to_matrices(values[:, [7, 4, 5, 6]], values[:, 1:4])
+            yield chunk
+
+    def _iter_kitti(self, file_path, chunk_rows=None):
+        for lines in self._iter_lines(file_path, chunk_rows):
+            rows = [parts[:12] for parts in (line.split() for line in lines) if len(parts) >= 12]
+            if not rows:
+                continue
+            values = np.array(rows, dtype=np.float64).reshape(-1, 3, 4)
+            chunk = np.zeros(len(values), dtype=ccfg.KITTI_RECORD_DTYPE)
+            chunk['poses'][:, :3, :] = values
+            chunk['poses'][:, 3, 3] = 1.0
+            yield chunk
+
+    def _iter_regex(self, config, file_path, chunk_rows=None):
+        pattern = re.compile(config.get('pattern'))
+        groups = {key: idx for key, idx in config.get('groups', {}).items() if isinstance(idx, (int, list))}
+        dtype = np.dtype([(key, object) for key in groups.keys()])
+        for lines in self._iter_lines(file_path, chunk_rows):
+            rows = []
+            for line in lines:
+                match = pattern.match(line.strip())
+                if not match:
+                    continue
+                row = []
+                for key, group_idx in groups.items():
+                    if isinstance(group_idx, int):
+                        row.append(match.group(group_idx))
+                    else:
+                        row.append([match.group(i) for i in group_idx])
+                rows.append(row)
+            if rows:
+                chunk = np.empty(len(rows), dtype=dtype)
+                for i, row in enumerate(rows):
+                    chunk[i] = tuple(row)
+                yield chunk
+
+    def _iter_array_chunks(self, records, chunk_rows=None):
+        if chunk_rows is None:
+            chunk_rows = ccfg.STREAM_CHUNK_ROWS
+        for start in range(0, len(records), chunk_rows):
+            yield records[start:start + chunk_rows]
+
+    def _collect_records(self, chunks, dtype):
+        chunks = list(chunks)
+        records = np.concatenate(chunks) if chunks else np.empty(0, dtype=dtype)
+        return {name: records[name] for name in records.dtype.names}
+
+    def _quaternions_to_matrices(self, quats, translations=None):
+        qw, qx, qy, qz = quats[:, 0], quats[:, 1], quats[:, 2], quats[:, 3]
+        poses = np.zeros((len(quats), 4, 4))
+        poses[:, 0, 0] = 1 - 2 * (qy * qy + qz * qz)
+        poses[:, 0, 1] = 2 * (qx * qy - qw * qz)
+        poses[:, 0, 2] = 2 * (qx * qz + qw * qy)
+        poses[:, 1, 0] = 2 * (qx * qy + qw * qz)
+        poses[:, 1, 1] = 1 - 2 * (qx * qx + qz * qz)
+        poses[:, 1, 2] = 2 * (qy * qz - qw * qx)
+        poses[:, 2, 0] = 2 * (qx * qz - qw * qy)
+        poses[:, 2, 1] = 2 * (qy * qz + qw * qx)
+        poses[:, 2, 2] = 1 - 2 * (qx * qx + qy * qy)
+        poses[:, 3, 3] = 1.0
+        if translations is not None:
+            poses[:, :3, 3] = translations
+        return poses
+
+    def _matrices_to_quaternions(self, R):
+        m00, m11, m22 = R[:, 0, 0], R[:, 1, 1], R[:, 2, 2]
+        trace = m00 + m11 + m22
+        quats = np.empty((len(R), 4))
+        case0 = trace > 0
+        case1 = ~case0 & (m00 > m11) & (m00 > m22)
+        case2 = ~case0 & ~case1 & (m11 > m22)
+        case3 = ~case0 & ~case1 & ~case2
+        with np.errstate(invalid='ignore', divide='ignore'):
+            s = np.sqrt(np.maximum(trace + 1.0, 0)) * 2
+            quats[case0] = np.stack([0.25 * s, (R[:, 2, 1] - R[:, 1, 2]) / s, (R[:, 0, 2] - R[:, 2, 0]) / s, (R[:, 1, 0] - R[:, 0, 1]) / s], axis=1)[case0]
+            s = np.sqrt(np.maximum(1.0 + m00 - m11 - m22, 0)) * 2
+            quats[case1] = np.stack([(R[:, 2, 1] - R[:, 1, 2]) / s, 0.25 * s, (R[:, 0, 1] + R[:, 1, 0]) / s, (R[:, 0, 2] + R[:, 2, 0]) / s], axis=1)[case1]
+            s = np.sqrt(np.maximum(1.0 + m11 - m00 - m22, 0)) * 2
+            quats[case2] = np.stack([(R[:, 0, 2] - R[:, 2, 0]) / s, (R[:, 0, 1] + R[:, 1, 0]) / s, 0.25 * s, (R[:, 1, 2] + R[:, 2, 1]) / s], axis=1)[case2]
+            s = np.sqrt(np.maximum(1.0 + m22 - m00 - m11, 0)) * 2
+            quats[case3] = np.stack([(R[:, 1, 0] - R[:, 0, 1]) / s, (R[:, 0, 2] + R[:, 2, 0]) / s, (R[:, 1, 2] + R[:, 2, 1]) / s, 0.25 * s], axis=1)[case3]
+        return quats
+
+    def stream_connector(self, connector_name, input_data, params=None):
+        if connector_name not in self.connectors:
+            return None, 'connector_not_found'
+        config = self.connectors[connector_name]
+        connector_type = config.get('type', 'transform')
+        if connector_type == 'parser':
+            format_type = config.get('format')
+            chunk_rows = params.get('chunk_rows') if params else None
+            if format_type == 'tum':
+                return self._iter_tum(input_data, chunk_rows), None
+            elif format_type == 'kitti':
+                return self._iter_kitti(input_data, chunk_rows), None
+            elif format_type == 'regex':
+                return self._iter_regex(config, input_data, chunk_rows), None
+            return None, 'unknown_parser_format'
+        elif connector_type == 'transform':
+            if isinstance(input_data, np.ndarray):
+                input_data = self._iter_array_chunks(input_data)
+            return self._iter_transform(config, input_data, params), None
+        return None, 'connector_not_streamable'
+
+    def _iter_transform(self, config, chunks, params):
+        for chunk in chunks:
+            result, error = self._execute_transform(config, chunk, params)
+            if error:
+                raise RuntimeError(f'stream_transform_failed: {error}')
+            yield result
+
+    def _stream_dtype(self, config, dtype=None):
+        if config.get('type', 'transform') != 'parser':
+            return dtype
+        format_type = config.get('format')
+        if format_type == 'tum':
+            return np.dtype(ccfg.TUM_RECORD_DTYPE)
+        elif format_type == 'kitti':
+            return np.dtype(ccfg.KITTI_RECORD_DTYPE)
+        elif format_type == 'regex':
+            return np.dtype([(key, object) for key, idx in config.get('groups', {}).items() if isinstance(idx, (int, list))])
+        return dtype
+
+    def stream_pipeline(self, steps, input_data, writer_name=None, output_path=None):
+        chunks = input_data
+        dtype = input_data.dtype if isinstance(input_data, np.ndarray) else None
+        for connector_name, params in steps:
+            chunks, error = self.stream_connector(connector_name, chunks, params)
+            if error:
+                return None, f'{connector_name}: {error}'
+            dtype = self._stream_dtype(self.connectors[connector_name], dtype)
+        if writer_name is None:
+            return chunks, None
+        if writer_name not in self.connectors:
+            return None, 'writer_not_found'
+        try:
+            return self._execute_writer(self.connectors[writer_name], chunks, output_path, dtype)
+        except RuntimeError as e:
+            return None, str(e)
+
+    def _execute_writer(self, config, input_data, output_path, dtype=None):
+        if output_path is None:
+            return None, 'writer_output_missing'
+        if isinstance(input_data, dict):
+            input_data = self._dict_to_records(input_data)
+        if isinstance(input_data, np.ndarray):
+            dtype = input_data.dtype
+            input_data = self._iter_array_chunks(input_data)
+        output_path = Path(output_path)
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        format_type = config.get('format')
+        if format_type == 'records':
+            return self._write_records(input_data, output_path, dtype)
+        elif format_type == 'tum':
+            return self._write_tum(input_data, output_path)
+        elif format_type == 'kitti':
+            return self._write_kitti(input_data, output_path)
+        return None, 'unknown_writer_format'
+
+    def _dict_to_records(self, data):
+        poses = np.asarray(data['poses'])
+        timestamps = data.get('timestamps')
+        if timestamps is None:
+            records = np.empty(len(poses), dtype=ccfg.KITTI_RECORD_DTYPE)
+        else:
+            records = np.empty(len(poses), dtype=ccfg.TUM_RECORD_DTYPE)
+            records['timestamps'] = timestamps
+        records['poses'] = poses
+        return records
+
+    def _npy_header(self, dtype, count, header_size):
+        header = repr({'descr': np.lib.format.dtype_to_descr(dtype), 'fortran_order': False, 'shape': (count,)})
+        header = header.ljust(header_size - 11) + '\n'
+        return b'\x93NUMPY\x01\x00' + struct.pack('<H', len(header)) + header.encode('latin1')
+
+    def _write_records(self, chunks, output_path, dtype=None):
+        count = 0
+        written = None
+        header_size = 0
+        tmp_path = output_path.with_name(f'{output_path.name}.tmp-{os.getpid()}')
+        try:
+            with open(tmp_path, 'wb') as f:
+                for chunk in chunks:
+                    if written is None:
+                        written = chunk.dtype
+                        header_size = self._records_header_size(written)
+                        f.write(self._npy_header(written, 0, header_size))
+                    elif chunk.dtype != written:
+                        return None, 'stream_dtype_mismatch'
+                    f.write(np.ascontiguousarray(chunk).tobytes())
+                    count += len(chunk)
+                if written is None:
+                    written = np.dtype(dtype if dtype is not None else ccfg.KITTI_RECORD_DTYPE)
+                    header_size = self._records_header_size(written)
+                f.seek(0)
+                f.write(self._npy_header(written, count, header_size))
+            tmp_path.replace(output_path)
+        finally:
+            tmp_path.unlink(missing_ok=True)
+        records = np.load(output_path, mmap_mode='r' if count else None, allow_pickle=False)
+        result = {name: records[name] for name in records.dtype.names}
+        result['path'] = str(output_path)
+        return result, None
+
+    def _records_header_size(self, dtype):
+        longest = len(self._npy_header(dtype, 2 ** 63, 0))
+        return (longest + 63) // 64 * 64
+
+    def _write_tum(self, chunks, output_path):
+        count = 0
+        with open(output_path, 'w') as f:
+            for chunk in chunks:
+                poses = chunk['poses']
+                if 'timestamps' in chunk.dtype.names:
+                    timestamps = chunk['timestamps']
+                else:
+                    timestamps = np.arange(count, count + len(chunk), dtype=np.float64)
+                quats = self._matrices_to_quaternions(poses[:, :3, :3])
+                rows = np.column_stack([timestamps, poses[:, :3, 3], quats[:, 1:4], quats[:, 0]])
+                np.savetxt(f, rows, fmt='%.9f')
+                count += len(chunk)
+        return {'path': str(output_path), 'count': count}, None
+
+    def _write_kitti(self, chunks, output_path):
+        count = 0
+        with open(output_path, 'w') as f:
+            for chunk in chunks:
+                np.savetxt(f, chunk['poses'][:, :3, :].reshape(-1, 12), fmt='%.9e')
+                count += len(chunk)
+        return {'path': str(output_path), 'count': count}, None
+
     def _generate_image_list(self, directory, params):
         dir_path = Path(directory)
         if not dir_path.exists():
@@ -241,6 +474,10 @@ class ConnectorEngine:
         for part in parts:
             if isinstance(current, dict):
                 current = current.get(part)
+            elif isinstance(current, np.ndarray) and current.dtype.names:
+                if part not in current.dtype.names:
+                    return None
+                current = current[part]
             elif isinstance(current, list):
                 idx = int(part)
                 current = current[idx]
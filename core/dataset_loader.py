@@ -2,6 +2,7 @@ import numpy as np
 from pathlib import Path
 import csv
 from config import openslam_config as cfg
+from core import format_detection
 def detect_format(path):
     path = Path(path)
     if not path.exists():
@@ -14,17 +15,9 @@ def detect_format(path):
         if 'timestamps' in path.name or path.parent.name in ['cam0', 'cam1', 'imu0']:
             return 'euroc', None
         return 'custom', None
-    sequences_dir = path / 'sequences'
-    if sequences_dir.exists():
-        return 'kitti', None
-    mav_dir = path / 'mav0'
-    if mav_dir.exists():
-        return 'euroc', None
-    rgb_file = path / 'rgb.txt'
-    depth_file = path / 'depth.txt'
-    if rgb_file.exists() and depth_file.exists():
-        return 'tum', None
-    return 'custom', None
+    detected = format_detection.detect(path, cfg.FORMAT_MARKERS, max_depth=0)
+    matched = format_detection.matched_formats(detected['files'], detected['dirs'], cfg.FORMAT_MARKERS)
+    return (matched[0] if matched else 'custom'), None
 def validate_path(path):
     path = Path(path)
     if not path.exists():
@@ -0,0 +1,110 @@
+import numpy as np
+from config import openslam_config as cfg
+def lttb(x, y, n_out):
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    n = len(x)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+    selected = np.empty(n_out, dtype=np.int64)
+    selected[0] = 0
+    selected[-1] = n - 1
+    counts = np.diff(np.r_[edges[1:], n])
+    avg_x = np.add.reduceat(x, edges[1:]) / counts
+    avg_y = np.add.reduceat(y, edges[1:]) / counts
+    prev = 0
+    for i in range(n_out - 2):
+        start, end = edges[i], edges[i + 1]
+        area = np.abs((x[prev] - avg_x[i]) * (y[start:end] - y[prev]) - (x[prev] - x[start:end]) * (avg_y[i] - y[prev]))
+        prev = start + int(np.argmax(area))
+        selected[i + 1] = prev
+    return selected
+def _segment_distances(points, starts, ends):
+    ab = ends - starts
+    ap = points - starts
+    denom = np.einsum('ij,ij->i', ab, ab)
+    t = np.divide(np.einsum('ij,ij->i', ap, ab), denom, out=np.zeros(len(points)), where=denom > 0)
+    t = np.clip(t, 0.0, 1.0)
+    return np.linalg.norm(ap - t[:, None] * ab, axis=1)
+def rdp(points, tolerance):
+    points = np.asarray(points, dtype=np.float64)
+    n = len(points)
+    if n <= 2:
+        return np.arange(n)
+    keep = np.zeros(n, dtype=bool)
+    keep[[0, n - 1]] = True
+    active = np.ones(n, dtype=bool)
+    active[[0, n - 1]] = False
+    while True:
+        kept = np.flatnonzero(keep)
+        candidates = np.flatnonzero(active)
+        if len(candidates) == 0:
+            return kept
+        segment = np.searchsorted(kept, candidates, side='right') - 1
+        dist = _segment_distances(points[candidates], points[kept[segment]], points[kept[segment + 1]])
+        starts = np.flatnonzero(np.r_[True, np.diff(segment) != 0])
+        group = np.cumsum(np.r_[False, np.diff(segment) != 0])
+        seg_max = np.maximum.reduceat(dist, starts)
+        active[candidates[seg_max[group] <= tolerance]] = False
+        split = np.flatnonzero((dist == seg_max[group]) & (dist > tolerance))
+        _, first = np.unique(group[split], return_index=True)
+        new_points = candidates[split[first]]
+        if len(new_points) == 0:
+            return np.flatnonzero(keep)
+        keep[new_points] = True
+        active[new_points] = False
+def grid_prefilter(points, tolerance):
+    points = np.asarray(points, dtype=np.float64)
+    n = len(points)
+    if n <= 2 or tolerance <= 0:
+        return np.arange(n)
+    cells = np.floor((points - points.min(axis=0)) / (tolerance / 2)).astype(np.int64)
+    changed = np.any(cells[1:] != cells[:-1], axis=1)
+    keep = np.zeros(n, dtype=bool)
+    keep[[0, n - 1]] = True
+    keep[1:] |= changed
+    keep[:-1] |= changed
+    return np.flatnonzero(keep)
+def pixel_tolerance(points, figsize, dpi, pixels=None):
+    if pixels is None:
+        pixels = cfg.DECIMATE_PIXEL_TOLERANCE
+    points = np.asarray(points, dtype=np.float64)
+    extent = np.ptp(points, axis=0)
+    resolution = min(figsize) * dpi
+    return float(np.max(extent)) / resolution * pixels
+def decimate_series(values, max_points=None):
+    values = np.asarray(values)
+    if max_points is None:
+        max_points = cfg.DECIMATE_MAX_POINTS
+    if len(values) <= max_points:
+        return np.arange(len(values))
+    indices = lttb(np.arange(len(values)), values, max_points)
+    return np.union1d(indices, [int(np.argmax(values)), int(np.argmin(values))])
+def decimate(points, values=None, tolerance=None, max_points=None, figsize=None, dpi=None):
+    points = np.asarray(points, dtype=np.float64)
+    n = len(points)
+    if n <= cfg.DECIMATE_MIN_POINTS:
+        return np.arange(n)
+    if tolerance is None:
+        tolerance = pixel_tolerance(points, figsize or cfg.FIGURE_SIZE_2D, dpi or cfg.PLOT_DPI)
+    base = grid_prefilter(points, tolerance)
+    indices = base[rdp(points[base], tolerance)]
+    if max_points is not None and len(indices) > max_points and tolerance > 0:
+        low, high = tolerance, tolerance * 2
+        fitted = base[rdp(points[base], high)]
+        while len(fitted) > max_points:
+            low, high = high, high * 2
+            fitted = base[rdp(points[base], high)]
+        for _ in range(cfg.DECIMATE_SEARCH_STEPS):
+            middle = (low + high) / 2
+            candidate = base[rdp(points[base], middle)]
+            if len(candidate) > max_points:
+                low = middle
+            else:
+                high, fitted = middle, candidate
+        indices = fitted
+    if values is not None:
+        budget = max_points if max_points is not None else cfg.DECIMATE_MAX_POINTS
+        indices = np.union1d(indices, decimate_series(values, budget))
+    return indices
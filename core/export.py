@@ -1,27 +1,31 @@
 import json
 import csv
+import os
+import time
+from contextlib import contextmanager
 from pathlib import Path
 import numpy as np
 from config import openslam_config as cfg
 import h5py
+try:
+    import fcntl
+except ImportError:
+    fcntl = None
+def _json_default(obj):
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    elif isinstance(obj, np.integer):
+        return int(obj)
+    elif isinstance(obj, np.floating):
+        return float(obj)
+    elif isinstance(obj, np.bool_):
+        return bool(obj)
+    raise TypeError(f'{type(obj).__name__} is not JSON serializable')
 def export_to_json(results, output_path):
     output_path = Path(output_path)
     output_path.parent.mkdir(parents=True, exist_ok=True)
-    def convert_numpy(obj):
-        if isinstance(obj, np.ndarray):
-            return obj.tolist()
-        elif isinstance(obj, (np.int64, np.int32)):
-            return int(obj)
-        elif isinstance(obj, (np.float64, np.float32)):
-            return float(obj)
-        elif isinstance(obj, dict):
-            return {k: convert_numpy(v) for k, v in obj.items()}
-        elif isinstance(obj, list):
-            return [convert_numpy(item) for item in obj]
-        return obj
-    clean_results = convert_numpy(results)
     with open(output_path, 'w') as f:
-        json.dump(clean_results, f, indent=2)
+        json.dump(results, f, indent=2, default=_json_default)
     return str(output_path), None
 def export_to_csv(results, output_path):
     output_path = Path(output_path)
@@ -126,6 +130,11 @@ def export_comparison_table(results_list, output_path, style='plain'):
     with open(output_path, 'w') as f:
         f.write('\n'.join(lines))
     return str(output_path), None
+def _create_error_dataset(group, name, data):
+    data = np.asarray(data, dtype=np.float64)
+    if data.size == 0:
+        return group.create_dataset(name, data=data)
+    return group.create_dataset(name, data=data, chunks=True, shuffle=True, compression=cfg.COLUMNAR_COMPRESSION, compression_opts=cfg.COLUMNAR_COMPRESSION_LEVEL)
 def export_to_hdf5(results, output_path):
     output_path = Path(output_path)
     output_path.parent.mkdir(parents=True, exist_ok=True)
@@ -138,7 +147,7 @@ def export_to_hdf5(results, output_path):
             ate_group.create_dataset('std', data=results['ate']['std'])
             ate_group.create_dataset('max', data=results['ate']['max'])
             ate_group.create_dataset('min', data=results['ate']['min'])
-            ate_group.create_dataset('errors', data=results['ate']['errors'])
+            _create_error_dataset(ate_group, 'errors', results['ate']['errors'])
         if 'rpe' in results and results['rpe'] is not None:
             rpe_group = f.create_group('rpe')
             for delta_key, rpe in results['rpe'].items():
@@ -150,13 +159,13 @@ def export_to_hdf5(results, output_path):
                 trans_group.create_dataset('mean', data=rpe['translation']['mean'])
                 trans_group.create_dataset('median', data=rpe['translation']['median'])
                 trans_group.create_dataset('std', data=rpe['translation']['std'])
-                trans_group.create_dataset('errors', data=rpe['translation']['errors'])
+                _create_error_dataset(trans_group, 'errors', rpe['translation']['errors'])
                 rot_group = delta_group.create_group('rotation')
                 rot_group.create_dataset('rmse', data=rpe['rotation']['rmse'])
                 rot_group.create_dataset('mean', data=rpe['rotation']['mean'])
                 rot_group.create_dataset('median', data=rpe['rotation']['median'])
                 rot_group.create_dataset('std', data=rpe['rotation']['std'])
-                rot_group.create_dataset('errors', data=rpe['rotation']['errors'])
+                _create_error_dataset(rot_group, 'errors', rpe['rotation']['errors'])
         if 'robustness' in results and results['robustness'] is not None:
             rob_group = f.create_group('robustness')
             rob_group.create_dataset('score', data=results['robustness']['score'])
@@ -166,3 +175,155 @@ def export_to_hdf5(results, output_path):
                 rob_group.create_dataset('failure_count', data=results['failures']['count'])
                 rob_group.create_dataset('failure_rate', data=results['failures']['failure_rate'])
     return str(output_path), None
+def flatten_run(result):
+    scalars = {}
+    arrays = {}
+    for key in ['name', 'dataset', 'error']:
+        if key in result:
+            scalars[key] = str(result[key])
+    ate = result.get('ate')
+    if ate:
+        for stat in cfg.COLUMNAR_STATS:
+            if stat in ate:
+                scalars[f'ate_{stat}'] = float(ate[stat])
+        if 'errors' in ate:
+            arrays['ate_errors'] = np.asarray(ate['errors'], dtype=np.float64)
+    rpe = result.get('rpe')
+    if rpe:
+        for delta_key, rpe_delta in rpe.items():
+            for part, short in [('translation', 'trans'), ('rotation', 'rot')]:
+                values = rpe_delta.get(part, {})
+                for stat in cfg.COLUMNAR_STATS:
+                    if stat in values:
+                        scalars[f'rpe_{delta_key}_{short}_{stat}'] = float(values[stat])
+                if 'errors' in values:
+                    arrays[f'rpe_{delta_key}_{short}_errors'] = np.asarray(values['errors'], dtype=np.float64)
+    if result.get('robustness') is not None:
+        scalars['robustness_score'] = float(result['robustness']['score'])
+    if result.get('completion') is not None:
+        scalars['completion_rate'] = float(result['completion']['completion_rate'])
+    if result.get('failures') is not None:
+        scalars['failure_count'] = float(result['failures']['count'])
+        scalars['failure_rate'] = float(result['failures']['failure_rate'])
+    return scalars, arrays
+@contextmanager
+def _file_lock(path):
+    lock_path = path.with_name(path.name + cfg.COLUMNAR_LOCK_SUFFIX)
+    with open(lock_path, 'w') as lock_file:
+        if fcntl is not None:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+        yield
+def _append_scalar_columns(runs, rows, start):
+    total = start + len(rows)
+    keys = set(runs.keys())
+    for scalars, _ in rows:
+        keys.update(scalars.keys())
+    for key in sorted(keys):
+        values = [scalars.get(key) for scalars, _ in rows]
+        if key not in runs:
+            if any(isinstance(v, str) for v in values):
+                runs.create_dataset(key, shape=(start,), maxshape=(None,), chunks=(cfg.COLUMNAR_CHUNK_ROWS,), dtype=h5py.string_dtype())
+            else:
+                runs.create_dataset(key, shape=(start,), maxshape=(None,), chunks=(cfg.COLUMNAR_CHUNK_ROWS,), dtype=np.float64, fillvalue=np.nan, shuffle=True, compression=cfg.COLUMNAR_COMPRESSION, compression_opts=cfg.COLUMNAR_COMPRESSION_LEVEL)
+        column = runs[key]
+        column.resize((total,))
+        if column.dtype.kind == 'f':
+            column[start:total] = np.array([np.nan if v is None else v for v in values], dtype=np.float64)
+        else:
+            column[start:total] = np.array(['' if v is None else str(v) for v in values], dtype=object)
+def _append_error_columns(errors, rows, start):
+    total = start + len(rows)
+    keys = set(errors.keys())
+    for _, arrays in rows:
+        keys.update(arrays.keys())
+    for key in sorted(keys):
+        if key not in errors:
+            group = errors.create_group(key)
+            group.create_dataset('values', shape=(0,), maxshape=(None,), chunks=(cfg.COLUMNAR_ERROR_CHUNK,), dtype=np.float64, shuffle=True, compression=cfg.COLUMNAR_COMPRESSION, compression_opts=cfg.COLUMNAR_COMPRESSION_LEVEL)
+            group.create_dataset('offsets', shape=(start,), maxshape=(None,), chunks=(cfg.COLUMNAR_CHUNK_ROWS,), dtype=np.int64)
+            group.create_dataset('lengths', shape=(start,), maxshape=(None,), chunks=(cfg.COLUMNAR_CHUNK_ROWS,), dtype=np.int64)
+        group = errors[key]
+        values = group['values']
+        base = values.shape[0]
+        chunks = [arrays.get(key, np.empty(0)) for _, arrays in rows]
+        lengths = np.array([len(c) for c in chunks], dtype=np.int64)
+        offsets = base + np.concatenate([[0], np.cumsum(lengths)[:-1]])
+        if lengths.sum() > 0:
+            values.resize((base + int(lengths.sum()),))
+            values[base:] = np.concatenate(chunks)
+        group['offsets'].resize((total,))
+        group['offsets'][start:total] = offsets
+        group['lengths'].resize((total,))
+        group['lengths'][start:total] = lengths
+def append_runs_columnar(results_list, output_path, append=True):
+    output_path = Path(output_path)
+    output_path.parent.mkdir(parents=True, exist_ok=True)
+    if isinstance(results_list, dict):
+        results_list = [results_list]
+    rows = [flatten_run(result) for result in results_list]
+    with _file_lock(output_path):
+        with h5py.File(output_path, 'a' if append else 'w') as f:
+            runs = f.require_group('runs')
+            errors = f.require_group('errors')
+            start = int(f.attrs.get('num_runs', 0))
+            _append_scalar_columns(runs, rows, start)
+            _append_error_columns(errors, rows, start)
+            f.attrs['num_runs'] = start + len(rows)
+    return {'path': str(output_path), 'start_row': start, 'num_rows': len(rows)}, None
+def export_runs_columnar(results_list, output_path, append=True):
+    result, error = append_runs_columnar(results_list, output_path, append)
+    if error:
+        return None, error
+    return result['path'], None
+def export_runs_parquet(results_list, output_dir):
+    try:
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+    except ImportError:
+        return None, 'pyarrow_not_available'
+    output_dir = Path(output_dir)
+    output_dir.mkdir(parents=True, exist_ok=True)
+    if isinstance(results_list, dict):
+        results_list = [results_list]
+    rows = [flatten_run(result) for result in results_list]
+    scalar_keys = sorted(set().union(*(scalars.keys() for scalars, _ in rows)))
+    array_keys = sorted(set().union(*(arrays.keys() for _, arrays in rows)))
+    columns = {}
+    for key in scalar_keys:
+        columns[key] = pa.array([scalars.get(key) for scalars, _ in rows])
+    for key in array_keys:
+        columns[key] = pa.array([arrays.get(key) for _, arrays in rows], type=pa.list_(pa.float64()))
+    part_path = output_dir / f'part-{time.time_ns()}-{os.getpid()}.parquet'
+    pq.write_table(pa.table(columns), part_path, compression='zstd')
+    return str(part_path), None
+def read_columnar_metric(path, column):
+    path = Path(path)
+    if not path.exists():
+        return None, 'results_file_not_found'
+    if path.is_dir():
+        try:
+            import pyarrow.parquet as pq
+        except ImportError:
+            return None, 'pyarrow_not_available'
+        table = pq.read_table(path, columns=[column])
+        return table.column(column).to_numpy(zero_copy_only=False), None
+    with h5py.File(path, 'r') as f:
+        if column not in f['runs']:
+            return None, 'column_not_found'
+        dataset = f['runs'][column]
+        if dataset.dtype.kind == 'f':
+            return dataset[:], None
+        return np.array(dataset.asstr()[:], dtype=object), None
+def read_columnar_errors(path, column, row):
+    path = Path(path)
+    if not path.exists():
+        return None, 'results_file_not_found'
+    with h5py.File(path, 'r') as f:
+        if column not in f['errors']:
+            return None, 'column_not_found'
+        group = f['errors'][column]
+        if row < 0 or row >= group['offsets'].shape[0]:
+            return None, 'row_out_of_range'
+        offset = int(group['offsets'][row])
+        length = int(group['lengths'][row])
+        return group['values'][offset:offset + length], None
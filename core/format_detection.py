@@ -0,0 +1,96 @@
+import os
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from config import openslam_config as cfg
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+def has_marker(marker, files, dirs):
+    if marker.startswith('.'):
+        return any(name.endswith(marker) for name in files)
+    return marker in files or marker in dirs
+def score_formats(files, dirs, rules):
+    scores = {}
+    for fmt, rule in rules.items():
+        score = 0
+        for marker in rule.get('required', []):
+            if not has_marker(marker, files, dirs):
+                score = 0
+                break
+            score += 100 if marker.startswith('.') else 10
+        score += sum(1 for marker in rule.get('optional', []) if has_marker(marker, files, dirs))
+        scores[fmt] = score
+    if not scores:
+        return 'custom'
+    best = max(scores, key=scores.get)
+    return best if scores[best] > 0 else 'custom'
+def matched_formats(files, dirs, rules):
+    return [fmt for fmt, rule in rules.items() if rule.get('required') and all(has_marker(marker, files, dirs) for marker in rule['required'])]
+def scan_markers(root, rules, max_depth=None, max_entries=None):
+    max_depth = cfg.FORMAT_DETECT_MAX_DEPTH if max_depth is None else max_depth
+    max_entries = max_entries or cfg.FORMAT_DETECT_MAX_ENTRIES
+    files = set()
+    dirs = set()
+    dir_mtimes = {}
+    entries = 0
+    truncated = False
+    level = [(str(root), '.')]
+    for depth in range(max_depth + 1):
+        next_level = []
+        for current, relative in level:
+            try:
+                dir_mtimes[relative] = os.stat(current).st_mtime_ns
+                iterator = os.scandir(current)
+            except OSError:
+                continue
+            with iterator:
+                for entry in iterator:
+                    entries += 1
+                    try:
+                        if entry.is_dir(follow_symlinks=False):
+                            dirs.add(entry.name)
+                            next_level.append((entry.path, entry.name if relative == '.' else f'{relative}/{entry.name}'))
+                        else:
+                            files.add(entry.name)
+                    except OSError:
+                        continue
+                    if entries >= max_entries:
+                        truncated = True
+                        break
+            if truncated:
+                break
+        if truncated or not next_level or matched_formats(files, dirs, rules):
+            break
+        level = next_level
+    return {'format': score_formats(files, dirs, rules), 'files': files, 'dirs': dirs, 'dir_mtimes': dir_mtimes, 'depth': depth, 'entries': entries, 'truncated': truncated}
+def _copy(result):
+    return dict(result, files=set(result['files']), dirs=set(result['dirs']), dir_mtimes=dict(result['dir_mtimes']))
+def _unchanged(root, dir_mtimes):
+    for relative, mtime_ns in dir_mtimes.items():
+        try:
+            if os.stat(root / relative).st_mtime_ns != mtime_ns:
+                return False
+        except OSError:
+            return False
+    return True
+def detect(path, rules, max_depth=None, max_entries=None, use_cache=True):
+    root = Path(path).absolute()
+    key = (str(root), max_depth, max_entries, repr(sorted(rules.items())))
+    if use_cache:
+        with _cache_lock:
+            cached = _cache.get(key)
+        if cached is not None and _unchanged(root, cached['dir_mtimes']):
+            with _cache_lock:
+                if key in _cache:
+                    _cache.move_to_end(key)
+            return _copy(cached)
+    result = scan_markers(root, rules, max_depth, max_entries)
+    with _cache_lock:
+        _cache[key] = result
+        _cache.move_to_end(key)
+        while len(_cache) > cfg.FORMAT_DETECT_CACHE_SIZE:
+            _cache.popitem(last=False)
+    return _copy(result)
+def clear_cache():
+    with _cache_lock:
+        _cache.clear()
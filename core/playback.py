@@ -0,0 +1,149 @@
+import threading
+import time
+from collections import deque
+import numpy as np
+from config import openslam_config as cfg
+def parse_rate(rate):
+    if rate is None:
+        return None, None
+    if isinstance(rate, str):
+        value = rate.strip().lower()
+        if value in ['max', 'inf', 'none']:
+            return None, None
+        if value.endswith('x'):
+            value = value[:-1]
+        try:
+            rate = float(value)
+        except ValueError:
+            return None, 'invalid_playback_rate'
+    if not np.isfinite(rate) or rate < 0:
+        return None, 'invalid_playback_rate'
+    if rate == 0:
+        return None, None
+    return float(rate), None
+def release_offsets(timestamps, count, rate):
+    if timestamps is None or len(timestamps) < count:
+        stamps = np.arange(count, dtype=np.float64) / cfg.PLAYBACK_DEFAULT_FPS
+    else:
+        stamps = np.asarray(timestamps[:count], dtype=np.float64)
+    if count == 0:
+        return stamps
+    offsets = np.maximum.accumulate(np.nan_to_num(stamps - stamps[0], nan=0.0))
+    return offsets / rate if rate else offsets
+def summarize(values):
+    if len(values) == 0:
+        return None
+    values = np.asarray(values, dtype=np.float64)
+    return {'mean': float(values.mean()), 'p50': float(np.percentile(values, 50)), 'p95': float(np.percentile(values, 95)), 'max': float(values.max())}
+class PlaybackQueue:
+    def __init__(self, drop_policy='block', size=None):
+        if drop_policy not in cfg.PLAYBACK_DROP_POLICIES:
+            raise ValueError(f'unknown_drop_policy: {drop_policy}')
+        self.drop_policy = drop_policy
+        self.size = max(1, size or cfg.PLAYBACK_QUEUE_SIZE)
+        self.items = deque()
+        self.dropped = []
+    def __len__(self):
+        return len(self.items)
+    def full(self):
+        return len(self.items) >= self.size
+    def put(self, item):
+        if self.full() and self.drop_policy != 'block':
+            self.dropped.append(self.items.popleft())
+        self.items.append(item)
+    def get(self):
+        if self.drop_policy == 'skip-to-latest':
+            while len(self.items) > 1:
+                self.dropped.append(self.items.popleft())
+        return self.items.popleft()
+class PlaybackStats:
+    def __init__(self, offsets, rate=None, drop_policy='block'):
+        self.offsets = offsets
+        self.rate = rate
+        self.drop_policy = drop_policy
+        self.started = None
+        self.finished = None
+        self.released = 0
+        self.frames = []
+        self.latencies = []
+        self.lags = []
+        self.processing_times = []
+    def start(self):
+        self.started = time.perf_counter()
+    def delay(self, position):
+        if self.rate is None:
+            return 0.0
+        return max(0.0, self.started + self.offsets[position] - time.perf_counter())
+    def release(self):
+        self.released += 1
+        return time.perf_counter()
+    def begin(self, position, frame_id, released):
+        now = time.perf_counter()
+        self.frames.append(frame_id)
+        self.latencies.append(now - released)
+        if self.rate is not None:
+            self.lags.append(now - self.started - self.offsets[position])
+        return now
+    def end(self, began):
+        self.processing_times.append(time.perf_counter() - began)
+    def finish(self):
+        self.finished = time.perf_counter()
+    def report(self, dropped):
+        wall_time = (self.finished or time.perf_counter()) - (self.started or time.perf_counter())
+        duration = float(self.offsets[-1] * (self.rate or 1.0)) if len(self.offsets) else 0.0
+        dropped = sorted(item[1] for item in dropped)
+        return {'rate': self.rate if self.rate is not None else 'max', 'drop_policy': self.drop_policy, 'frames_total': len(self.offsets), 'frames_released': self.released, 'frames_processed': len(self.frames), 'frames_dropped': len(dropped), 'drop_rate': len(dropped) / self.released if self.released else 0.0, 'dropped_frames': dropped, 'queue_latency': summarize(self.latencies), 'lag': summarize(self.lags), 'processing_time': summarize(self.processing_times), 'wall_time': wall_time, 'sequence_duration': duration, 'realtime_factor': duration / wall_time if wall_time > 0 else 0.0}
+class Playback:
+    def __init__(self, timestamps, count, rate=None, drop_policy='block', queue_size=None):
+        self.rate, error = parse_rate(rate)
+        if error:
+            raise ValueError(error)
+        self.queue = PlaybackQueue(drop_policy, queue_size)
+        self.stats = PlaybackStats(release_offsets(timestamps, count, self.rate), self.rate, drop_policy)
+        self.ready = threading.Condition()
+        self.stopped = threading.Event()
+        self.done = False
+        self.error = None
+    def _produce(self, load_frame):
+        try:
+            for position in range(len(self.stats.offsets)):
+                frame = load_frame(position)
+                if self.stopped.wait(self.stats.delay(position)):
+                    return
+                if frame is None:
+                    continue
+                with self.ready:
+                    if self.queue.drop_policy == 'block':
+                        self.ready.wait_for(lambda: not self.queue.full() or self.stopped.is_set())
+                    self.queue.put((position, position, frame, self.stats.release()))
+                    self.ready.notify_all()
+        except Exception as e:
+            self.error = f'playback_load_failed: {e}'
+        finally:
+            with self.ready:
+                self.done = True
+                self.ready.notify_all()
+    def run(self, load_frame, process_frame):
+        self.stats.start()
+        producer = threading.Thread(target=self._produce, args=(load_frame,), name='playback-producer', daemon=True)
+        producer.start()
+        try:
+            while True:
+                with self.ready:
+                    self.ready.wait_for(lambda: len(self.queue) > 0 or self.done)
+                    if len(self.queue) == 0:
+                        break
+                    position, frame_id, frame, released = self.queue.get()
+                    self.ready.notify_all()
+                began = self.stats.begin(position, frame_id, released)
+                process_frame(position, frame)
+                self.stats.end(began)
+        finally:
+            self.stopped.set()
+            with self.ready:
+                self.ready.notify_all()
+            producer.join()
+            self.stats.finish()
+        if self.error:
+            return None, self.error
+        return self.stats.report(self.queue.dropped), None
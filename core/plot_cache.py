@@ -0,0 +1,145 @@
+import hashlib
+import importlib
+import os
+import shutil
+from concurrent.futures import ProcessPoolExecutor
+from pathlib import Path
+import numpy as np
+import matplotlib
+from config import openslam_config as cfg
+from core import decimation
+def _hash_value(h, value):
+    if isinstance(value, np.ndarray):
+        h.update(f'ndarray:{value.dtype}:{value.shape}'.encode())
+        if value.dtype.hasobject:
+            _hash_value(h, value.tolist())
+        else:
+            h.update(np.ascontiguousarray(value).data)
+    elif isinstance(value, dict):
+        h.update(b'{')
+        for key in sorted(value, key=str):
+            _hash_value(h, key)
+            _hash_value(h, value[key])
+        h.update(b'}')
+    elif isinstance(value, (list, tuple)):
+        h.update(b'[')
+        for item in value:
+            _hash_value(h, item)
+        h.update(b']')
+    else:
+        h.update(repr(value).encode())
+PLOT_CACHE_VERSION = 2
+STYLE_SETTINGS = ['PLOT_STYLE', 'PLOT_DPI', 'FIGURE_SIZE_2D', 'FIGURE_SIZE_3D', 'FIGURE_SIZE_ERROR']
+def _code_signature(module):
+    functions = [value for name, value in sorted(vars(module).items()) if callable(value) and getattr(value, '__module__', None) == module.__name__ and hasattr(value, '__code__')]
+    return [(f.__qualname__, f.__code__.co_code, repr(f.__code__.co_consts)) for f in functions]
+def _style_signature(func):
+    module = importlib.import_module(func.__module__)
+    settings = getattr(module, 'cfg', None) or getattr(module, 'config', None) or cfg
+    return [PLOT_CACHE_VERSION, [getattr(settings, name, None) for name in STYLE_SETTINGS], matplotlib.__version__, _code_signature(module), _code_signature(decimation)]
+def plot_key(func, args, kwargs, suffix):
+    h = hashlib.blake2b(digest_size=16)
+    _hash_value(h, [func.__module__, func.__qualname__, suffix])
+    _hash_value(h, _style_signature(func))
+    _hash_value(h, list(args))
+    _hash_value(h, kwargs)
+    return h.hexdigest()
+def _render_job(module_name, func_name, args, kwargs, target_path):
+    module = importlib.import_module(module_name)
+    func = getattr(module, func_name)
+    target_path = Path(target_path)
+    target_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = target_path.with_name(f'{target_path.stem}.tmp-{os.getpid()}{target_path.suffix}')
+    try:
+        result = func(*args, output_path=tmp_path, **kwargs)
+    except Exception as e:
+        return None, f'plot_failed: {e}'
+    error = result[1] if isinstance(result, tuple) else None
+    if error:
+        return None, error
+    if not tmp_path.exists():
+        return None, 'plot_not_written'
+    os.replace(tmp_path, target_path)
+    return str(target_path), None
+class PlotBatch:
+    def __init__(self, cache_dir=None, workers=None, use_cache=None):
+        self.cache_dir = Path(cache_dir or cfg.PLOT_CACHE_DIR)
+        self.workers = workers or cfg.PLOT_WORKERS
+        self.use_cache = cfg.PLOT_CACHE_ENABLED if use_cache is None else use_cache
+        self.jobs = {}
+        self.results = {}
+    def add(self, name, func, output_path, *args, **kwargs):
+        output_path = Path(output_path)
+        key = plot_key(func, args, kwargs, output_path.suffix)
+        self.jobs[name] = {'module': func.__module__, 'func': func.__qualname__, 'args': args, 'kwargs': kwargs, 'output_path': output_path, 'key': key}
+        self.results.pop(name, None)
+        return key
+    def _key_path(self, output_path):
+        return output_path.with_name(output_path.name + cfg.PLOT_KEY_SUFFIX)
+    def _cache_path(self, job):
+        return self.cache_dir / f"{job['key']}{job['output_path'].suffix}"
+    def is_fresh(self, name):
+        job = self.jobs[name]
+        key_path = self._key_path(job['output_path'])
+        if not job['output_path'].exists() or not key_path.exists():
+            return False
+        return key_path.read_text().strip() == job['key']
+    def _publish(self, job, source_path):
+        output_path = job['output_path']
+        output_path.parent.mkdir(parents=True, exist_ok=True)
+        if Path(source_path) != output_path:
+            shutil.copyfile(source_path, output_path)
+        self._key_path(output_path).write_text(job['key'])
+        return str(output_path), None
+    def _resolve_cached(self, name):
+        job = self.jobs[name]
+        if self.is_fresh(name):
+            return str(job['output_path']), None
+        if self.use_cache and self._cache_path(job).exists():
+            return self._publish(job, self._cache_path(job))
+        return None
+    def _target_path(self, job):
+        return self._cache_path(job) if self.use_cache else job['output_path']
+    def _finish(self, name, rendered):
+        path, error = rendered
+        if error:
+            self.results[name] = (None, error)
+        else:
+            self.results[name] = self._publish(self.jobs[name], path)
+        return self.results[name]
+    def get(self, name):
+        if name not in self.jobs:
+            return None, 'plot_not_registered'
+        if name in self.results:
+            return self.results[name]
+        cached = self._resolve_cached(name)
+        if cached is not None:
+            self.results[name] = cached
+            return cached
+        job = self.jobs[name]
+        return self._finish(name, _render_job(job['module'], job['func'], job['args'], job['kwargs'], self._target_path(job)))
+    def render(self, names=None):
+        names = list(self.jobs) if names is None else names
+        pending = []
+        for name in names:
+            if name in self.results:
+                continue
+            cached = self._resolve_cached(name)
+            if cached is not None:
+                self.results[name] = cached
+            else:
+                pending.append(name)
+        if len(pending) == 1 or self.workers <= 1:
+            for name in pending:
+                self.get(name)
+        elif pending:
+            with ProcessPoolExecutor(max_workers=min(self.workers, len(pending))) as executor:
+                futures = {}
+                for name in pending:
+                    job = self.jobs[name]
+                    futures[name] = executor.submit(_render_job, job['module'], job['func'], job['args'], job['kwargs'], str(self._target_path(job)))
+                for name, future in futures.items():
+                    self._finish(name, future.result())
+        return {name: self.results[name] for name in names}
+    def stale(self):
+        return [name for name in self.jobs if not self.is_fresh(name)]
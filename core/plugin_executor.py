@@ -2,10 +2,13 @@ import numpy as np
 import time
 from pathlib import Path
 from config import plugin_config as pcfg
+from config import openslam_config as cfg
 from core.plugin_manager import PluginManager
-from core import dataset_loader, metrics
+from core import dataset_loader, metrics, export
+from core.results_index import ResultsIndex
 from core.cpp_slam_wrapper import CPPSLAMWrapper
 from core.workflow_executor import WorkflowExecutor
+from core.playback import Playback
 class PluginExecutor:
     def __init__(self, plugin_name):
         self.plugin_name = plugin_name
@@ -14,6 +17,7 @@ class PluginExecutor:
         self.state = {}
         self.trajectory = []
         self.timestamps = []
+        self.frame_indices = []
         self.processing_times = []
         self.is_cpp_plugin = False
         self.cpp_wrapper = None
@@ -154,12 +158,15 @@ class PluginExecutor:
             poses = np.array(poses)
         result_dict = {'trajectory': poses, 'timestamps': timestamps, 'processing_times': [], 'frames_processed': len(poses), 'total_frames': len(poses)}
         return result_dict, None
-    def run_on_dataset(self, dataset_path, dataset_format=None):
+    def run_on_dataset(self, dataset_path, dataset_format=None, progress_callback=None, playback=None):
         load_result, error = self.load()
         if error:
             return None, error
         if self.is_workflow_plugin:
-            return self._run_workflow(dataset_path, dataset_format)
+            result, error = self._run_workflow(dataset_path, dataset_format)
+            if progress_callback is not None and not error:
+                progress_callback(result['frames_processed'], result['total_frames'])
+            return result, error
         dataset, error = dataset_loader.load_dataset(dataset_path, format_type=dataset_format)
         if error:
             return None, error
@@ -177,29 +184,47 @@ class PluginExecutor:
             timestamps_data = dataset['timestamps']
         self.trajectory = []
         self.timestamps = []
+        self.frame_indices = []
         self.processing_times = []
         frame_count = len(poses_data)
-        for i in range(frame_count):
-            frame_data = adapter.get_frame_data(i)
-            if frame_data is None:
-                continue
+        def step(i, frame_data):
             process_result, error = self.process_frame(frame_data)
             if error:
-                continue
+                return
             pose, error = self.get_current_pose()
             if error:
-                continue
+                return
             if timestamps_data is not None:
                 timestamp = timestamps_data[i]
             else:
                 timestamp = float(i)
             self.trajectory.append(pose)
             self.timestamps.append(timestamp)
+            self.frame_indices.append(i)
+            if progress_callback is not None:
+                progress_callback(i + 1, frame_count)
+        playback_report = None
+        if playback is None:
+            for i in range(frame_count):
+                frame_data = adapter.get_frame_data(i)
+                if frame_data is None:
+                    continue
+                step(i, frame_data)
+        else:
+            try:
+                player = Playback(timestamps_data, frame_count, rate=playback.get('rate'), drop_policy=playback.get('drop_policy', 'block'), queue_size=playback.get('queue_size'))
+            except ValueError as e:
+                return None, str(e)
+            playback_report, error = player.run(adapter.get_frame_data, step)
+            if error:
+                return None, error
         shutdown_result, error = self.shutdown()
         if len(self.trajectory) == 0:
             return None, 'no_trajectory_generated'
         trajectory_array = np.array(self.trajectory)
-        result = {'trajectory': trajectory_array, 'timestamps': np.array(self.timestamps) if len(self.timestamps) > 0 else None, 'processing_times': self.processing_times, 'frames_processed': len(self.trajectory), 'total_frames': frame_count}
+        result = {'trajectory': trajectory_array, 'timestamps': np.array(self.timestamps) if len(self.timestamps) > 0 else None, 'frame_indices': np.array(self.frame_indices, dtype=np.int64), 'processing_times': self.processing_times, 'frames_processed': len(self.trajectory), 'total_frames': frame_count}
+        if playback_report is not None:
+            result['playback'] = playback_report
         return result, None
     def get_data_adapter(self, dataset):
         dataset_format = dataset.get('format', 'custom')
@@ -207,8 +232,8 @@ class PluginExecutor:
         if error:
             return DefaultDataAdapter(dataset), None
         return adapter, None
-    def evaluate_on_dataset(self, dataset_path, ground_truth_path, dataset_format=None):
-        result, error = self.run_on_dataset(dataset_path, dataset_format=dataset_format)
+    def evaluate_on_dataset(self, dataset_path, ground_truth_path, dataset_format=None, playback=None):
+        result, error = self.run_on_dataset(dataset_path, dataset_format=dataset_format, playback=playback)
         if error:
             return None, error
         gt_dataset, error = dataset_loader.load_dataset(ground_truth_path, format_type=dataset_format)
@@ -219,6 +244,9 @@ class PluginExecutor:
         else:
             gt_poses = gt_dataset['poses']
         estimated_poses = result['trajectory']
+        frame_indices = result.get('frame_indices')
+        if frame_indices is not None and len(frame_indices) == len(estimated_poses) and len(estimated_poses) != len(gt_poses) and len(frame_indices) > 0 and frame_indices[-1] < len(gt_poses):
+            gt_poses = np.asarray(gt_poses)[frame_indices]
         eval_results, error = metrics.evaluate_trajectory(estimated_poses, gt_poses)
         if error:
             return None, error
@@ -227,7 +255,18 @@ class PluginExecutor:
         eval_results['avg_processing_time'] = float(np.mean(result['processing_times']))
         eval_results['frames_processed'] = result['frames_processed']
         eval_results['total_frames'] = result['total_frames']
+        if 'playback' in result:
+            eval_results['playback'] = result['playback']
+        if cfg.RESULTS_INDEX_ENABLED:
+            self._index_evaluation(eval_results, dataset_path, dataset_format)
         return eval_results, None
+    def _index_evaluation(self, eval_results, dataset_path, dataset_format):
+        appended, error = export.append_runs_columnar([dict(eval_results, name=self.plugin_name, dataset=dataset_path)], cfg.RESULTS_INDEX_ARRAYS)
+        arrays_path = appended['path'] if not error else None
+        arrays_row = appended['start_row'] if not error else None
+        run_id, error = ResultsIndex().add_run(eval_results, algorithm=self.plugin_name, dataset=dataset_path, dataset_format=dataset_format, source='plugin', arrays_path=arrays_path, arrays_row=arrays_row)
+        if not error:
+            eval_results['run_id'] = run_id
 class DefaultDataAdapter:
     def __init__(self, dataset):
         self.dataset = dataset
@@ -0,0 +1,147 @@
+import json
+import re
+import sqlite3
+import time
+import uuid
+from contextlib import contextmanager
+from pathlib import Path
+import numpy as np
+from config import openslam_config as cfg
+from core import export
+FILTER_PATTERN = re.compile(r'^\s*([a-z_]+)\s*(<=|>=|!=|<|>|=)\s*(.+?)\s*$')
+FILTER_OPERATORS = ['<', '<=', '>', '>=', '=', '!=']
+def summarize_run(result):
+    summary = {}
+    for column in cfg.RESULTS_INDEX_COLUMNS:
+        value = result.get(column)
+        if isinstance(value, (int, float, np.integer, np.floating)):
+            summary[column] = float(value)
+    ate = result.get('ate')
+    if isinstance(ate, dict):
+        for stat in ['rmse', 'mean', 'median', 'std', 'max']:
+            if stat in ate:
+                summary[f'ate_{stat}'] = float(ate[stat])
+    rpe = result.get('rpe')
+    if isinstance(rpe, dict) and rpe:
+        first_delta = next(iter(rpe.values()))
+        if 'translation' in first_delta:
+            summary['rpe_trans_rmse'] = float(first_delta['translation']['rmse'])
+        if 'rotation' in first_delta:
+            summary['rpe_rot_rmse'] = float(first_delta['rotation']['rmse'])
+    if isinstance(result.get('robustness'), dict):
+        summary['robustness_score'] = float(result['robustness']['score'])
+    if isinstance(result.get('completion'), dict):
+        summary['completion_rate'] = float(result['completion']['completion_rate'])
+    if isinstance(result.get('failures'), dict):
+        summary['failure_count'] = float(result['failures']['count'])
+    return summary
+def parse_filter(expression):
+    match = FILTER_PATTERN.match(expression)
+    if not match:
+        return None, 'invalid_filter_expression'
+    column, operator, value = match.groups()
+    if column not in cfg.RESULTS_INDEX_COLUMNS and column not in cfg.RESULTS_INDEX_KEYS:
+        return None, 'unknown_filter_column'
+    try:
+        value = float(value)
+    except ValueError:
+        value = value.strip('\'"')
+    return (column, operator, value), None
+class ResultsIndex:
+    def __init__(self, db_path=None):
+        self.db_path = Path(db_path or cfg.RESULTS_INDEX_PATH)
+        self.db_path.parent.mkdir(parents=True, exist_ok=True)
+        self._init_schema()
+    @contextmanager
+    def _connect(self):
+        conn = sqlite3.connect(str(self.db_path), timeout=cfg.RESULTS_INDEX_TIMEOUT)
+        conn.row_factory = sqlite3.Row
+        try:
+            with conn:
+                yield conn
+        finally:
+            conn.close()
+    def _init_schema(self):
+        metric_columns = ', '.join(f'{column} REAL' for column in cfg.RESULTS_INDEX_COLUMNS)
+        with self._connect() as conn:
+            conn.execute('PRAGMA journal_mode=WAL')
+            conn.execute(f'CREATE TABLE IF NOT EXISTS runs (run_id TEXT PRIMARY KEY, algorithm TEXT, dataset TEXT, dataset_format TEXT, source TEXT, status TEXT, created REAL, {metric_columns}, arrays_path TEXT, arrays_row INTEGER, extra TEXT)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_runs_algorithm ON runs (algorithm, dataset_format, ate_rmse)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_runs_dataset ON runs (dataset, algorithm)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_runs_format ON runs (dataset_format, ate_rmse)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_runs_ate ON runs (ate_rmse)')
+            conn.execute('CREATE INDEX IF NOT EXISTS idx_runs_created ON runs (created)')
+    def _make_row(self, result, algorithm=None, dataset=None, dataset_format=None, source=None, status='completed', run_id=None, arrays_path=None, arrays_row=None, extra=None):
+        summary = summarize_run(result)
+        row = {'run_id': run_id or result.get('run_id') or uuid.uuid4().hex, 'algorithm': algorithm or result.get('name') or result.get('plugin_name'), 'dataset': str(dataset or result.get('dataset') or ''), 'dataset_format': dataset_format, 'source': source, 'status': 'failed' if 'error' in result else status, 'created': time.time(), 'arrays_path': str(arrays_path) if arrays_path else None, 'arrays_row': arrays_row, 'extra': json.dumps(extra) if extra else None}
+        for column in cfg.RESULTS_INDEX_COLUMNS:
+            row[column] = summary.get(column)
+        return row
+    def add_runs(self, entries):
+        rows = [self._make_row(result, **kwargs) for result, kwargs in entries]
+        if not rows:
+            return [], None
+        columns = list(rows[0].keys())
+        placeholders = ', '.join('?' for _ in columns)
+        with self._connect() as conn:
+            conn.executemany(f'INSERT OR REPLACE INTO runs ({", ".join(columns)}) VALUES ({placeholders})', [tuple(row[c] for c in columns) for row in rows])
+        return [row['run_id'] for row in rows], None
+    def add_run(self, result, **kwargs):
+        run_ids, error = self.add_runs([(result, kwargs)])
+        if error:
+            return None, error
+        return run_ids[0], None
+    def get_run(self, run_id):
+        with self._connect() as conn:
+            row = conn.execute('SELECT * FROM runs WHERE run_id = ?', (run_id,)).fetchone()
+        if row is None:
+            return None, 'run_not_found'
+        return self._row_to_dict(row), None
+    def delete_run(self, run_id):
+        with self._connect() as conn:
+            deleted = conn.execute('DELETE FROM runs WHERE run_id = ?', (run_id,)).rowcount
+        if deleted == 0:
+            return None, 'run_not_found'
+        return run_id, None
+    def query(self, algorithm=None, dataset=None, dataset_format=None, source=None, status=None, filters=None, sort='created', order='desc', limit=None, offset=0):
+        clauses = []
+        params = []
+        for column, value in [('algorithm', algorithm), ('dataset', dataset), ('dataset_format', dataset_format), ('source', source), ('status', status)]:
+            if value is not None:
+                clauses.append(f'{column} = ?')
+                params.append(value)
+        for column, operator, value in filters or []:
+            if column not in cfg.RESULTS_INDEX_COLUMNS and column not in cfg.RESULTS_INDEX_KEYS:
+                return None, 'unknown_filter_column'
+            if operator not in FILTER_OPERATORS:
+                return None, 'unknown_filter_operator'
+            clauses.append(f'{column} {operator} ?')
+            params.append(value)
+        if sort not in cfg.RESULTS_INDEX_COLUMNS and sort not in cfg.RESULTS_INDEX_KEYS:
+            return None, 'unknown_sort_column'
+        where = f'WHERE {" AND ".join(clauses)}' if clauses else ''
+        direction = 'DESC' if order == 'desc' else 'ASC'
+        limit = limit or cfg.RESULTS_INDEX_QUERY_LIMIT
+        with self._connect() as conn:
+            total = conn.execute(f'SELECT COUNT(*) FROM runs {where}', params).fetchone()[0]
+            if direction == 'DESC':
+                rows = conn.execute(f'SELECT * FROM runs {where} ORDER BY {sort} DESC LIMIT ? OFFSET ?', params + [limit, offset]).fetchall()
+            else:
+                present = ' AND '.join(clauses + [f'{sort} IS NOT NULL'])
+                missing = ' AND '.join(clauses + [f'{sort} IS NULL'])
+                ranked = conn.execute(f'SELECT COUNT(*) FROM runs WHERE {present}', params).fetchone()[0]
+                rows = conn.execute(f'SELECT * FROM runs WHERE {present} ORDER BY {sort} ASC LIMIT ? OFFSET ?', params + [limit, offset]).fetchall()
+                if len(rows) < limit:
+                    rows += conn.execute(f'SELECT * FROM runs WHERE {missing} LIMIT ? OFFSET ?', params + [limit - len(rows), max(0, offset - ranked)]).fetchall()
+        return {'runs': [self._row_to_dict(row) for row in rows], 'total': total, 'limit': limit, 'offset': offset}, None
+    def load_errors(self, run_id, column='ate_errors'):
+        run, error = self.get_run(run_id)
+        if error:
+            return None, error
+        if run['arrays_path'] is None or run['arrays_row'] is None:
+            return None, 'run_has_no_arrays'
+        return export.read_columnar_errors(run['arrays_path'], column, run['arrays_row'])
+    def _row_to_dict(self, row):
+        entry = dict(row)
+        entry['extra'] = json.loads(entry['extra']) if entry['extra'] else {}
+        return entry
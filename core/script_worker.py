@@ -0,0 +1,162 @@
+import ast
+import atexit
+import importlib.util
+import multiprocessing
+import os
+import pickle
+import queue
+import threading
+from pathlib import Path
+from config import connector_config as ccfg
+def send_message(conn, obj):
+    buffers = []
+    payload = pickle.dumps(obj, protocol=ccfg.SCRIPT_PICKLE_PROTOCOL, buffer_callback=buffers.append)
+    raw_buffers = [buf.raw() for buf in buffers]
+    conn.send([buf.nbytes for buf in raw_buffers])
+    conn.send_bytes(payload)
+    for buf in raw_buffers:
+        conn.send_bytes(buf)
+def recv_message(conn):
+    buffer_sizes = conn.recv()
+    payload = conn.recv_bytes()
+    buffers = []
+    for size in buffer_sizes:
+        buf = bytearray(size)
+        if size > 0:
+            conn.recv_bytes_into(buf)
+        else:
+            conn.recv_bytes()
+        buffers.append(buf)
+    return pickle.loads(payload, buffers=buffers)
+def _load_script(script_path, modules):
+    mtime = os.stat(script_path).st_mtime_ns
+    cached = modules.get(script_path)
+    if cached is not None and cached[0] == mtime:
+        return cached[1]
+    with open(script_path, 'r') as f:
+        tree = ast.parse(f.read(), filename=script_path)
+    if not any(isinstance(node, ast.FunctionDef) and node.name == 'run' for node in tree.body):
+        modules[script_path] = (mtime, None)
+        return None
+    spec = importlib.util.spec_from_file_location(f'connector_script_{Path(script_path).stem}', script_path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    modules[script_path] = (mtime, module)
+    return module
+def _worker_main(conn):
+    modules = {}
+    while True:
+        try:
+            message = recv_message(conn)
+        except (EOFError, OSError):
+            break
+        if message is None:
+            break
+        script_path, payload = message
+        try:
+            module = _load_script(script_path, modules)
+        except Exception as e:
+            send_message(conn, (None, f'script_import_failed: {e}'))
+            continue
+        run_func = getattr(module, 'run', None) if module is not None else None
+        if not callable(run_func):
+            send_message(conn, (None, 'script_run_missing'))
+            continue
+        try:
+            output = run_func(payload)
+        except Exception as e:
+            send_message(conn, (None, f'script_execution_failed: {e}'))
+            continue
+        try:
+            send_message(conn, (output, None))
+        except Exception as e:
+            send_message(conn, (None, f'script_output_not_serializable: {e}'))
+class ScriptWorker:
+    def __init__(self, context):
+        self.context = context
+        self.process = None
+        self.conn = None
+    def start(self):
+        parent_conn, child_conn = self.context.Pipe(duplex=True)
+        self.process = self.context.Process(target=_worker_main, args=(child_conn,), daemon=True)
+        self.process.start()
+        child_conn.close()
+        self.conn = parent_conn
+    def is_alive(self):
+        return self.process is not None and self.process.is_alive()
+    def execute(self, script_path, payload, timeout):
+        if not self.is_alive():
+            self.restart()
+        try:
+            send_message(self.conn, (script_path, payload))
+            if not self.conn.poll(timeout):
+                self.restart()
+                return None, 'script_timeout'
+            return recv_message(self.conn)
+        except (EOFError, OSError, BrokenPipeError):
+            self.restart()
+            return None, 'script_worker_crashed'
+    def restart(self):
+        self.stop(graceful=False)
+        self.start()
+    def stop(self, graceful=True):
+        if self.process is None:
+            return
+        if graceful and self.process.is_alive():
+            try:
+                send_message(self.conn, None)
+            except (OSError, BrokenPipeError):
+                pass
+            self.process.join(ccfg.SCRIPT_WORKER_JOIN_TIMEOUT)
+        if self.process.is_alive():
+            self.process.terminate()
+            self.process.join(ccfg.SCRIPT_WORKER_JOIN_TIMEOUT)
+        if self.process.is_alive():
+            self.process.kill()
+            self.process.join()
+        self.conn.close()
+        self.process = None
+        self.conn = None
+class ScriptWorkerPool:
+    def __init__(self, num_workers=None, start_method=None):
+        self.num_workers = num_workers or ccfg.SCRIPT_WORKERS
+        self.context = multiprocessing.get_context(start_method or ccfg.SCRIPT_WORKER_START_METHOD)
+        self.idle = queue.Queue()
+        self.workers = []
+        self.lock = threading.Lock()
+        self.closed = False
+    def _ensure_started(self):
+        with self.lock:
+            if self.workers:
+                return
+            for _ in range(self.num_workers):
+                worker = ScriptWorker(self.context)
+                worker.start()
+                self.workers.append(worker)
+                self.idle.put(worker)
+    def execute(self, script_path, payload, timeout=None):
+        if self.closed:
+            return None, 'script_pool_closed'
+        if timeout is None:
+            timeout = ccfg.SCRIPT_TIMEOUT
+        self._ensure_started()
+        worker = self.idle.get()
+        try:
+            return worker.execute(str(script_path), payload, timeout)
+        finally:
+            self.idle.put(worker)
+    def shutdown(self):
+        with self.lock:
+            self.closed = True
+            for worker in self.workers:
+                worker.stop()
+            self.workers = []
+_pool = None
+_pool_lock = threading.Lock()
+def get_worker_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = ScriptWorkerPool()
+            atexit.register(_pool.shutdown)
+        return _pool
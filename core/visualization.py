@@ -5,19 +5,26 @@ import matplotlib.pyplot as plt
 from pathlib import Path
 from config import openslam_config as cfg
 from core.trajectory import extract_positions
+from core import decimation
 def setup_plot_style():
     plt.style.use(cfg.PLOT_STYLE)
-def plot_trajectory_2d(poses, output_path, ground_truth=None, label='Estimated'):
+def _decimated(positions, dims, figsize, enabled):
+    if not enabled:
+        return positions
+    return positions[decimation.decimate(positions[:, :dims], figsize=figsize, dpi=cfg.PLOT_DPI)]
+def plot_trajectory_2d(poses, output_path, ground_truth=None, label='Estimated', decimate=True):
     positions = extract_positions(poses)
     if positions is None:
         return None, 'invalid_pose_format'
     fig, ax = plt.subplots(figsize=cfg.FIGURE_SIZE_2D, dpi=cfg.PLOT_DPI)
-    ax.plot(positions[:, 0], positions[:, 1], 'b-', linewidth=2, label=label, alpha=0.7)
+    line = _decimated(positions, 2, cfg.FIGURE_SIZE_2D, decimate)
+    ax.plot(line[:, 0], line[:, 1], 'b-', linewidth=2, label=label, alpha=0.7)
     ax.plot(positions[0, 0], positions[0, 1], 'go', markersize=10, label='Start')
     ax.plot(positions[-1, 0], positions[-1, 1], 'ro', markersize=10, label='End')
     if ground_truth is not None:
         gt_positions = extract_positions(ground_truth)
         if gt_positions is not None:
+            gt_positions = _decimated(gt_positions, 2, cfg.FIGURE_SIZE_2D, decimate)
             ax.plot(gt_positions[:, 0], gt_positions[:, 1], 'k--', linewidth=2, label='Ground Truth', alpha=0.5)
     ax.set_xlabel('X [m]')
     ax.set_ylabel('Y [m]')
@@ -30,18 +37,20 @@ def plot_trajectory_2d(poses, output_path, ground_truth=None, label='Estimated')
     plt.savefig(output_path, bbox_inches='tight', dpi=cfg.PLOT_DPI)
     plt.close()
     return str(output_path), None
-def plot_trajectory_3d(poses, output_path, ground_truth=None, label='Estimated'):
+def plot_trajectory_3d(poses, output_path, ground_truth=None, label='Estimated', decimate=True):
     positions = extract_positions(poses)
     if positions is None:
         return None, 'invalid_pose_format'
     fig = plt.figure(figsize=cfg.FIGURE_SIZE_3D, dpi=cfg.PLOT_DPI)
     ax = fig.add_subplot(111, projection='3d')
-    ax.plot(positions[:, 0], positions[:, 1], positions[:, 2], 'b-', linewidth=2, label=label, alpha=0.7)
+    line = _decimated(positions, 3, cfg.FIGURE_SIZE_3D, decimate)
+    ax.plot(line[:, 0], line[:, 1], line[:, 2], 'b-', linewidth=2, label=label, alpha=0.7)
     ax.plot([positions[0, 0]], [positions[0, 1]], [positions[0, 2]], 'go', markersize=10, label='Start')
     ax.plot([positions[-1, 0]], [positions[-1, 1]], [positions[-1, 2]], 'ro', markersize=10, label='End')
     if ground_truth is not None:
         gt_positions = extract_positions(ground_truth)
         if gt_positions is not None:
+            gt_positions = _decimated(gt_positions, 3, cfg.FIGURE_SIZE_3D, decimate)
             ax.plot(gt_positions[:, 0], gt_positions[:, 1], gt_positions[:, 2], 'k--', linewidth=2, label='Ground Truth', alpha=0.5)
     ax.set_xlabel('X [m]')
     ax.set_ylabel('Y [m]')
@@ -70,12 +79,13 @@ def plot_error_distribution(errors, output_path, title='Error Distribution'):
     plt.savefig(output_path, bbox_inches='tight', dpi=cfg.PLOT_DPI)
     plt.close()
     return str(output_path), None
-def plot_error_over_frames(errors, output_path, title='Error Over Frames'):
+def plot_error_over_frames(errors, output_path, title='Error Over Frames', decimate=True):
     if len(errors) == 0:
         return None, 'empty_errors'
+    errors = np.asarray(errors)
     fig, ax = plt.subplots(figsize=cfg.FIGURE_SIZE_ERROR, dpi=cfg.PLOT_DPI)
-    frames = np.arange(len(errors))
-    ax.plot(frames, errors, 'b-', linewidth=1, alpha=0.7)
+    frames = decimation.decimate_series(errors, int(cfg.FIGURE_SIZE_ERROR[0] * cfg.PLOT_DPI)) if decimate else np.arange(len(errors))
+    ax.plot(frames, errors[frames], 'b-', linewidth=1, alpha=0.7)
     ax.axhline(np.mean(errors), color='red', linestyle='--', linewidth=2, label=f'Mean: {np.mean(errors):.4f}m')
     ax.set_xlabel('Frame')
     ax.set_ylabel('Error [m]')
@@ -87,19 +97,22 @@ def plot_error_over_frames(errors, output_path, title='Error Over Frames'):
     plt.savefig(output_path, bbox_inches='tight', dpi=cfg.PLOT_DPI)
     plt.close()
     return str(output_path), None
-def plot_trajectory_with_errors(poses, errors, output_path, ground_truth=None):
+def plot_trajectory_with_errors(poses, errors, output_path, ground_truth=None, decimate=True):
     positions = extract_positions(poses)
     if positions is None:
         return None, 'invalid_pose_format'
     if len(positions) != len(errors):
         return None, 'length_mismatch'
+    errors = np.asarray(errors)
     fig, ax = plt.subplots(figsize=cfg.FIGURE_SIZE_2D, dpi=cfg.PLOT_DPI)
-    scatter = ax.scatter(positions[:, 0], positions[:, 1], c=errors, cmap='hot', s=20, alpha=0.7, vmin=0, vmax=np.percentile(errors, 95))
+    indices = decimation.decimate(positions[:, :2], values=errors, figsize=cfg.FIGURE_SIZE_2D, dpi=cfg.PLOT_DPI) if decimate else np.arange(len(errors))
+    scatter = ax.scatter(positions[indices, 0], positions[indices, 1], c=errors[indices], cmap='hot', s=20, alpha=0.7, vmin=0, vmax=np.percentile(errors, 95))
     ax.plot(positions[0, 0], positions[0, 1], 'go', markersize=10, label='Start')
     ax.plot(positions[-1, 0], positions[-1, 1], 'ro', markersize=10, label='End')
     if ground_truth is not None:
         gt_positions = extract_positions(ground_truth)
         if gt_positions is not None:
+            gt_positions = _decimated(gt_positions, 2, cfg.FIGURE_SIZE_2D, decimate)
             ax.plot(gt_positions[:, 0], gt_positions[:, 1], 'k--', linewidth=1, label='Ground Truth', alpha=0.3)
     cbar = plt.colorbar(scatter, ax=ax)
     cbar.set_label('Error [m]')
@@ -185,7 +198,7 @@ def plot_comparison_radar(results_dict, metrics_list, output_path):
     plt.savefig(output_path, bbox_inches='tight', dpi=cfg.PLOT_DPI)
     plt.close()
     return str(output_path), None
-def plot_multi_trajectory_overlay(trajectories_dict, output_path, ground_truth=None, show_3d=False):
+def plot_multi_trajectory_overlay(trajectories_dict, output_path, ground_truth=None, show_3d=False, decimate=True):
     if len(trajectories_dict) == 0:
         return None, 'empty_trajectories'
     if show_3d:
@@ -194,10 +207,13 @@ def plot_multi_trajectory_overlay(trajectories_dict, output_path, ground_truth=N
     else:
         fig, ax = plt.subplots(figsize=cfg.FIGURE_SIZE_2D, dpi=cfg.PLOT_DPI)
     colors = ['blue', 'red', 'green', 'orange', 'purple', 'brown', 'pink', 'cyan', 'magenta']
+    dims = 3 if show_3d else 2
+    figsize = cfg.FIGURE_SIZE_3D if show_3d else cfg.FIGURE_SIZE_2D
     for idx, (label, poses) in enumerate(trajectories_dict.items()):
         positions = extract_positions(poses)
         if positions is None:
             continue
+        positions = _decimated(positions, dims, figsize, decimate)
         color = colors[idx % len(colors)]
         if show_3d:
             ax.plot(positions[:, 0], positions[:, 1], positions[:, 2], linewidth=2, label=label, alpha=0.7, color=color)
@@ -206,6 +222,7 @@ def plot_multi_trajectory_overlay(trajectories_dict, output_path, ground_truth=N
     if ground_truth is not None:
         gt_positions = extract_positions(ground_truth)
         if gt_positions is not None:
+            gt_positions = _decimated(gt_positions, dims, figsize, decimate)
             if show_3d:
                 ax.plot(gt_positions[:, 0], gt_positions[:, 1], gt_positions[:, 2], 'k--', linewidth=2, label='Ground Truth', alpha=0.5)
             else:
@@ -4,6 +4,7 @@ import shutil
 from pathlib import Path
 import numpy as np
 from core.connector_engine import ConnectorEngine
+from config import connector_config as ccfg
 from core.docker_orchestrator import DockerOrchestrator
 
 class WorkflowExecutor:
@@ -114,12 +115,17 @@ class WorkflowExecutor:
 
             config_resolved = self._resolve_variables(config)
             input_data = config_resolved.get('input')
+            output_key = task.get('output')
 
-            result, error = self.connector_engine.execute_connector(connector_name, input_data, config_resolved)
+            if task.get('stream', False):
+                writer_name = task.get('writer', ccfg.STREAM_DEFAULT_WRITER)
+                stream_path = self.output_dir / f'{output_key or task_name}{ccfg.STREAM_RECORD_SUFFIX}'
+                result, error = self.connector_engine.stream_pipeline([(connector_name, config_resolved)], input_data, writer_name, stream_path)
+            else:
+                result, error = self.connector_engine.execute_connector(connector_name, input_data, config_resolved)
             if error:
                 return None, f'task_{task_name}_failed: {error}'
 
-            output_key = task.get('output')
             if output_key:
                 outputs[output_key] = result
 
@@ -144,7 +150,7 @@ class WorkflowExecutor:
             format_type = out.get('format')
             file_path = out.get('file')
             if output_type == 'trajectory':
-                extract_tasks.append({'name': 'parse_trajectory', 'connector': f'{format_type}_trajectory', 'config': {'input': f'${{OUTPUT_DIR}}/{file_path}'}, 'output': 'trajectory'})
+                extract_tasks.append({'name': 'parse_trajectory', 'connector': f'{format_type}_trajectory', 'config': {'input': f'${{OUTPUT_DIR}}/{file_path}'}, 'output': 'trajectory', 'stream': True})
 
         workflow = {'stages': [{'name': 'prepare', 'type': 'prepare', 'tasks': prepare_tasks}, {'name': 'execute', 'type': 'execute', 'docker': docker_config}, {'name': 'extract', 'type': 'extract', 'tasks': extract_tasks}]}
 
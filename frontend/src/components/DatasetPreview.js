@@ -52,14 +52,34 @@ const DatasetPreview = ({ dataset, onNotification }) => {
   const loadGroundTruth = async () => {
     if (!dataset?.metadata?.has_ground_truth) return;
     setLoading(true);
-    const response = await fetch(`/api/datasets/${dataset.id}/ground-truth`);
-    if (response.ok) {
-      const data = await response.json();
-      setGroundTruth(data.trajectory);
+    const response = await fetch(`/api/datasets/${dataset.id}/ground-truth.bin?max_points=5000`);
+    if (response.ok && response.headers.get('content-type') === 'application/octet-stream') {
+      const stride = parseInt(response.headers.get('X-Trajectory-Stride'), 10);
+      const packed = new Float32Array(await response.arrayBuffer());
+      const trajectory = [];
+      for (let offset = 0; offset < packed.length; offset += stride) {
+        const [qx, qy, qz, qw] = packed.subarray(offset + 4, offset + 8);
+        trajectory.push({
+          frame_id: packed[offset],
+          position: [packed[offset + 1], packed[offset + 2], packed[offset + 3]],
+          quaternion: [qx, qy, qz, qw],
+          pose: [
+            [1 - 2 * (qy * qy + qz * qz), 2 * (qx * qy - qz * qw), 2 * (qx * qz + qy * qw)],
+            [2 * (qx * qy + qz * qw), 1 - 2 * (qx * qx + qz * qz), 2 * (qy * qz - qx * qw)],
+            [2 * (qx * qz - qy * qw), 2 * (qy * qz + qx * qw), 1 - 2 * (qx * qx + qy * qy)]
+          ]
+        });
+      }
+      setGroundTruth(trajectory);
     }
     setLoading(false);
   };
 
+  const groundTruthAt = (frameId) => {
+    if (!groundTruth || groundTruth.length === 0) return undefined;
+    return groundTruth.find(point => point.frame_id >= frameId) || groundTruth[groundTruth.length - 1];
+  };
+
   const loadLidarData = async (frameId) => {
     const lidarSensor = dataset?.sensors?.find(s => s === 'velodyne');
     if (!lidarSensor) {
@@ -83,7 +103,7 @@ const DatasetPreview = ({ dataset, onNotification }) => {
     const x = groundTruth.map(point => point.position[0]);
     const y = groundTruth.map(point => point.position[1]);
     const z = groundTruth.map(point => point.position[2]);
-    const selectedPoint = groundTruth[selectedFrame];
+    const selectedPoint = groundTruthAt(selectedFrame);
     const theme = getPlotTheme();
     
     return (
@@ -329,16 +349,16 @@ const DatasetPreview = ({ dataset, onNotification }) => {
     };
 
     const currentPoseTrace = {
-      x: [groundTruth[selectedFrame].position[2]],
-      y: [-groundTruth[selectedFrame].position[0]],
-      z: [-groundTruth[selectedFrame].position[1]],
+      x: [groundTruthAt(selectedFrame).position[2]],
+      y: [-groundTruthAt(selectedFrame).position[0]],
+      z: [-groundTruthAt(selectedFrame).position[1]],
       mode: 'markers',
       type: 'scatter3d',
       name: 'Current Position',
       marker: {size: 8, color: isDarkMode ? '#ff6b6b' : '#ef4444', symbol: 'diamond', line: {width: 2, color: isDarkMode ? '#ffffff' : '#000000'}}
     };
 
-    const currentPose = groundTruth[selectedFrame];
+    const currentPose = groundTruthAt(selectedFrame);
     const { worldX, worldY, worldZ, filteredIntensity } = transformLidarToWorld(
       lidarData.x, 
       lidarData.y, 
@@ -1189,7 +1209,7 @@ const DatasetPreview = ({ dataset, onNotification }) => {
                         fontFamily: 'monospace',
                         fontSize: '0.7rem'
                       }}>
-                        {groundTruth[selectedFrame]?.position.map(p => p.toFixed(2)).join(', ')} m
+                        {groundTruthAt(selectedFrame)?.position.map(p => p.toFixed(2)).join(', ')} m
                       </span>
                     </div>
                     <div style={{ marginTop: '8px' }}>
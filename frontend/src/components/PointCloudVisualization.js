@@ -16,6 +16,12 @@ class PointCloudRenderer {
         this.raycaster = new THREE.Raycaster();
         this.mouse = new THREE.Vector2();
         this.animationId = null;
+        this.tileSource = null;
+        this.hierarchy = null;
+        this.tiles = new Map();
+        this.pendingTiles = new Map();
+        this.tileSpacing = 2;
+        this.frustum = new THREE.Frustum();
         this.init();
     }
     init() {
@@ -38,6 +44,7 @@ class PointCloudRenderer {
         this.controls.enablePan = true;
         this.controls.maxDistance = 100;
         this.controls.minDistance = 1;
+        this.controls.addEventListener('change', () => this.updateVisibleTiles());
     }
     setupLighting() {
         const ambientLight = new THREE.AmbientLight(0x404040, 0.4);
@@ -92,6 +99,102 @@ class PointCloudRenderer {
         this.pointCloud = new THREE.Points(geometry, material);
         this.scene.add(this.pointCloud);
     }
+    async loadTiles(tileSource) {
+        this.clearTiles();
+        this.tileSource = tileSource;
+        this.hierarchy = null;
+        if (!tileSource) return;
+        const response = await fetch(`${tileSource}/octree`);
+        if (!response.ok || this.tileSource !== tileSource) return;
+        const payload = await response.json();
+        this.hierarchy = payload.data || payload;
+        this.updateVisibleTiles();
+    }
+    nodeBox(level, x, y, z) {
+        const { origin, size } = this.hierarchy;
+        const edge = size / Math.pow(2, level);
+        const min = new THREE.Vector3(origin[0] + x * edge, origin[1] + y * edge, origin[2] + z * edge);
+        return { box: new THREE.Box3(min, min.clone().addScalar(edge)), edge };
+    }
+    selectTiles() {
+        const { nodes, grid } = this.hierarchy;
+        const selected = [];
+        const projection = this.container.clientHeight / (2 * Math.tan(THREE.MathUtils.degToRad(this.camera.fov) / 2));
+        this.frustum.setFromProjectionMatrix(new THREE.Matrix4().multiplyMatrices(this.camera.projectionMatrix, this.camera.matrixWorldInverse));
+        const stack = [[0, 0, 0, 0]];
+        while (stack.length > 0) {
+            const [level, x, y, z] = stack.pop();
+            const { box, edge } = this.nodeBox(level, x, y, z);
+            if (!this.frustum.intersectsBox(box)) continue;
+            const distance = Math.max(box.distanceToPoint(this.camera.position), 1e-3);
+            const spacing = (edge / grid) / distance * projection;
+            const children = [];
+            if (spacing > this.tileSpacing) {
+                for (let i = 0; i < 8; i++) {
+                    const child = [level + 1, 2 * x + (i & 1), 2 * y + ((i >> 1) & 1), 2 * z + ((i >> 2) & 1)];
+                    if (nodes[child.join('/')] !== undefined) children.push(child);
+                }
+            }
+            if (children.length > 0) {
+                stack.push(...children);
+            } else {
+                selected.push(`${level}/${x}/${y}/${z}`);
+            }
+        }
+        return selected;
+    }
+    async updateVisibleTiles() {
+        if (!this.hierarchy) return;
+        const tileSource = this.tileSource;
+        const selected = this.selectTiles();
+        await Promise.all(selected.filter(key => !this.tiles.has(key)).map(key => this.fetchTile(tileSource, key)));
+        if (this.tileSource !== tileSource) return;
+        const visible = new Set(selected);
+        this.tiles.forEach((tile, key) => {
+            tile.visible = visible.has(key);
+        });
+    }
+    fetchTile(tileSource, key) {
+        const url = `${tileSource}/tiles/${key}`;
+        if (!this.pendingTiles.has(url)) {
+            const request = fetch(url).then(async response => {
+                if (!response.ok || this.tileSource !== tileSource) return;
+                const packed = new Float32Array(await response.arrayBuffer());
+                const stride = parseInt(response.headers.get('X-Point-Stride'), 10) || 4;
+                const positions = new Float32Array(packed.length / stride * 3);
+                const colors = new Float32Array(packed.length / stride * 3);
+                const range = this.hierarchy.size / 2;
+                for (let i = 0, j = 0; i < packed.length; i += stride, j += 3) {
+                    positions[j] = packed[i];
+                    positions[j + 1] = packed[i + 1];
+                    positions[j + 2] = packed[i + 2];
+                    const depth = Math.sqrt(packed[i] * packed[i] + packed[i + 1] * packed[i + 1] + packed[i + 2] * packed[i + 2]);
+                    const color = this.depthToColor(Math.min(1, depth / range));
+                    colors[j] = color.r;
+                    colors[j + 1] = color.g;
+                    colors[j + 2] = color.b;
+                }
+                const geometry = new THREE.BufferGeometry();
+                geometry.setAttribute('position', new THREE.BufferAttribute(positions, 3));
+                geometry.setAttribute('color', new THREE.BufferAttribute(colors, 3));
+                const material = new THREE.PointsMaterial({ size: this.pointSize || 0.05, vertexColors: true });
+                const tile = new THREE.Points(geometry, material);
+                tile.visible = false;
+                this.tiles.set(key, tile);
+                this.scene.add(tile);
+            }).finally(() => this.pendingTiles.delete(url));
+            this.pendingTiles.set(url, request);
+        }
+        return this.pendingTiles.get(url);
+    }
+    clearTiles() {
+        this.tiles.forEach(tile => {
+            this.scene.remove(tile);
+            tile.geometry.dispose();
+            tile.material.dispose();
+        });
+        this.tiles.clear();
+    }
     depthToColor(normalizedDepth) {
         const hue = (1 - normalizedDepth) * 0.7;
         return new THREE.Color().setHSL(hue, 1, 0.5);
@@ -161,9 +264,13 @@ class PointCloudRenderer {
         }
     }
     setPointSize(size) {
+        this.pointSize = size;
         if (this.pointCloud) {
             this.pointCloud.material.size = size;
         }
+        this.tiles.forEach(tile => {
+            tile.material.size = size;
+        });
     }
     setColorMode(mode) {
         if (this.lastPointData) {
@@ -184,13 +291,15 @@ class PointCloudRenderer {
         if (this.animationId) {
             cancelAnimationFrame(this.animationId);
         }
+        this.clearTiles();
+        this.tileSource = null;
         this.renderer.dispose();
         if (this.container.contains(this.renderer.domElement)) {
             this.container.removeChild(this.renderer.domElement);
         }
     }
 }
-const PointCloudVisualization = ({ pointCloudData, trajectoryData, currentPose, onPointSelect }) => {
+const PointCloudVisualization = ({ pointCloudData, tileSource, trajectoryData, currentPose, onPointSelect }) => {
     const containerRef = useRef();
     const rendererRef = useRef();
     const [colorMode, setColorMode] = useState('depth');
@@ -219,6 +328,11 @@ const PointCloudVisualization = ({ pointCloudData, trajectoryData, currentPose,
             rendererRef.current.updatePointCloud(pointCloudData, colorMode);
         }
     }, [pointCloudData, colorMode]);
+    useEffect(() => {
+        if (rendererRef.current && !pointCloudData) {
+            rendererRef.current.loadTiles(tileSource);
+        }
+    }, [tileSource, pointCloudData]);
     useEffect(() => {
         if (rendererRef.current && trajectoryData) {
             rendererRef.current.updateTrajectory(trajectoryData);
@@ -430,6 +430,7 @@ const Visualization = ({ executionResults, currentDataset, onNotification, isDar
             </div>
             <PointCloudVisualization 
               pointCloudData={pointCloudData}
+              tileSource={currentDataset ? `/api/datasets/${currentDataset.id}/lidar/${currentFrame}` : null}
               trajectoryData={trajectoryData}
               currentPose={trajectoryData?.[currentFrame]?.pose}
               onPointSelect={(pointInfo) => {
@@ -487,6 +488,7 @@ const Visualization = ({ executionResults, currentDataset, onNotification, isDar
               </div>
               <PointCloudVisualization 
                 pointCloudData={pointCloudData}
+              tileSource={currentDataset ? `/api/datasets/${currentDataset.id}/lidar/${currentFrame}` : null}
                 trajectoryData={trajectoryData}
                 currentPose={trajectoryData?.[currentFrame]?.pose}
               />
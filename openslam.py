@@ -1,4 +1,5 @@
 import sys
+import time
 import argparse
 import numpy as np
 from pathlib import Path
@@ -6,6 +7,8 @@ import openslam_config as cfg
 from core import dataset_loader, trajectory, metrics, visualization, motion_analysis, scene_analysis, export, format_converter, statistical_analysis, task_metrics, batch
 from core.plugin_manager import PluginManager
 from core.plugin_executor import PluginExecutor
+from core.results_index import ResultsIndex, parse_filter
+from core.plot_cache import PlotBatch
 def format_number(value, decimals=None):
     if decimals is None:
         decimals = cfg.PRECISION_DECIMALS
@@ -194,26 +197,15 @@ def evaluate_trajectory(estimated_path, ground_truth_path, format_type=None, ali
         output_dir = Path(output_dir)
         output_dir.mkdir(parents=True, exist_ok=True)
         print_section('Generating Visualizations')
-        traj_2d_path = output_dir / 'trajectory_2d.png'
-        result, error = visualization.plot_trajectory_2d(est_poses, traj_2d_path, ground_truth=gt_poses, label='Estimated')
-        if not error:
-            print(f'  2D Trajectory: {result}')
-        traj_3d_path = output_dir / 'trajectory_3d.png'
-        result, error = visualization.plot_trajectory_3d(est_poses, traj_3d_path, ground_truth=gt_poses, label='Estimated')
-        if not error:
-            print(f'  3D Trajectory: {result}')
-        error_dist_path = output_dir / 'error_distribution.png'
-        result, error = visualization.plot_error_distribution(ate['errors'], error_dist_path, title='ATE Distribution')
-        if not error:
-            print(f'  Error Distribution: {result}')
-        error_frames_path = output_dir / 'error_over_frames.png'
-        result, error = visualization.plot_error_over_frames(ate['errors'], error_frames_path, title='ATE Over Frames')
-        if not error:
-            print(f'  Error Over Frames: {result}')
-        error_heatmap_path = output_dir / 'trajectory_error_heatmap.png'
-        result, error = visualization.plot_trajectory_with_errors(est_poses, ate['errors'], error_heatmap_path, ground_truth=gt_poses)
-        if not error:
-            print(f'  Trajectory Error Heatmap: {result}')
+        plots = PlotBatch()
+        plots.add('2D Trajectory', visualization.plot_trajectory_2d, output_dir / 'trajectory_2d.png', est_poses, ground_truth=gt_poses, label='Estimated')
+        plots.add('3D Trajectory', visualization.plot_trajectory_3d, output_dir / 'trajectory_3d.png', est_poses, ground_truth=gt_poses, label='Estimated')
+        plots.add('Error Distribution', visualization.plot_error_distribution, output_dir / 'error_distribution.png', ate['errors'], title='ATE Distribution')
+        plots.add('Error Over Frames', visualization.plot_error_over_frames, output_dir / 'error_over_frames.png', ate['errors'], title='ATE Over Frames')
+        plots.add('Trajectory Error Heatmap', visualization.plot_trajectory_with_errors, output_dir / 'trajectory_error_heatmap.png', est_poses, ate['errors'], ground_truth=gt_poses)
+        for name, (result, error) in plots.render().items():
+            if not error:
+                print(f'  {name}: {result}')
         print_section('Exporting Results')
         json_path = output_dir / 'results.json'
         result, error = export.export_to_json(eval_results, json_path)
@@ -307,10 +299,12 @@ def compare_trajectories(ground_truth_path, estimated_paths, format_type=None, o
         output_dir.mkdir(parents=True, exist_ok=True)
         print_section('Generating Comparison Plots')
         comparison_data = [{'name': r['name'], 'value': r['ate']['rmse']} for r in all_results]
-        comparison_path = output_dir / 'ate_comparison.png'
-        result, error = visualization.plot_comparison(comparison_data, 'ATE RMSE [m]', comparison_path)
-        if not error:
-            print(f'  ATE Comparison: {result}')
+        plots = PlotBatch()
+        plots.add('ATE Comparison', visualization.plot_comparison, output_dir / 'ate_comparison.png', comparison_data, 'ATE RMSE [m]')
+        print_metric('Stale Figures', len(plots.stale()))
+        for name, (result, error) in plots.render().items():
+            if not error:
+                print(f'  {name}: {result}')
         print_section('Exporting Comparison')
         latex_path = output_dir / 'comparison.tex'
         result, error = export.export_comparison_table(all_results, latex_path)
@@ -374,7 +368,7 @@ def analyze_failures_command(result_path, ground_truth_path, format_type=None, o
             print(f'  Failure Timeline: {result}')
     print()
     return 0
-def batch_evaluation_command(config_path, parallel=1):
+def batch_evaluation_command(config_path, parallel=1, columnar=None):
     print_header('Batch Evaluation')
     print_section('Loading Configuration')
     config, error = batch.load_batch_config(config_path)
@@ -384,8 +378,12 @@ def batch_evaluation_command(config_path, parallel=1):
     print_metric('Datasets', len(config['datasets']))
     print_metric('Algorithms', len(config['algorithms']))
     print_metric('Parallel Workers', parallel)
+    if columnar is None and config.get('output', {}).get('columnar'):
+        columnar = Path(config['output']['directory']) / config['output']['columnar']
+    if columnar:
+        print_metric('Columnar Results', columnar)
     print_section('Running Evaluations')
-    batch_result, error = batch.run_batch_evaluation(config, parallel=parallel)
+    batch_result, error = batch.run_batch_evaluation(config, parallel=parallel, columnar_path=columnar)
     if error:
         print(f'Error running batch: {error}')
         return 1
@@ -401,6 +399,43 @@ def batch_evaluation_command(config_path, parallel=1):
         result, error = export.export_to_json(batch_result, results_json)
         if not error:
             print(f'  Results: {result}')
+        print_section('Generating Comparison Plots')
+        plots = PlotBatch()
+        by_dataset = {}
+        for r in batch_result['results']:
+            if 'error' not in r:
+                by_dataset.setdefault(r['dataset'], []).append({'name': r['name'], 'value': r['ate']['rmse']})
+        for dataset_path, comparison_data in by_dataset.items():
+            plots.add(f'ATE Comparison ({Path(dataset_path).stem})', visualization.plot_comparison, output_dir / f'ate_comparison_{Path(dataset_path).stem}.png', comparison_data, 'ATE RMSE [m]')
+        print_metric('Stale Figures', len(plots.stale()))
+        for name, (result, error) in plots.render().items():
+            if not error:
+                print(f'  {name}: {result}')
+    print()
+    return 0
+def query_results_command(algorithm=None, dataset=None, format_type=None, where=None, sort='created', order='desc', limit=None, db_path=None):
+    print_header('Results Query')
+    filters = []
+    for expression in where or []:
+        condition, error = parse_filter(expression)
+        if error:
+            print(f'Error parsing filter {expression}: {error}')
+            return 1
+        filters.append(condition)
+    index = ResultsIndex(db_path)
+    start_time = time.perf_counter()
+    query_result, error = index.query(algorithm=algorithm, dataset=dataset, dataset_format=format_type, filters=filters, sort=sort, order=order, limit=limit)
+    elapsed = time.perf_counter() - start_time
+    if error:
+        print(f'Error querying results: {error}')
+        return 1
+    print_metric('Matching Runs', query_result['total'])
+    print_metric('Query Time', elapsed * 1000, 'ms')
+    print_section('Runs')
+    for run in query_result['runs']:
+        ate = format_number(run['ate_rmse']) if run['ate_rmse'] is not None else '-'
+        rpe = format_number(run['rpe_trans_rmse']) if run['rpe_trans_rmse'] is not None else '-'
+        print(f"  {run['run_id'][:12]}  {run['algorithm'] or '-'}  {run['dataset_format'] or '-'}  ATE {ate}  RPE {rpe}  {run['dataset']}")
     print()
     return 0
 def list_plugins_command():
@@ -423,7 +458,21 @@ def list_plugins_command():
         print_metric('Output Format', plugin['output_format'])
     print()
     return 0
-def run_plugin_command(plugin_name, dataset_path, format_type=None, output_dir=None):
+def print_playback(report):
+    print_section('Playback')
+    print_metric('Rate', report['rate'] if report['rate'] == 'max' else f"{format_number(report['rate'])}x")
+    print_metric('Drop Policy', report['drop_policy'])
+    print_metric('Frames Released', report['frames_released'])
+    print_metric('Frames Dropped', report['frames_dropped'])
+    print_metric('Drop Rate', report['drop_rate'])
+    if report['queue_latency'] is not None:
+        print_metric('Queue Latency Mean', report['queue_latency']['mean'] * 1000, 'ms')
+        print_metric('Queue Latency P95', report['queue_latency']['p95'] * 1000, 'ms')
+        print_metric('Queue Latency Max', report['queue_latency']['max'] * 1000, 'ms')
+    if report['lag'] is not None:
+        print_metric('Max Lag Behind Sensor', report['lag']['max'] * 1000, 'ms')
+    print_metric('Realtime Factor', report['realtime_factor'], 'x')
+def run_plugin_command(plugin_name, dataset_path, format_type=None, output_dir=None, playback=None):
     print_header(f'Running Plugin: {plugin_name}')
     executor = PluginExecutor(plugin_name)
     print_section('Loading Plugin')
@@ -435,7 +484,7 @@ def run_plugin_command(plugin_name, dataset_path, format_type=None, output_dir=N
     print_metric('Version', executor.plugin['config']['version'])
     print_section('Processing Dataset')
     print_metric('Dataset', dataset_path)
-    result, error = executor.run_on_dataset(dataset_path, dataset_format=format_type)
+    result, error = executor.run_on_dataset(dataset_path, dataset_format=format_type, playback=playback)
     if error:
         print(f'Error running plugin: {error}')
         return 1
@@ -444,6 +493,8 @@ def run_plugin_command(plugin_name, dataset_path, format_type=None, output_dir=N
     print_metric('Total Frames', result['total_frames'])
     print_metric('Avg Processing Time', np.mean(result['processing_times']), 's/frame')
     print_metric('Max Processing Time', np.max(result['processing_times']), 's/frame')
+    if 'playback' in result:
+        print_playback(result['playback'])
     if output_dir:
         output_dir = Path(output_dir)
         output_dir.mkdir(parents=True, exist_ok=True)
@@ -457,7 +508,7 @@ def run_plugin_command(plugin_name, dataset_path, format_type=None, output_dir=N
             print(f'  Timestamps: {times_path}')
     print()
     return 0
-def evaluate_plugin_command(plugin_name, dataset_path, ground_truth_path, format_type=None, output_dir=None):
+def evaluate_plugin_command(plugin_name, dataset_path, ground_truth_path, format_type=None, output_dir=None, playback=None):
     print_header(f'Evaluating Plugin: {plugin_name}')
     executor = PluginExecutor(plugin_name)
     print_section('Loading Plugin')
@@ -470,7 +521,7 @@ def evaluate_plugin_command(plugin_name, dataset_path, ground_truth_path, format
     print_section('Running Evaluation')
     print_metric('Dataset', dataset_path)
     print_metric('Ground Truth', ground_truth_path)
-    eval_results, error = executor.evaluate_on_dataset(dataset_path, ground_truth_path, dataset_format=format_type)
+    eval_results, error = executor.evaluate_on_dataset(dataset_path, ground_truth_path, dataset_format=format_type, playback=playback)
     if error:
         print(f'Error evaluating plugin: {error}')
         return 1
@@ -478,6 +529,8 @@ def evaluate_plugin_command(plugin_name, dataset_path, ground_truth_path, format
     print_metric('Frames Processed', eval_results['frames_processed'])
     print_metric('Total Frames', eval_results['total_frames'])
     print_metric('Avg Processing Time', eval_results['avg_processing_time'], 's/frame')
+    if 'playback' in eval_results:
+        print_playback(eval_results['playback'])
     print_section('ATE Metrics')
     ate = eval_results['ate']
     print_metric('RMSE', ate['rmse'], 'm')
@@ -536,19 +589,34 @@ def main():
     batch_parser = subparsers.add_parser('batch', help='Run batch evaluation from YAML config')
     batch_parser.add_argument('config', type=str, help='Path to YAML configuration file')
     batch_parser.add_argument('--parallel', type=int, default=1, help='Number of parallel workers')
+    batch_parser.add_argument('--columnar', type=str, default=None, help='Append per-run results to a columnar HDF5 file')
+    query_parser = subparsers.add_parser('query', help='Query the results index')
+    query_parser.add_argument('--algorithm', type=str, default=None, help='Algorithm name')
+    query_parser.add_argument('--dataset', type=str, default=None, help='Dataset path')
+    query_parser.add_argument('--format', type=str, default=None, help='Dataset format (kitti, tum, euroc)')
+    query_parser.add_argument('--where', type=str, action='append', default=None, help='Metric filter such as "ate_rmse<0.1" (repeatable)')
+    query_parser.add_argument('--sort', type=str, default='created', help='Column to sort by')
+    query_parser.add_argument('--order', type=str, default='desc', choices=['asc', 'desc'], help='Sort order')
+    query_parser.add_argument('--limit', type=int, default=None, help='Maximum number of runs to return')
+    query_parser.add_argument('--db', type=str, default=None, help='Path to results index database')
     list_plugins_parser = subparsers.add_parser('list-plugins', help='List available SLAM plugins')
     run_plugin_parser = subparsers.add_parser('run-plugin', help='Run SLAM plugin on dataset')
     run_plugin_parser.add_argument('plugin', type=str, help='Plugin name')
     run_plugin_parser.add_argument('--dataset', type=str, required=True, help='Path to dataset')
     run_plugin_parser.add_argument('--format', type=str, default=None, help='Dataset format (kitti, tum, euroc)')
     run_plugin_parser.add_argument('--output', type=str, default=None, help='Output directory for results')
+    run_plugin_parser.add_argument('--rate', type=str, default=None, help='Replay frames at dataset timestamps: 1, 2x, ... or max (default: offline)')
+    run_plugin_parser.add_argument('--drop-policy', type=str, default='block', choices=cfg.PLAYBACK_DROP_POLICIES, help='What to do when the plugin falls behind during playback')
     eval_plugin_parser = subparsers.add_parser('eval-plugin', help='Evaluate SLAM plugin')
     eval_plugin_parser.add_argument('plugin', type=str, help='Plugin name')
     eval_plugin_parser.add_argument('--dataset', type=str, required=True, help='Path to dataset')
     eval_plugin_parser.add_argument('--ground-truth', type=str, required=True, help='Path to ground truth')
     eval_plugin_parser.add_argument('--format', type=str, default=None, help='Dataset format (kitti, tum, euroc)')
     eval_plugin_parser.add_argument('--output', type=str, default=None, help='Output directory for results')
+    eval_plugin_parser.add_argument('--rate', type=str, default=None, help='Replay frames at dataset timestamps: 1, 2x, ... or max (default: offline)')
+    eval_plugin_parser.add_argument('--drop-policy', type=str, default='block', choices=cfg.PLAYBACK_DROP_POLICIES, help='What to do when the plugin falls behind during playback')
     args = parser.parse_args()
+    playback = {'rate': args.rate, 'drop_policy': args.drop_policy} if getattr(args, 'rate', None) is not None else None
     if args.command == 'preview':
         return preview_dataset(args.dataset, format_type=args.format, plot=args.plot, detailed=args.detailed)
     elif args.command == 'evaluate':
@@ -560,13 +628,15 @@ def main():
     elif args.command == 'analyze-failures':
         return analyze_failures_command(args.result, args.ground_truth, format_type=args.format, output_dir=args.output)
     elif args.command == 'batch':
-        return batch_evaluation_command(args.config, parallel=args.parallel)
+        return batch_evaluation_command(args.config, parallel=args.parallel, columnar=args.columnar)
+    elif args.command == 'query':
+        return query_results_command(args.algorithm, args.dataset, format_type=args.format, where=args.where, sort=args.sort, order=args.order, limit=args.limit, db_path=args.db)
     elif args.command == 'list-plugins':
         return list_plugins_command()
     elif args.command == 'run-plugin':
-        return run_plugin_command(args.plugin, args.dataset, format_type=args.format, output_dir=args.output)
+        return run_plugin_command(args.plugin, args.dataset, format_type=args.format, output_dir=args.output, playback=playback)
     elif args.command == 'eval-plugin':
-        return evaluate_plugin_command(args.plugin, args.dataset, args.ground_truth, format_type=args.format, output_dir=args.output)
+        return evaluate_plugin_command(args.plugin, args.dataset, args.ground_truth, format_type=args.format, output_dir=args.output, playback=playback)
     else:
         parser.print_help()
         return 1